@@ -2,6 +2,7 @@ from flask import Flask, render_template, request, jsonify, Response, session, r
 import sqlite3
 import threading
 import time
+import math
 from datetime import datetime, timedelta
 import csv
 import io
@@ -12,7 +13,18 @@ from pymodbus.payload import BinaryPayloadDecoder
 from pymodbus.client.sync import ModbusTcpClient
 from pymodbus.constants import Endian
 import json
-import threading
+import asyncio
+import queue
+import atexit
+import re
+import logging
+import sys
+import zlib
+import base64
+import mmap
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -125,64 +137,581 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 # Konfigurasi Modbus
 MODBUS_IP = "10.23.107.228"
 MODBUS_PORT = 502
-MODBUS_REGISTER = 50  
-UNIT_ID = 1 
+MODBUS_REGISTER = 50
+UNIT_ID = 1
+MODBUS_TIMEOUT = 3  # seconds per request / connect attempt
+MODBUS_IDLE_TIMEOUT = 60  # close pooled sockets unused for this long
+
+# === MODBUS CONNECTION POOL ===
+class PooledModbusConnection:
+    """Long-lived Modbus TCP client for one (ip, port, unit) with usage stats"""
+
+    def __init__(self, ip, port, unit):
+        self.ip = ip
+        self.port = port
+        self.unit = unit
+        self.client = ModbusTcpClient(ip, port=port, timeout=MODBUS_TIMEOUT)
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+        self.stats = {
+            "connects": 0,
+            "connect_failures": 0,
+            "reads": 0,
+            "read_errors": 0,
+            "idle_closes": 0,
+            "last_error": None,
+            "last_connected": None,
+            "last_read": None,
+        }
+
+    def is_open(self):
+        return self.client.is_socket_open()
+
+    def _ensure_connected(self):
+        if self.client.is_socket_open():
+            return True
+        if self.client.connect():
+            self.stats["connects"] += 1
+            self.stats["last_connected"] = datetime.now().isoformat(timespec='seconds')
+            return True
+        self.stats["connect_failures"] += 1
+        self.stats["last_error"] = f"connect to {self.ip}:{self.port} failed"
+        return False
+
+    def acquire(self):
+        """Lock the connection and (re)connect lazily; yields self or None if unreachable"""
+        return _PooledConnectionContext(self)
+
+    def read_holding_registers(self, address, count):
+        """Read holding registers; returns the response or None on any failure"""
+        self.last_used = time.monotonic()
+        try:
+            resp = self.client.read_holding_registers(address=address, count=count, unit=self.unit)
+        except Exception as e:
+            self.stats["read_errors"] += 1
+            self.stats["last_error"] = str(e)
+            # Drop the socket so the next acquire reconnects
+            self.client.close()
+            return None
+
+        if resp is None or resp.isError():
+            self.stats["read_errors"] += 1
+            self.stats["last_error"] = f"error reading {count} registers at {address}: {resp}"
+            # No response at all means the link is bad; a Modbus exception reply does not
+            if not hasattr(resp, "exception_code"):
+                self.client.close()
+            return None
+
+        self.stats["reads"] += 1
+        self.stats["last_read"] = datetime.now().isoformat(timespec='seconds')
+        return resp
+
+    def close(self):
+        with self.lock:
+            self.client.close()
+
+
+class _PooledConnectionContext:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.lock.acquire()
+        self.conn.last_used = time.monotonic()
+        try:
+            return self.conn if self.conn._ensure_connected() else None
+        except Exception as e:
+            self.conn.stats["connect_failures"] += 1
+            self.conn.stats["last_error"] = str(e)
+            self.conn.client.close()
+            return None
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.conn.stats["last_error"] = str(exc)
+            self.conn.client.close()
+        self.conn.last_used = time.monotonic()
+        self.conn.lock.release()
+        return False
+
+
+class ModbusConnectionPool:
+    """Shared pool keeping one thread-safe Modbus TCP client per (ip, port, unit)"""
+
+    def __init__(self, idle_timeout=MODBUS_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._connections = {}
+        self._lock = threading.Lock()
+        self._janitor = None
+
+    def get(self, ip, port=502, unit=1):
+        key = (ip, int(port), int(unit))
+        with self._lock:
+            conn = self._connections.get(key)
+            if conn is None:
+                conn = PooledModbusConnection(*key)
+                self._connections[key] = conn
+            if self._janitor is None or not self._janitor.is_alive():
+                self._janitor = threading.Thread(target=self._close_idle_loop, daemon=True)
+                self._janitor.start()
+        return conn
+
+    def close_idle(self):
+        """Close sockets that have not been used for idle_timeout seconds"""
+        now = time.monotonic()
+        with self._lock:
+            connections = list(self._connections.values())
+        for conn in connections:
+            if now - conn.last_used < self.idle_timeout:
+                continue
+            # Skip connections that are busy right now
+            if not conn.lock.acquire(blocking=False):
+                continue
+            try:
+                if conn.is_open():
+                    conn.client.close()
+                    conn.stats["idle_closes"] += 1
+            finally:
+                conn.lock.release()
+
+    def _close_idle_loop(self):
+        while True:
+            time.sleep(max(1, self.idle_timeout / 4))
+            try:
+                self.close_idle()
+            except Exception as e:
+                modbus_log.error("[MODBUS POOL] Idle sweep failed: %s", e)
+
+    def close_all(self):
+        with self._lock:
+            connections = list(self._connections.values())
+        for conn in connections:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            connections = list(self._connections.values())
+        return [
+            {
+                "ip": conn.ip,
+                "port": conn.port,
+                "unit": conn.unit,
+                "open": conn.is_open(),
+                "idle_seconds": round(time.monotonic() - conn.last_used, 1),
+                **conn.stats,
+            }
+            for conn in connections
+        ]
+
+
+modbus_pool = ModbusConnectionPool()
+
+def load_config():
+    """Read config.json as a dict (empty if missing or unreadable)"""
+    try:
+        with open("config.json", "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+def update_config(**values):
+    """Merge values into config.json, keeping the other keys"""
+    data = load_config()
+    data.update(values)
+    with open("config.json", "w") as f:
+        json.dump(data, f)
+
+# === LOGGING ===
+# Records go to stdout (rate-limited per call site, so a flapping device cannot
+# flood the journal) and to an in-memory ring served by /api/logs. Hot-path
+# messages use %-style arguments and isEnabledFor() guards so they cost next
+# to nothing when their level is off.
+LOG_DEFAULTS = {"level": "INFO", "ringSize": 2000, "rateLimitBurst": 5, "rateLimitWindow": 60}
+
+log = logging.getLogger("isms")
+acq_log = log.getChild("acq")          # acquisition engine, snapshots, high-rate capture
+modbus_log = log.getChild("modbus")    # connection pool, register reads
+db_log = log.getChild("db")            # schema, ingest writer, calibration versions
+api_log = log.getChild("api")          # HTTP handlers
+
+
+class LogRing(logging.Handler):
+    """Bounded in-memory buffer of recent records as plain dicts"""
+
+    def __init__(self, capacity):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.seq = 0
+
+    def emit(self, record):
+        message = record.getMessage()
+        # Handler.lock is reentrant, so this is safe whether or not handle() already holds it
+        with self.lock:
+            self.seq += 1
+            self.records.append({
+                "seq": self.seq,
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": message,
+            })
+
+    def resize(self, capacity):
+        with self.lock:
+            self.records = deque(self.records, maxlen=capacity)
+
+    def dump(self, min_level=logging.NOTSET, since=0, limit=500, logger=None):
+        with self.lock:
+            snapshot = list(self.records)
+        records = [
+            r for r in snapshot
+            if r["seq"] > since and logging.getLevelName(r["level"]) >= min_level
+            and (not logger or r["logger"] == logger or r["logger"].startswith(logger + "."))
+        ]
+        return records[-limit:]
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most `burst` records per call site through every `window` seconds"""
+
+    def __init__(self, burst, window):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.sites = {}
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        now = record.created
+        window_start, count, suppressed = self.sites.get(key, (now, 0, 0))
+        if now - window_start >= self.window:
+            if suppressed:
+                record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+            window_start, count, suppressed = now, 0, 0
+        if count >= self.burst:
+            self.sites[key] = (window_start, count, suppressed + 1)
+            return False
+        self.sites[key] = (window_start, count + 1, suppressed)
+        return True
+
+
+def configure_logging(**overrides):
+    """(Re)apply logging settings from config.json plus any overrides"""
+    settings = {**LOG_DEFAULTS, **load_config().get("logging", {}), **overrides}
+    log.setLevel(str(settings["level"]).upper())
+    log_ring.resize(int(settings["ringSize"]))
+    stdout_limit.burst = int(settings["rateLimitBurst"])
+    stdout_limit.window = float(settings["rateLimitWindow"])
+    return settings
+
+
+log.propagate = False
+log_ring = LogRing(LOG_DEFAULTS["ringSize"])
+stdout_limit = RateLimitFilter(LOG_DEFAULTS["rateLimitBurst"], LOG_DEFAULTS["rateLimitWindow"])
+stdout_handler = logging.StreamHandler(sys.stdout)
+stdout_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+stdout_handler.addFilter(stdout_limit)
+log.addHandler(log_ring)
+log.addHandler(stdout_handler)
+configure_logging()
 
 def save_interval_to_file(interval):
     try:
-        with open("config.json", "w") as f:
-            json.dump({"secTimeInterval": interval}, f)
-        print(f"[CONFIG] Interval saved to file: {interval} seconds")
+        update_config(secTimeInterval=interval)
+        log.info("[CONFIG] Interval saved to file: %s seconds", interval)
     except Exception as e:
-        print(f"[SAVE ERROR] Failed to write interval to file: {e}")
+        log.error("[SAVE ERROR] Failed to write interval to file: %s", e)
+
+MIN_INTERVAL = 0.1  # seconds
+MAX_INTERVAL = 3600
+
+def normalize_interval(value):
+    """Interval in seconds; whole values stay int so the UI shows 5 rather than 5.0"""
+    value = round(float(value), 3)
+    return int(value) if value.is_integer() else value
 
 def load_interval_from_file():
     try:
         with open("config.json", "r") as f:
             data = json.load(f)
-            interval = int(data.get("secTimeInterval", 5))
-            print(f"[CONFIG] Interval loaded from file: {interval} seconds")
+            interval = normalize_interval(data.get("secTimeInterval", 5))
+            interval = min(MAX_INTERVAL, max(MIN_INTERVAL, interval))
+            log.info("[CONFIG] Interval loaded from file: %s seconds", interval)
             return interval
     except Exception as e:
-        print(f"[LOAD WARNING] Using default interval (5s): {e}")
+        log.warning("[LOAD WARNING] Using default interval (5s): %s", e)
         return 5
 
-def get_sensor_calibration(sensor_number):
-    """Get calibration settings for a specific sensor"""
-    try:
+# === REGISTER READ PLANNER ===
+MODBUS_MAX_BLOCK = 125  # protocol limit for one read_holding_registers request
+READ_PLAN_MAX_GAP = int(load_config().get("readPlanMaxGap", 8))  # unused registers we may read through
+
+def plan_register_reads(fields, count=2, max_gap=None, max_block=MODBUS_MAX_BLOCK):
+    """Merge {name: address} into as few contiguous block reads as possible.
+
+    Returns a list of (start, length, [(name, offset), ...]) blocks. Fields with
+    no or a negative address are left out and come back as None from execute_read_plan.
+    """
+    if max_gap is None:
+        max_gap = READ_PLAN_MAX_GAP
+
+    blocks = []
+    readable = [(name, address) for name, address in fields.items() if address is not None and address >= 0]
+    for name, address in sorted(readable, key=lambda item: item[1]):
+        if blocks:
+            start, length, members = blocks[-1]
+            end = start + length
+            new_end = max(end, address + count)
+            if address - end <= max_gap and new_end - start <= max_block:
+                members.append((name, address - start))
+                blocks[-1] = (start, new_end - start, members)
+                continue
+        blocks.append((address, count, [(name, 0)]))
+    return blocks
+
+def execute_read_plan(conn, plan, fields, count=2):
+    """Run a read plan on an acquired pooled connection.
+
+    Returns {name: registers or None}. When a merged block is rejected by the
+    device (e.g. it spans an unmapped register) its fields are read one by one.
+    """
+    result = {name: None for name in fields}
+    for start, length, members in plan:
+        response = conn.read_holding_registers(start, length)
+        if response is not None:
+            registers = response.registers
+            for name, offset in members:
+                chunk = registers[offset:offset + count]
+                result[name] = chunk if len(chunk) == count else None
+        elif len(members) > 1 and conn.is_open():
+            for name, offset in members:
+                single = conn.read_holding_registers(start + offset, count)
+                result[name] = single.registers if single is not None else None
+    return result
+
+def decode_float_registers(registers):
+    """Decode a big-endian 32-bit float from two registers"""
+    decoder = BinaryPayloadDecoder.fromRegisters(registers, byteorder=Endian.Big, wordorder=Endian.Big)
+    return round(decoder.decode_32bit_float(), 4)
+
+def read_float_fields(ip, fields, port=502, unit=1, plan=None):
+    """Read {name: address} 32-bit floats from one device using coalesced block reads.
+
+    Returns (connected, {name: value or None}).
+    """
+    if plan is None:
+        plan = plan_register_reads(fields)
+    with modbus_pool.get(ip, port, unit).acquire() as client:
+        if not client:
+            return False, {name: None for name in fields}
+        registers = execute_read_plan(client, plan, fields)
+
+    return True, decode_float_fields(ip, registers)
+
+def decode_float_fields(ip, registers):
+    """Decode {name: registers or None} into {name: float or None}"""
+    values = {}
+    for name, regs in registers.items():
+        if regs is None:
+            values[name] = None
+            continue
+        try:
+            values[name] = decode_float_registers(regs)
+        except Exception as e:
+            modbus_log.warning("Error decoding %s from %s: %s", name, ip, e)
+            values[name] = None
+    return values
+
+# Basic sensor channels: CH1..CH7 as 32-bit floats at 50, 52, ... 62
+BASIC_FIELDS = {f"ch{i + 1}": MODBUS_REGISTER + i * 2 for i in range(7)}
+BASIC_READ_PLAN = plan_register_reads(BASIC_FIELDS)
+
+# === CALIBRATION TABLE ===
+SENSOR_COUNT = 7
+
+def default_calibration(sensor_number):
+    return {
+        'name': f'Sensor {sensor_number}',
+        'enabled': True,
+        'min': 0.0,
+        'max': 100.0,
+        'unit': ''
+    }
+
+
+class CalibrationSnapshot:
+    """Immutable calibration of all channels; index 0 is sensor 1"""
+
+    def __init__(self, version, calibrations):
+        self.version = version
+        self.calibrations = calibrations
+        self.enabled = np.array([cal['enabled'] for cal in calibrations], dtype=bool)
+        self.mins = np.array([cal['min'] for cal in calibrations], dtype=np.float64)
+        self.spans = np.array([cal['max'] - cal['min'] for cal in calibrations], dtype=np.float64)
+
+    def apply(self, raw):
+        """Vectorized 0-100 -> min-max mapping; raw is (..., SENSOR_COUNT), disabled channels give NaN"""
+        raw = np.clip(np.asarray(raw, dtype=np.float64), 0, 100)
+        calibrated = self.mins + (raw / 100.0) * self.spans
+        return np.round(np.where(self.enabled, calibrated, np.nan), 4)
+
+
+class CalibrationTable:
+    """In-memory sensor calibration, loaded once and swapped atomically on reload.
+
+    Each distinct set of settings is persisted in calibration_versions; the
+    snapshot's version is that row id and is stored with every data row.
+    """
+
+    def __init__(self):
+        self._reload_lock = threading.Lock()
+        self._versions = {}
+        self.current = CalibrationSnapshot(0, [default_calibration(i) for i in range(1, SENSOR_COUNT + 1)])
+
+    def get_version(self, version):
+        """Snapshot of a past calibration version (cached; versions never change)"""
+        snapshot = self._versions.get(version)
+        if snapshot is not None:
+            return snapshot
         conn = sqlite3.connect(DATABASE)
-        c = conn.cursor()
-        c.execute('''SELECT sensor_name, enabled, min_value, max_value, unit 
-                     FROM sensor_settings WHERE sensor_number = ?''', (sensor_number,))
-        row = c.fetchone()
+        row = conn.execute("SELECT settings FROM calibration_versions WHERE id = ?", (version,)).fetchone()
         conn.close()
-        
-        if row:
-            return {
-                'name': row[0] or f'Sensor {sensor_number}',
-                'enabled': bool(row[1]),
-                'min': float(row[2]) if row[2] is not None else 0.0,
-                'max': float(row[3]) if row[3] is not None else 100.0,
-                'unit': row[4] or ''
-            }
-        else:
-            # Return default calibration
-            return {
-                'name': f'Sensor {sensor_number}',
-                'enabled': True,
-                'min': 0.0,
-                'max': 100.0,
-                'unit': ''
-            }
-    except Exception as e:
-        print(f"Error getting sensor calibration for sensor {sensor_number}: {e}")
-        return {
-            'name': f'Sensor {sensor_number}',
-            'enabled': True,
-            'min': 0.0,
-            'max': 100.0,
-            'unit': ''
-        }
+        if row is None:
+            raise KeyError(f"Unknown calibration version {version}")
+        calibrations = []
+        for i, settings in enumerate(json.loads(row[0])):
+            calibration = default_calibration(i + 1)
+            calibration.update(settings)
+            calibrations.append(calibration)
+        snapshot = CalibrationSnapshot(version, calibrations)
+        self._versions[version] = snapshot
+        return snapshot
+
+    def reload(self):
+        """Re-read sensor_settings; readers keep using the old snapshot until the swap"""
+        with self._reload_lock:
+            conn = sqlite3.connect(DATABASE)
+            c = conn.cursor()
+            c.execute('''SELECT sensor_number, sensor_name, enabled, min_value, max_value, unit
+                         FROM sensor_settings ORDER BY id''')
+            rows = c.fetchall()
+            conn.close()
+
+            calibrations = [default_calibration(i) for i in range(1, SENSOR_COUNT + 1)]
+            seen = set()
+            for sensor_number, name, enabled, min_value, max_value, unit in rows:
+                # Keep the first row per sensor, like the old per-sensor lookup did
+                if sensor_number in seen or not 1 <= (sensor_number or 0) <= SENSOR_COUNT:
+                    continue
+                seen.add(sensor_number)
+                calibrations[sensor_number - 1] = {
+                    'name': name or f'Sensor {sensor_number}',
+                    'enabled': bool(enabled),
+                    'min': float(min_value) if min_value is not None else 0.0,
+                    'max': float(max_value) if max_value is not None else 100.0,
+                    'unit': unit or ''
+                }
+
+            # Reuse the latest version if the mapping did not change
+            settings = json.dumps([{key: cal[key] for key in ('enabled', 'min', 'max')} for cal in calibrations])
+            conn = sqlite3.connect(DATABASE)
+            c = conn.cursor()
+            c.execute("SELECT id, settings FROM calibration_versions ORDER BY id DESC LIMIT 1")
+            row = c.fetchone()
+            if row and row[1] == settings:
+                version = row[0]
+            else:
+                c.execute("INSERT INTO calibration_versions (created_at, settings) VALUES (?, ?)",
+                          (datetime.now().isoformat(timespec='seconds'), settings))
+                version = c.lastrowid
+                conn.commit()
+                db_log.info("[CALIBRATION] New calibration version %s", version)
+            conn.close()
+
+            snapshot = CalibrationSnapshot(version, calibrations)
+            self._versions[version] = snapshot
+            self.current = snapshot
+            return snapshot
+
+
+calibration_table = CalibrationTable()
+
+DATA_CHANNELS = [f"ch{i}" for i in range(1, SENSOR_COUNT + 1)]
+DATA_RAW_CHANNELS = [f"raw{i}" for i in range(1, SENSOR_COUNT + 1)]
+DATA_COLUMNS = ["id", "date", "time"] + DATA_CHANNELS + DATA_RAW_CHANNELS + ["cal_version", "quality"]
+FULL_DATA_COLUMNS = ["e_speed", "e_load", "e_fuelrate", "e_runhour", "e_oilpressure",
+                     "pm_current", "pm_voltage", "pm_r", "pm_q", "pm_s"]
+# Fixed channels stored as columns of data/full_data, by device
+WIDE_CHANNEL_DEVICES = {"basic": DATA_CHANNELS, "engine": FULL_DATA_COLUMNS[:5], "powermeter": FULL_DATA_COLUMNS[5:]}
+
+# Row quality bitmask stored with every data/full_data row; values that were
+# not read, and values of switched-off channels, are stored as NULL, never as 0.0
+QUALITY_OK = 0
+QUALITY_TIMEOUT = 1        # device did not answer within ACQUISITION_DEVICE_TIMEOUT
+QUALITY_DECODE_ERROR = 2   # device answered, but a channel's registers could not be read or decoded
+QUALITY_DISABLED = 4       # device not configured; live per-device quality only, never stored in a row
+QUALITY_OFFLINE = 8        # connecting to the device failed
+QUALITY_NO_ANSWER = QUALITY_TIMEOUT | QUALITY_OFFLINE
+QUALITY_NAMES = {QUALITY_TIMEOUT: "timeout", QUALITY_DECODE_ERROR: "decode_error",
+                 QUALITY_DISABLED: "disabled", QUALITY_OFFLINE: "offline"}
+
+# Channels deadband/swinging-door compression can leave out (see CHANNEL COMPRESSION).
+# Bit i of a row's held column: channel i repeats its last stored value;
+# bit HELD_INTERP_SHIFT + i: channel i lies on the line between its stored neighbours.
+COMPRESSIBLE_CHANNELS = {"data": DATA_CHANNELS, "full_data": FULL_DATA_COLUMNS}
+HELD_INTERP_SHIFT = 16
+
+def quality_label(quality):
+    """'timeout|decode_error' style label; empty for good rows and rows stored before quality flags"""
+    return "|".join(name for bit, name in QUALITY_NAMES.items() if (quality or 0) & bit)
+
+def has_raw_values(raw, versions):
+    """Rows recorded with a calibration version and raw values (NaN where a channel was not read)"""
+    return ~np.isnan(versions) & ~np.isnan(raw).all(axis=1)
+
+def calibrate_columns(stored, raw, versions):
+    """Calibrated (N, 7) values from stored ch, raw and cal_version arrays; NaN where nothing was read"""
+    values = stored.copy()
+    has_raw = has_raw_values(raw, versions)
+    for version in np.unique(versions[has_raw]):
+        mask = has_raw & (versions == version)
+        values[mask] = calibration_table.get_version(int(version)).apply(raw[mask])
+    return values
+
+def calibrated_data_values(rows):
+    """(N, 7) calibrated channel values for rows with the DATA_COLUMNS layout.
+
+    Rows carrying raw values are calibrated here with the version they were
+    recorded with, one vectorized pass per version. Older rows without raw
+    values keep their stored ch1..ch7. Unread values are NaN.
+    """
+    if not rows:
+        return np.empty((0, SENSOR_COUNT))
+    table = np.array([row[3:] for row in rows], dtype=np.float64)
+    return calibrate_columns(table[:, :SENSOR_COUNT], table[:, SENSOR_COUNT:2 * SENSOR_COUNT],
+                             table[:, 2 * SENSOR_COUNT])
+
+def data_rows_to_dicts(rows, values):
+    """JSON-ready rows: id, date, time, calibrated ch1..ch7 (None when not read) and quality"""
+    result = []
+    for row, channel_values in zip(rows, values.tolist()):
+        item = {"id": row[0], "date": row[1], "time": row[2], "quality": row[-1]}
+        for name, value in zip(DATA_CHANNELS, channel_values):
+            item[name] = None if value != value else round(value, 4)
+        result.append(item)
+    return result
+
+def data_export_rows(rows):
+    """CSV rows: id, date, time, calibrated ch1..ch7 (empty when not read) and the quality label"""
+    return [(row[0], row[1], row[2], *[None if v != v else v for v in values], quality_label(row[-1]))
+            for row, values in zip(rows, calibrated_data_values(rows).round(4).tolist())]
+
+def get_sensor_calibration(sensor_number):
+    """Get calibration settings for a specific sensor"""
+    if 1 <= sensor_number <= SENSOR_COUNT:
+        return dict(calibration_table.current.calibrations[sensor_number - 1])
+    return default_calibration(sensor_number)
 
 def apply_sensor_calibration(raw_value, sensor_number):
     """Apply calibration to raw sensor value (0-100) to get calibrated value"""
@@ -200,7 +729,7 @@ def apply_sensor_calibration(raw_value, sensor_number):
         
         return round(calibrated_value, 4)
     except Exception as e:
-        print(f"Error applying calibration for sensor {sensor_number}: {e}")
+        acq_log.error("Error applying calibration for sensor %s: %s", sensor_number, e)
         return raw_value
 
 
@@ -209,32 +738,31 @@ interval_lock = threading.Lock()
 secTimeInterval = load_interval_from_file()
 running = True
 
-# Global thread references for proper cleanup
-basic_thread = None
-advanced_thread = None
+# Global thread reference for proper cleanup
+acquisition_thread = None
 thread_stop_event = threading.Event()
 
 @app.route("/set-interval", methods=["POST"])
 def set_interval():
-    global secTimeInterval, basic_thread, advanced_thread, thread_stop_event
+    global secTimeInterval, acquisition_thread, thread_stop_event
     data = request.get_json()
     try:
-        detik = int(data.get("interval"))
-        if 1 <= detik <= 3600:
+        detik = normalize_interval(data.get("interval"))
+        if MIN_INTERVAL <= detik <= MAX_INTERVAL:
             with interval_lock:
                 old_interval = secTimeInterval
                 secTimeInterval = detik
                 save_interval_to_file(detik)
-                print(f"[SET] Interval updated from {old_interval}s to {detik}s")
+                acq_log.info("[SET] Interval updated from %ss to %ss", old_interval, detik)
                 
                 # If system is running, restart threads with new interval
-                if running and (basic_thread or advanced_thread):
-                    print("[SET] Restarting data collection threads with new interval...")
+                if running and acquisition_thread:
+                    acq_log.info("[SET] Restarting data collection threads with new interval...")
                     restart_data_collection_threads()
                     
             return jsonify({"status": "success", "secTimeInterval": secTimeInterval})
         else:
-            return jsonify({"status": "invalid_range", "message": "Interval must be between 1-3600 seconds"}), 400
+            return jsonify({"status": "invalid_range", "message": f"Interval must be between {MIN_INTERVAL}-{MAX_INTERVAL} seconds"}), 400
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -244,42 +772,991 @@ def get_interval():
     with interval_lock:
         return jsonify({"secTimeInterval": secTimeInterval})
 
+def start_acquisition_thread():
+    """Start the acquisition engine in its own daemon thread"""
+    global acquisition_thread
+    acquisition_thread = threading.Thread(target=AcquisitionEngine(thread_stop_event).run, name="acquisition")
+    acquisition_thread.daemon = True
+    acquisition_thread.start()
+
 def restart_data_collection_threads():
     """Restart data collection threads with new interval"""
-    global basic_thread, advanced_thread, thread_stop_event, running
+    global acquisition_thread, thread_stop_event, running
     
     try:
-        # Signal existing threads to stop
+        # Signal existing thread to stop
         thread_stop_event.set()
         
-        # Wait for threads to finish (with timeout)
-        if basic_thread and basic_thread.is_alive():
-            basic_thread.join(timeout=2)
-        if advanced_thread and advanced_thread.is_alive():
-            advanced_thread.join(timeout=2)
+        # Wait for the thread to finish (with timeout)
+        if acquisition_thread and acquisition_thread.is_alive():
+            acquisition_thread.join(timeout=ACQUISITION_DEVICE_TIMEOUT + 2)
             
-        # Clear the stop event for new threads
+        # Clear the stop event for the new thread
         thread_stop_event.clear()
         
-        # Start new threads if system is still running
+        # Start new thread if system is still running
         if running:
-            basic_thread = threading.Thread(target=read_basic_sensor_data)
-            basic_thread.daemon = True
-            basic_thread.start()
-            
-            advanced_thread = threading.Thread(target=read_advanced_data)
-            advanced_thread.daemon = True
-            advanced_thread.start()
-            
-            print(f"[RESTART] Data collection threads restarted with {secTimeInterval}s interval")
+            start_acquisition_thread()
+            acq_log.info("[RESTART] Data collection threads restarted with %ss interval", secTimeInterval)
         
     except Exception as e:
-        print(f"[RESTART ERROR] Failed to restart threads: {e}")
+        acq_log.error("[RESTART ERROR] Failed to restart threads: %s", e)
+
+# === PARTITIONED STORAGE ===
+# Raw rows of data and full_data are written to one SQLite file per table and
+# period (partitions/data_2026-10.db). Rows written before partitioning stay in
+# the main database, which is read as the oldest store. Retention and clearing
+# delete whole files, so they take the same time whatever the row count.
+# Finished partitions are later compacted into archives (see COLD ARCHIVE).
+PARTITION_DIR = os.path.join(BASE_DIR, "partitions")
+PARTITIONED_TABLES = ("data", "full_data", "samples")
+NARROW_TABLES = ("samples",)  # keyed by (channel_id, ts); no id column, never archived
+PARTITION_FILE_RE = re.compile(r"^(data|full_data|samples)_(\d{4}-\d{2}(?:-\d{2})?)\.(db|arc)$")
+STORAGE_DEFAULTS = {
+    "partitionPeriod": "month",  # "month" or "day"
+    "retentionDays": 0,  # raw partitions older than this are dropped; 0 keeps everything
+    "archive": True,  # compact finished partitions into columnar archives
+}
+
+TABLE_SCHEMAS = {
+    "data": """CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                time TEXT,
+                ch1 REAL,
+                ch2 REAL,
+                ch3 REAL,
+                ch4 REAL,
+                ch5 REAL,
+                ch6 REAL,
+                ch7 REAL,
+                raw1 REAL,
+                raw2 REAL,
+                raw3 REAL,
+                raw4 REAL,
+                raw5 REAL,
+                raw6 REAL,
+                raw7 REAL,
+                cal_version INTEGER,
+                ts INTEGER,
+                quality INTEGER,
+                held INTEGER
+            )""",
+    "full_data": """CREATE TABLE {table} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                time TEXT,
+                e_speed REAL,
+                e_load REAL,
+                e_fuelrate REAL,
+                e_runhour REAL,
+                e_oilpressure REAL,
+                pm_current REAL,
+                pm_voltage REAL,
+                pm_r REAL,
+                pm_q REAL,
+                pm_s REAL,
+                ts INTEGER,
+                quality INTEGER,
+                held INTEGER
+            )""",
+    # Channels from the registry (see CHANNEL REGISTRY): one row per channel and sample
+    "samples": """CREATE TABLE IF NOT EXISTS {table} (
+                channel_id INTEGER NOT NULL,
+                ts INTEGER NOT NULL,
+                value REAL,
+                quality INTEGER,
+                PRIMARY KEY (channel_id, ts)
+            ) WITHOUT ROWID""",
+}
+
+os.makedirs(PARTITION_DIR, exist_ok=True)
+
+def get_storage_config():
+    config = dict(STORAGE_DEFAULTS)
+    config.update(load_config().get("storage") or {})
+    return config
+
+def partition_key(ts_ms, period=None):
+    """Partition a timestamp belongs to, by local calendar month or day"""
+    stamp = datetime.fromtimestamp(ts_ms / 1000)
+    if (period or get_storage_config()["partitionPeriod"]) == "day":
+        return stamp.strftime("%Y-%m-%d")
+    return stamp.strftime("%Y-%m")
+
+def partition_bounds(key):
+    """[start, end) of a partition key in epoch ms"""
+    if len(key) == 7:
+        start = datetime.strptime(key, "%Y-%m")
+        end = (start + timedelta(days=32)).replace(day=1)
+    else:
+        start = datetime.strptime(key, "%Y-%m-%d")
+        end = start + timedelta(days=1)
+    return int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+
+def partition_path(table, key):
+    return os.path.join(PARTITION_DIR, f"{table}_{key}.db")
+
+def list_partitions(table=None):
+    """Partition files and archives on disk, oldest first (an archive before a partition of the same period)"""
+    partitions = []
+    for name in os.listdir(PARTITION_DIR):
+        match = PARTITION_FILE_RE.match(name)
+        if not match or (table and match.group(1) != table):
+            continue
+        start_ms, end_ms = partition_bounds(match.group(2))
+        partitions.append({"table": match.group(1), "key": match.group(2), "path": os.path.join(PARTITION_DIR, name),
+                           "start_ms": start_ms, "end_ms": end_ms, "archive": match.group(3) == "arc"})
+    partitions.sort(key=lambda p: (p["start_ms"], p["end_ms"], not p["archive"]))
+    return partitions
+
+def list_stores(table, start_ms=None, end_ms=None, newest_first=False):
+    """(kind, path) of every store holding rows of `table` in [start_ms, end_ms), in id order.
+
+    kind is "sqlite" for the main database and partitions, "archive" for
+    compacted partitions. Rows that arrive for a period after it was archived
+    go to a new partition file, which is read after the archive.
+    """
+    stores = [("sqlite", DATABASE)] + [
+        ("archive" if p["archive"] else "sqlite", p["path"]) for p in list_partitions(table)
+        if (start_ms is None or p["end_ms"] > start_ms) and (end_ms is None or p["start_ms"] < end_ms)
+    ]
+    return stores[::-1] if newest_first else stores
+
+def data_stores(table, start_ms=None, end_ms=None, newest_first=False):
+    """SQLite files holding rows of `table` in [start_ms, end_ms): the main database, then partitions"""
+    return [path for kind, path in list_stores(table, start_ms, end_ms, newest_first) if kind == "sqlite"]
+
+def query_stores(table, sql, params=(), start_ms=None, end_ms=None, newest_first=False, limit=None):
+    """Run one query against every store of `table` and concatenate the rows.
+
+    With newest_first and a limit (for ORDER BY id DESC LIMIT queries) the
+    older stores are only opened while more rows are still needed.
+    """
+    rows = []
+    for path in data_stores(table, start_ms, end_ms, newest_first):
+        try:
+            conn = sqlite3.connect(path)
+            rows.extend(conn.execute(sql, params).fetchall())
+            conn.close()
+        except sqlite3.OperationalError as e:
+            # A partition dropped by retention between listing and opening
+            db_log.debug("Skipping store %s: %s", path, e)
+        if limit is not None and len(rows) >= limit:
+            return rows[:limit]
+    return rows
+
+def max_stored_id(table):
+    """Highest id handed out for `table` in any store, so ids keep increasing across partitions"""
+    ids = query_stores(table, f"SELECT seq FROM sqlite_sequence WHERE name = '{table}'")
+    ids += query_stores(table, f"SELECT MAX(id) FROM {table}")
+    for kind, path in list_stores(table):
+        if kind == "archive":
+            with ArchiveReader(path) as archive:
+                ids += [(block["id_max"],) for block in archive.blocks[-1:]]
+    return max([row[0] for row in ids if row[0] is not None] or [0])
+
+def create_partition(table, key):
+    """Create an empty partition file for one table and period"""
+    path = partition_path(table, key)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(TABLE_SCHEMAS[table].format(table=table))
+    if table not in NARROW_TABLES:
+        conn.execute(f"CREATE INDEX idx_{table}_ts ON {table}(ts)")
+    conn.commit()
+    conn.close()
+    db_log.info("[STORAGE] Created partition %s_%s", table, key)
+    return path
+
+def remove_partition_file(path):
+    """Delete a partition and its WAL files; False if the OS refused (file still open on Windows)"""
+    try:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        return True
+    except OSError as e:
+        db_log.warning("[STORAGE] Could not remove %s: %s", path, e)
+        return False
+
+# === COLD ARCHIVE ===
+# Finished partitions are compacted into read-only columnar files
+# (partitions/data_2026-09.arc). Rows are cut into blocks of ARCHIVE_BLOCK_ROWS
+# and each column of a block is compressed on its own: id and ts as deltas,
+# channel values as float32 with their bytes grouped by significance, and a
+# column that is constant within the block is kept in the index only. The
+# block index at the end of the file carries the id and ts range of every
+# block, so a range read maps the file and decodes just the blocks it needs.
+#
+# Layout: block payloads | index JSON | index length (uint64 LE) | ARCHIVE_MAGIC
+#
+# ch1..ch7 of rows that have raw values are not stored; they are recomputed
+# from raw1..raw7 and cal_version when read, like everywhere else.
+ARCHIVE_MAGIC = b"ISMSARC1"
+ARCHIVE_BLOCK_ROWS = 16384
+ARCHIVE_CHECK_SECONDS = 3600
+ARCHIVE_GRACE_MS = 3600 * 1000  # a period is archived once it ended this long ago
+ARCHIVE_COLUMNS = {"data": DATA_CHANNELS + DATA_RAW_CHANNELS + ["cal_version", "quality", "held"],
+                   "full_data": FULL_DATA_COLUMNS + ["quality", "held"]}
+ARCHIVE_INTEGER_COLUMNS = ("id", "ts")
+# Nullable integer columns (bitmasks, versions) are stored exactly; float32 only
+# holds integers up to 2**24 and held uses bits up to HELD_INTERP_SHIFT + 9
+ARCHIVE_EXACT_COLUMNS = ("cal_version", "quality", "held")
+
+archive_lock = threading.Lock()  # one compaction or archive rewrite at a time
+
+def encode_archive_column(values, integer=False, exact=False):
+    """Index entry and compressed payload for one column of one block.
+
+    integer: id/ts, delta coded. exact: nullable integers, a NULL bitmap and
+    int64 values. Everything else is float32.
+    """
+    if integer:
+        deltas = np.diff(values.astype(np.int64), prepend=np.int64(0))
+        return {"enc": "delta"}, zlib.compress(deltas.astype("<i8").tobytes(), 6)
+    if exact:
+        nulls = np.isnan(values)
+        if nulls.all():
+            return {"enc": "const", "value": None}, b""
+        ints = np.where(nulls, 0, values).astype("<i8")
+        if not nulls.any() and (ints == ints[0]).all():
+            return {"enc": "const", "value": int(ints[0])}, b""
+        return {"enc": "int"}, zlib.compress(np.packbits(nulls).tobytes() + ints.tobytes(), 6)
+    values = values.astype("<f4")
+    if np.isnan(values).all():
+        return {"enc": "const", "value": None}, b""
+    if (values == values[0]).all():
+        return {"enc": "const", "value": float(values[0])}, b""
+    shuffled = values.view(np.uint8).reshape(-1, 4).T.tobytes()
+    return {"enc": "shuffle"}, zlib.compress(shuffled, 6)
+
+def decode_archive_column(buffer, entry, n):
+    if entry is None:  # column added after the archive was written
+        return np.full(n, np.nan)
+    if entry["enc"] == "const":
+        return np.full(n, np.nan if entry["value"] is None else entry["value"])
+    payload = zlib.decompress(buffer[entry["offset"]:entry["offset"] + entry["length"]])
+    if entry["enc"] == "delta":
+        return np.cumsum(np.frombuffer(payload, dtype="<i8"))
+    if entry["enc"] == "int":
+        mask_bytes = (n + 7) // 8
+        nulls = np.unpackbits(np.frombuffer(payload[:mask_bytes], dtype=np.uint8), count=n).astype(bool)
+        values = np.frombuffer(payload[mask_bytes:], dtype="<i8").astype(np.float64)
+        values[nulls] = np.nan
+        return values
+    return np.frombuffer(payload, dtype=np.uint8).reshape(4, n).T.copy().view("<f4").ravel().astype(np.float64)
+
+
+class ArchiveWriter:
+    """Write one table's rows to a new archive file, a block at a time"""
+
+    def __init__(self, path, table):
+        self.path = path
+        self.file = open(path, "wb")
+        self.index = {"version": 1, "table": table, "columns": ARCHIVE_COLUMNS[table], "rows": 0, "blocks": []}
+
+    def add_block(self, columns):
+        """columns: id, ts and every archive column as arrays, in id order"""
+        ids, ts = columns["id"], columns["ts"]
+        block = {"rows": len(ids), "id_min": int(ids[0]), "id_max": int(ids[-1]),
+                 "ts_min": int(ts.min()), "ts_max": int(ts.max()), "columns": {}}
+        for name in list(ARCHIVE_INTEGER_COLUMNS) + self.index["columns"]:
+            entry, payload = encode_archive_column(columns[name], name in ARCHIVE_INTEGER_COLUMNS,
+                                                   name in ARCHIVE_EXACT_COLUMNS)
+            if payload:
+                entry.update(offset=self.file.tell(), length=len(payload))
+                self.file.write(payload)
+            block["columns"][name] = entry
+        self.index["blocks"].append(block)
+        self.index["rows"] += block["rows"]
+
+    def close(self):
+        index = json.dumps(self.index, separators=(",", ":")).encode()
+        self.file.write(index + struct.pack("<Q", len(index)) + ARCHIVE_MAGIC)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+
+
+class ArchiveReader:
+    """Memory-mapped archive file; only the blocks a read touches are decoded"""
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        footer = 8 + len(ARCHIVE_MAGIC)
+        if self.buffer[-len(ARCHIVE_MAGIC):] != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an archive")
+        length = struct.unpack("<Q", self.buffer[-footer:-len(ARCHIVE_MAGIC)])[0]
+        self.index = json.loads(self.buffer[-footer - length:-footer])
+        self.blocks = self.index["blocks"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+    def block_numbers(self, start_ms=None, end_ms=None):
+        """Blocks holding rows with ts in [start_ms, end_ms)"""
+        return [i for i, block in enumerate(self.blocks)
+                if (start_ms is None or block["ts_max"] >= start_ms) and (end_ms is None or block["ts_min"] < end_ms)]
+
+    def read_block(self, number, columns=None):
+        """id, ts and `columns` (default: all) of one block as arrays"""
+        block = self.blocks[number]
+        names = dict.fromkeys(list(ARCHIVE_INTEGER_COLUMNS) + list(ARCHIVE_COLUMNS[self.index["table"]] if columns is None else columns))
+        return {name: decode_archive_column(self.buffer, block["columns"].get(name), block["rows"]) for name in names}
+
+    def read(self, columns=None, start_ms=None, end_ms=None, newest_first=False, limit=None):
+        """Arrays of id, ts and `columns` for rows with ts in [start_ms, end_ms), in id order.
+
+        With newest_first and a limit, blocks are decoded from the end only
+        until at least `limit` rows were found.
+        """
+        numbers = self.block_numbers(start_ms, end_ms)
+        if newest_first:
+            numbers.reverse()
+        parts, found = [], 0
+        for number in numbers:
+            block = self.read_block(number, columns)
+            mask = np.ones(len(block["ts"]), dtype=bool)
+            if start_ms is not None:
+                mask &= block["ts"] >= start_ms
+            if end_ms is not None:
+                mask &= block["ts"] < end_ms
+            if not mask.all():
+                block = {name: values[mask] for name, values in block.items()}
+            parts.append(block)
+            found += int(mask.sum())
+            if limit is not None and found >= limit:
+                break
+        if newest_first:
+            parts.reverse()
+        if not parts:
+            names = dict.fromkeys(list(ARCHIVE_INTEGER_COLUMNS) + list(ARCHIVE_COLUMNS[self.index["table"]] if columns is None else columns))
+            return {name: np.empty(0) for name in names}
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def archive_path(partition):
+    return os.path.join(PARTITION_DIR, f"{partition['table']}_{partition['key']}.arc")
+
+def archive_rows(arrays, columns):
+    """Tuples of `columns` from archive arrays, shaped like rows selected from SQLite"""
+    stamps = None
+    if "date" in columns or "time" in columns:
+        stamps = [datetime.fromtimestamp(ts / 1000).strftime("%Y-%m-%d %H:%M:%S") for ts in arrays["ts"].tolist()]
+    values = []
+    for name in columns:
+        if name == "date":
+            values.append([stamp[:10] for stamp in stamps])
+        elif name == "time":
+            values.append([stamp[11:] for stamp in stamps])
+        elif name in ARCHIVE_INTEGER_COLUMNS:
+            values.append(arrays[name].tolist())
+        elif name in ("cal_version", "quality", "held"):
+            values.append([None if v != v else int(v) for v in arrays[name].tolist()])
+        else:
+            values.append([None if v != v else v for v in arrays[name].tolist()])
+    return list(zip(*values))
+
+def read_archive_rows(path, columns, start_ms=None, end_ms=None, newest_first=False, limit=None, bucket_ms=None,
+                      after_id=None):
+    """Rows of one archive as tuples of `columns`; see read_rows"""
+    with ArchiveReader(path) as archive:
+        if after_id is not None and archive.blocks and archive.blocks[-1]["id_max"] <= after_id:
+            return []
+        stored = [name for name in columns if name in ARCHIVE_COLUMNS[archive.index["table"]]]
+        arrays = archive.read(stored, start_ms, end_ms, newest_first,
+                              None if bucket_ms or after_id is not None else limit)
+    if after_id is not None:
+        keep = arrays["id"] > after_id
+        arrays = {name: values[keep] for name, values in arrays.items()}
+    if bucket_ms:
+        buckets = arrays["ts"] // bucket_ms
+        keep = np.r_[buckets[1:] != buckets[:-1], True]
+        arrays = {name: values[keep] for name, values in arrays.items()}
+    if newest_first:
+        arrays = {name: values[::-1] for name, values in arrays.items()}
+    if limit is not None:
+        arrays = {name: values[:limit] for name, values in arrays.items()}
+    return archive_rows(arrays, columns)
+
+def read_rows(table, columns, start_ms=None, end_ms=None, newest_first=False, limit=None, bucket_ms=None,
+              reconstruct=True, after_id=None):
+    """Rows of `table` as tuples of `columns`, read from SQLite stores and archives alike.
+
+    Rows come in id order, newest first on request. Without a range every row
+    is returned, including old rows that have no ts yet. bucket_ms keeps only
+    the newest row of each ts bucket. after_id skips rows up to that id (a
+    delta cursor), seeking on the rowid so the cost follows the new rows only.
+    Channel values left out by compression are filled in (see reconstruct_held)
+    unless reconstruct is False.
+    """
+    channels = COMPRESSIBLE_CHANNELS.get(table, [])
+    if reconstruct and any(name in channels or name in DATA_RAW_CHANNELS for name in columns):
+        extra = [name for name in ("id", "ts", "held") if name not in columns]
+        rows = read_rows(table, list(columns) + extra, start_ms, end_ms, newest_first, limit, bucket_ms, False, after_id)
+        rows = reconstruct_held(table, list(columns) + extra, rows, bucket_ms is not None)
+        return [row[:len(columns)] for row in rows] if extra else rows
+
+    # With a cursor, "+ts" keeps SQLite off the ts index so it seeks on the rowid instead
+    ts = "ts" if after_id is None else "+ts"
+    where, params = [], []
+    if start_ms is not None or bucket_ms:
+        where.append(f"{ts} >= ?")
+        params.append(start_ms or 0)
+    if end_ms is not None:
+        where.append(f"{ts} < ?")
+        params.append(end_ms)
+    if after_id is not None:
+        where.append("id > ?")
+        params.append(after_id)
+    condition = " AND ".join(where)
+    if bucket_ms:
+        condition = f"id IN (SELECT MAX(id) FROM {table} WHERE {condition} GROUP BY ts / ?)"
+        params.append(bucket_ms)
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if condition:
+        sql += f" WHERE {condition}"
+    sql += " ORDER BY id DESC" if newest_first else " ORDER BY id ASC"
+
+    rows = []
+    for kind, path in list_stores(table, start_ms, end_ms, newest_first):
+        wanted = None if limit is None else limit - len(rows)
+        try:
+            if kind == "archive":
+                rows.extend(read_archive_rows(path, columns, start_ms, end_ms, newest_first, wanted, bucket_ms, after_id))
+            else:
+                conn = sqlite3.connect(path)
+                rows.extend(conn.execute(sql + ("" if wanted is None else f" LIMIT {int(wanted)}"), params).fetchall())
+                conn.close()
+        except (sqlite3.OperationalError, OSError) as e:
+            # A partition dropped or archived between listing and opening
+            db_log.debug("Skipping store %s: %s", path, e)
+        if limit is not None and len(rows) >= limit:
+            return rows[:limit]
+    return rows
+
+def pivot_samples(rows, channel_ids):
+    """Narrow (channel_id, ts, value) rows as (ts, values[len(ts), len(channel_ids)]); NaN where
+    a channel has no sample at a ts"""
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(channel_ids)))
+    table = np.array(rows, dtype=np.float64)
+    order = np.argsort(channel_ids)
+    column = order[np.searchsorted(np.asarray(channel_ids)[order], table[:, 0])]
+    ts, row = np.unique(table[:, 1].astype(np.int64), return_inverse=True)
+    values = np.full((len(ts), len(channel_ids)), np.nan)
+    values[row, column] = table[:, 2]
+    return ts, values
+
+def read_samples(channel_ids, start_ms=None, end_ms=None):
+    """Samples of registry channels in [start_ms, end_ms), pivoted by pivot_samples"""
+    where, params = [f"channel_id IN ({', '.join('?' * len(channel_ids))})"], list(channel_ids)
+    if start_ms is not None:
+        where.append("ts >= ?")
+        params.append(start_ms)
+    if end_ms is not None:
+        where.append("ts < ?")
+        params.append(end_ms)
+    rows = query_stores("samples", f"SELECT channel_id, ts, value FROM samples WHERE {' AND '.join(where)}",
+                        params, start_ms, end_ms)
+    return pivot_samples(rows, channel_ids)
+
+def read_channels(names, start_ms=None, end_ms=None):
+    """Registered channels by name, wide and narrow alike, as (ts, values[len(ts), len(names)]).
+
+    Channels of data come calibrated. Raises KeyError for a name that is not registered.
+    """
+    registry = {channel["name"]: channel for channel in get_channel_registry()}
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise KeyError(f"Unknown channels: {', '.join(unknown)}")
+    parts = []  # (positions in names, ts, values)
+    narrow = [i for i, name in enumerate(names) if registry[name]["storage"] == "narrow"]
+    if narrow:
+        parts.append((narrow, *read_samples([registry[names[i]]["id"] for i in narrow], start_ms, end_ms)))
+    for table, columns in (("data", DATA_CHANNELS), ("full_data", FULL_DATA_COLUMNS)):
+        wide = [i for i, name in enumerate(names) if registry[name]["storage"] == "wide" and name in columns]
+        if not wide:
+            continue
+        if table == "data":
+            rows = [row for row in read_rows("data", DATA_COLUMNS + ["ts"], start_ms, end_ms) if row[-1] is not None]
+            values = calibrated_data_values(rows)[:, [columns.index(names[i]) for i in wide]]
+        else:
+            rows = [row for row in read_rows("full_data", [names[i] for i in wide] + ["ts"], start_ms, end_ms)
+                    if row[-1] is not None]
+            values = np.array([row[:-1] for row in rows], dtype=np.float64).reshape(len(rows), len(wide))
+        parts.append((wide, np.array([row[-1] for row in rows], dtype=np.int64), values))
+
+    ts = np.unique(np.concatenate([part[1] for part in parts])) if parts else np.empty(0, dtype=np.int64)
+    result = np.full((len(ts), len(names)), np.nan)
+    for positions, part_ts, values in parts:
+        result[np.ix_(np.searchsorted(ts, part_ts), positions)] = values
+    return ts, result
+
+def held_bits(table, names):
+    """{position in names: channel bit} for the compressible columns of a row"""
+    channels = COMPRESSIBLE_CHANNELS[table]
+    bits = {}
+    for pos, name in enumerate(names):
+        if name in channels:
+            bits[pos] = channels.index(name)
+        elif table == "data" and name in DATA_RAW_CHANNELS:
+            bits[pos] = DATA_RAW_CHANNELS.index(name)
+    return bits
+
+def stored_neighbours(table, columns, ts, before=True):
+    """{column: (ts, value)} of each column's nearest stored value before ts (or after it).
+
+    Held and interpolated values are stored as NULL, so this is the nearest
+    non-NULL value, however far away: stores are searched outward from ts
+    until every column has one or the stores run out.
+    """
+    found = {}
+    stores = list_stores(table, None, ts, newest_first=True) if before else list_stores(table, ts + 1)
+    for kind, path in stores:
+        missing = [name for name in columns if name not in found]
+        if not missing:
+            break
+        try:
+            if kind == "archive":
+                with ArchiveReader(path) as archive:
+                    numbers = archive.block_numbers(None, ts) if before else archive.block_numbers(ts + 1)
+                    for number in (reversed(numbers) if before else numbers):
+                        block = archive.read_block(number, missing)
+                        inside = block["ts"] < ts if before else block["ts"] > ts
+                        for name in [name for name in missing if name not in found]:
+                            hits = np.flatnonzero(inside & ~np.isnan(block[name]))
+                            if len(hits):
+                                hit = hits[-1] if before else hits[0]
+                                found[name] = (int(block["ts"][hit]), float(block[name][hit]))
+                        if all(name in found for name in missing):
+                            break
+            else:
+                conn = sqlite3.connect(path)
+                for name in missing:
+                    row = conn.execute(
+                        f"SELECT ts, {name} FROM {table} WHERE ts {'<' if before else '>'} ? AND {name} IS NOT NULL "
+                        f"ORDER BY ts {'DESC' if before else 'ASC'} LIMIT 1", (ts,)).fetchone()
+                    if row:
+                        found[name] = row
+                conn.close()
+        except (sqlite3.OperationalError, OSError) as e:
+            # A partition dropped or archived between listing and opening
+            db_log.debug("Skipping store %s: %s", path, e)
+    return found
+
+def reconstruct_held(table, names, rows, bucketed=False):
+    """Fill in the channel values compression left out of `rows` (columns `names`,
+    which include id, ts and held).
+
+    The contract with the ingest side: a held value equals the channel's last
+    stored value before the row; an interpolated value lies on the straight line
+    between the channel's stored values before and after the row. Both are
+    within the channel's tolerance of the sample that was read. An interpolated
+    value with no later stored value yet holds the last one. Values that were
+    never read (NULL, not held) stay None.
+    """
+    pos_held = names.index("held")
+    if not any(row[pos_held] for row in rows):
+        return rows
+    pos_id, pos_ts = names.index("id"), names.index("ts")
+    targets = held_bits(table, names)
+    context_names = ["id", "ts", "held"] + [names[pos] for pos in targets]
+    stamps = [row[pos_ts] for row in rows if row[pos_ts] is not None]
+    first_ts, last_ts = min(stamps), max(stamps)
+
+    # Stored neighbours: each channel's last stored value before the rows and
+    # first one after them (no fixed window, a value may be held indefinitely
+    # with maxHoldSeconds 0), plus every row in between when the rows are a
+    # bucketed selection. Neighbour rows carry only their own channel.
+    def neighbour_rows(before):
+        found = stored_neighbours(table, context_names[3:], first_ts if before else last_ts, before)
+        return sorted(([None, ts, 0] + [value if name == column else None for name in context_names[3:]]
+                       for column, (ts, value) in found.items()), key=lambda row: row[1])
+
+    before, after = neighbour_rows(True), neighbour_rows(False)
+    if bucketed:
+        inside = read_rows(table, context_names, first_ts, last_ts + 1, reconstruct=False)
+    else:
+        inside = sorted(([row[pos_id], row[pos_ts], row[pos_held]] + [row[pos] for pos in targets]
+                         for row in rows), key=lambda row: row[0])
+    context = before + inside + after
+
+    ts = np.array([np.nan if row[1] is None else row[1] for row in context], dtype=np.float64)
+    held = np.array([row[2] or 0 for row in context], dtype=np.int64)
+    index = np.arange(len(context))
+    filled = {}
+    for k, (pos, bit) in enumerate(targets.items()):
+        values = np.array([np.nan if row[3 + k] is None else row[3 + k] for row in context], dtype=np.float64)
+        hold = (held & (1 << bit)) != 0
+        interp = (held & (1 << (HELD_INTERP_SHIFT + bit))) != 0
+        if not (hold.any() or interp.any()):
+            continue
+        known = ~hold & ~interp & ~np.isnan(values)
+        prev = np.maximum.accumulate(np.where(known, index, -1))
+        nxt = np.minimum.accumulate(np.where(known, index, len(context))[::-1])[::-1]
+        prev_value = np.where(prev >= 0, values[np.maximum(prev, 0)], np.nan)
+        result = values.copy()
+        result[hold] = prev_value[hold]
+        has_next = interp & (nxt < len(context)) & (prev >= 0)
+        p, n = prev[has_next], nxt[has_next]
+        result[has_next] = values[p] + (values[n] - values[p]) * (ts[has_next] - ts[p]) / (ts[n] - ts[p])
+        result[interp & ~has_next] = prev_value[interp & ~has_next]
+        filled[pos] = dict(zip((row[0] for row in context), result.tolist()))
+
+    reconstructed = []
+    for row in rows:
+        row = list(row)
+        for pos, by_id in filled.items():
+            if row[pos] is None:
+                value = by_id.get(row[pos_id])
+                row[pos] = None if value is None or value != value else value
+        reconstructed.append(tuple(row))
+    return reconstructed
+
+def compact_partition(partition):
+    """Move a finished partition into its archive, then drop the SQLite file.
+
+    Rows are streamed ARCHIVE_BLOCK_ROWS at a time, so memory use does not grow
+    with the partition. If the period already has an archive (rows that arrived
+    late), its blocks are carried over first. The new file is swapped in and the
+    partition dropped on the writer thread, after checking that no row was
+    written to the partition in the meantime. Returns the archive size in bytes,
+    or None when the partition changed and is left for the next run.
+    """
+    table = partition["table"]
+    names = list(ARCHIVE_INTEGER_COLUMNS) + ARCHIVE_COLUMNS[table]
+    path = archive_path(partition)
+    temp_path = path + ".tmp"
+    writer = ArchiveWriter(temp_path, table)
+    try:
+        if os.path.exists(path):
+            with ArchiveReader(path) as existing:
+                for number in range(len(existing.blocks)):
+                    writer.add_block(existing.read_block(number))
+        conn = sqlite3.connect(partition["path"])
+        copied, last_id = 0, -1
+        while True:
+            rows = conn.execute(f"SELECT {', '.join(names)} FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+                                (last_id, ARCHIVE_BLOCK_ROWS)).fetchall()
+            if not rows:
+                break
+            values = np.array(rows, dtype=np.float64)
+            columns = {name: values[:, i] for i, name in enumerate(names)}
+            if table == "data":
+                has_raw = has_raw_values(values[:, 2 + SENSOR_COUNT:2 + 2 * SENSOR_COUNT], columns["cal_version"])
+                values[np.ix_(has_raw, range(2, 2 + SENSOR_COUNT))] = np.nan
+            writer.add_block(columns)
+            copied += len(rows)
+            last_id = int(rows[-1][0])
+        conn.close()
+        writer.close()
+    except Exception:
+        writer.file.close()
+        os.remove(temp_path)
+        raise
+
+    def swap(conn):
+        with sqlite3.connect(partition["path"]) as check:
+            if check.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] != copied:
+                os.remove(temp_path)
+                return None
+        if writer.index["rows"]:
+            os.replace(temp_path, path)
+        else:
+            os.remove(temp_path)
+        ingest_writer.drop_partitions(conn, [partition])
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    size = os.path.getsize(partition["path"])
+    archived = ingest_writer.run_in_writer(swap, timeout=120.0)
+    if archived is not None:
+        db_log.info("[ARCHIVE] %s_%s: %s rows, %s -> %s bytes", table, partition['key'], copied, size, archived)
+    return archived
+
+def compact_finished_partitions():
+    """Archive every SQLite partition whose period ended at least ARCHIVE_GRACE_MS ago"""
+    cutoff = time.time() * 1000 - ARCHIVE_GRACE_MS
+    compacted = []
+    with archive_lock:
+        for partition in list_partitions():
+            if partition["archive"] or partition["table"] in NARROW_TABLES or partition["end_ms"] > cutoff:
+                continue
+            try:
+                if compact_partition(partition) is not None:
+                    compacted.append(f"{partition['table']}_{partition['key']}")
+            except Exception as e:
+                db_log.error("[ARCHIVE] Compacting %s_%s failed: %s", partition['table'], partition['key'], e)
+    return compacted
+
+def start_archiver():
+    def run():
+        while True:
+            if get_storage_config()["archive"]:
+                compact_finished_partitions()
+            time.sleep(ARCHIVE_CHECK_SECONDS)
+    threading.Thread(target=run, name="archiver", daemon=True).start()
+
+# === ROLLUPS ===
+ROLLUP_RESOLUTIONS = [("1m", 60), ("15m", 900), ("1h", 3600)]  # finest first
+ROLLUP_AGGREGATES = ("min", "max", "sum", "count", "last")  # count: samples actually read (not NULL)
+ROLLUP_REBUILD_CHUNK = 86400 * 1000  # one day of raw rows per rebuild transaction
+ROLLUP_REBUILD_GRACE_MS = 300 * 1000  # the open hour and this much after it are left to ingest
+ROLLUP_SOURCES = {"data": DATA_CHANNELS, "full_data": FULL_DATA_COLUMNS}
+
+def rollup_table(source, resolution):
+    return f"rollup_{source}_{resolution}"
+
+def create_rollup_tables(c):
+    """One table per source and resolution: bucket start (epoch ms), row count, time of the
+    last sample, and min/max/sum/count/last of every channel (mean = sum / count)"""
+    for source, columns in ROLLUP_SOURCES.items():
+        value_columns = ", ".join(f"{col}_{agg} REAL" for col in columns for agg in ROLLUP_AGGREGATES)
+        for resolution, _ in ROLLUP_RESOLUTIONS:
+            table = rollup_table(source, resolution)
+            c.execute(f"""CREATE TABLE IF NOT EXISTS {table} (
+                            bucket INTEGER PRIMARY KEY,
+                            n INTEGER,
+                            last_ts INTEGER,
+                            {value_columns}
+                        )""")
+            # Tables from before per-channel counts: every stored value was counted then
+            existing = [col[1] for col in c.execute(f"PRAGMA table_info({table})")]
+            missing = [col for col in columns if f"{col}_count" not in existing]
+            for col in missing:
+                c.execute(f"ALTER TABLE {table} ADD COLUMN {col}_count REAL")
+            if missing:
+                c.execute(f"UPDATE {table} SET {', '.join(f'{col}_count = n' for col in missing)}")
+
+def rollup_upsert_sql(source, resolution):
+    """Fold one sample into its bucket; SET expressions all see the pre-update row.
+    NULL (unread) values leave min/max/sum/count alone."""
+    columns = ROLLUP_SOURCES[source]
+    names = ["bucket", "n", "last_ts"] + [f"{col}_{agg}" for col in columns for agg in ROLLUP_AGGREGATES]
+    updates = ["n = n + 1", "last_ts = max(last_ts, excluded.last_ts)"]
+    for col in columns:
+        updates += [
+            f"{col}_min = min(coalesce({col}_min, excluded.{col}_min), coalesce(excluded.{col}_min, {col}_min))",
+            f"{col}_max = max(coalesce({col}_max, excluded.{col}_max), coalesce(excluded.{col}_max, {col}_max))",
+            f"{col}_sum = coalesce({col}_sum, 0) + coalesce(excluded.{col}_sum, 0)",
+            f"{col}_count = {col}_count + excluded.{col}_count",
+            f"{col}_last = CASE WHEN excluded.last_ts >= last_ts THEN excluded.{col}_last ELSE {col}_last END",
+        ]
+    return (f"INSERT INTO {rollup_table(source, resolution)} ({', '.join(names)}) "
+            f"VALUES ({', '.join('?' * len(names))}) "
+            f"ON CONFLICT(bucket) DO UPDATE SET {', '.join(updates)}")
+
+ROLLUP_UPSERTS = {(source, resolution): rollup_upsert_sql(source, resolution)
+                  for source in ROLLUP_SOURCES for resolution, _ in ROLLUP_RESOLUTIONS}
+
+def submit_rollups(source, ts, values):
+    """Queue one sample's rollup updates; they commit in the same group commit as the raw row"""
+    per_value = [v for value in values
+                 for v in (value, value, value or 0.0, int(value is not None), value)]
+    for resolution, seconds in ROLLUP_RESOLUTIONS:
+        bucket = ts // (seconds * 1000) * seconds * 1000
+        ingest_writer.submit(ROLLUP_UPSERTS[(source, resolution)], [(bucket, 1, ts, *per_value)])
+
+def aggregate_rollup_rows(ts, values, bucket_ms):
+    """(bucket, n, last_ts, min, max, sum, count, last, ...) rows from sample arrays in id order"""
+    if not len(ts):
+        return []
+    buckets = ts // bucket_ms * bucket_ms
+    order = np.argsort(buckets, kind="stable")  # stable: the last row of a bucket keeps the highest id
+    buckets, ts, values = buckets[order], ts[order], values[order]
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)]
+    result = [buckets[starts].tolist(), (ends - starts).tolist(), np.maximum.reduceat(ts, starts).tolist()]
+    for i in range(values.shape[1]):
+        column = values[:, i]
+        for aggregate in (np.fmin.reduceat(column, starts), np.fmax.reduceat(column, starts),
+                          np.add.reduceat(np.nan_to_num(column), starts),
+                          np.add.reduceat(~np.isnan(column), starts).astype(np.float64), column[ends - 1]):
+            result.append([None if v != v else v for v in aggregate.tolist()])
+    return list(zip(*result))
+
+def rebuild_rollups(source, start_ms=None, end_ms=None):
+    """Recompute rollups of one source from raw rows in every store; the range is widened to whole hours.
+
+    Rows come through read_rows, so values compression left out count as the
+    held or interpolated value, the way ingest counted the sample. Only hours
+    that closed ROLLUP_REBUILD_GRACE_MS ago are rebuilt: a sample's rollup is
+    upserted when it is read, its raw row only once the compressor releases it
+    one sample later. Each chunk's buckets are swapped in on the writer thread,
+    so they never interleave with ingest upserts.
+    """
+    columns = ROLLUP_SOURCES[source]
+    bounds = [row for row in query_stores(source, f"SELECT MIN(ts), MAX(ts) FROM {source}") if row[0] is not None]
+    archives = [path for kind, path in list_stores(source) if kind == "archive"]
+    for path in archives:
+        with ArchiveReader(path) as archive:
+            if archive.blocks:
+                bounds.append((min(b["ts_min"] for b in archive.blocks), max(b["ts_max"] for b in archive.blocks)))
+    if not bounds:
+        return 0
+    hour = 3600 * 1000
+    start_ms = (min(b[0] for b in bounds) if start_ms is None else start_ms) // hour * hour
+    end_ms = -(-((max(b[1] for b in bounds) + 1) if end_ms is None else end_ms) // hour) * hour
+    end_ms = min(end_ms, (int(time.time() * 1000) - ROLLUP_REBUILD_GRACE_MS) // hour * hour)
+
+    names = ["bucket", "n", "last_ts"] + [f"{col}_{agg}" for col in columns for agg in ROLLUP_AGGREGATES]
+    insert = f"INSERT INTO {{table}} ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+    buckets = 0
+    for low in range(start_ms, end_ms, ROLLUP_REBUILD_CHUNK):
+        high = min(low + ROLLUP_REBUILD_CHUNK, end_ms)
+        if source == "data":
+            rows = read_rows("data", DATA_COLUMNS + ["ts"], low, high)
+            values = calibrated_data_values(rows)
+        else:
+            rows = read_rows(source, columns + ["ts"], low, high)
+            values = np.array([row[:-1] for row in rows], dtype=np.float64).reshape(len(rows), len(columns))
+        ts = np.array([row[-1] for row in rows], dtype=np.int64)
+        rebuilt = {rollup_table(source, resolution): aggregate_rollup_rows(ts, values, seconds * 1000)
+                   for resolution, seconds in ROLLUP_RESOLUTIONS}
+
+        def swap(conn, low=low, high=high, rebuilt=rebuilt):
+            with conn:
+                for table, table_rows in rebuilt.items():
+                    conn.execute(f"DELETE FROM {table} WHERE bucket >= ? AND bucket < ?", (low, high))
+                    conn.executemany(insert.format(table=table), table_rows)
+
+        ingest_writer.run_in_writer(swap, timeout=120.0)
+        buckets += sum(len(table_rows) for table_rows in rebuilt.values())
+    db_log.info("[ROLLUPS] Rebuilt %s %s buckets", buckets, source)
+    return buckets
+
+def pick_rollup_resolution(interval_seconds):
+    """Coarsest resolution that still gives at least one point per requested interval"""
+    choice = None
+    for resolution, seconds in ROLLUP_RESOLUTIONS:
+        if seconds <= interval_seconds:
+            choice = (resolution, seconds)
+    return choice
+
+def read_rollup_rows(source, resolution, since_ms, interval_seconds, agg="last"):
+    """Rollup buckets merged to the requested interval, newest first, as (bucket, last_ts, n, values...).
+
+    bucket is the newest rollup bucket of each interval group.
+    """
+    columns = ROLLUP_SOURCES[source]
+    table = rollup_table(source, resolution)
+    merged = ", ".join(f"MIN({col}_min) AS {col}_min, MAX({col}_max) AS {col}_max, SUM({col}_sum) AS {col}_sum, "
+                       f"SUM({col}_count) AS {col}_count" for col in columns)
+    picks = {
+        "last": "r.{col}_last",
+        "mean": "g.{col}_sum / g.{col}_count",  # NULL when nothing was read
+        "min": "g.{col}_min",
+        "max": "g.{col}_max",
+    }[agg]
+    values = ", ".join(picks.format(col=col) for col in columns)
+    query = f"""
+        SELECT r.bucket, r.last_ts, g.n, {values}
+        FROM (SELECT MAX(bucket) AS bucket, SUM(n) AS n, {merged}
+              FROM {table} WHERE bucket >= ? GROUP BY bucket / ?) g
+        JOIN {table} r ON r.bucket = g.bucket
+        ORDER BY g.bucket DESC
+    """
+    with sqlite3.connect(DATABASE) as conn:
+        return conn.execute(query, (since_ms, interval_seconds * 1000)).fetchall()
+
+# === VISUAL DOWNSAMPLING ===
+# Chart queries with ?points= get a bounded number of rows that still draw like
+# the full series. "lttb" (Largest-Triangle-Three-Buckets) keeps the rows that
+# span the largest triangles, "minmax" keeps the lowest and highest row of each
+# time bucket, so spikes survive either way. Rows are picked per column of an
+# (N, C) value array and the union is returned; NaN (unread) values only win
+# a bucket that has nothing else, which keeps gaps visible.
+DOWNSAMPLE_MODES = ("lttb", "minmax")
+DOWNSAMPLE_MAX_POINTS = 10000
+
+def lttb_indices(x, values, points):
+    """Sorted row indices picked by LTTB, at most `points` per column of values.
+
+    x must be ascending. The first and last rows are always kept; the rows in
+    between form points - 2 buckets of equal count, and per bucket and column
+    the row making the largest triangle with the previous pick and the mean of
+    the next bucket is kept. Buckets are walked in order (each pick anchors the
+    next), every step vectorized over the bucket's rows and all columns.
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    finite = np.isfinite(values)
+    filled = np.where(finite, values, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.add.reduceat(filled[:n - 1], edges[:-1], axis=0) / np.add.reduceat(finite[:n - 1], edges[:-1], axis=0)
+    mean_x = np.add.reduceat(x[:n - 1], edges[:-1]) / np.diff(edges)
+    # Third corner of each bucket's triangles: the next bucket's mean, the last row for the last bucket
+    next_x = np.r_[mean_x[1:], x[-1]]
+    next_y = np.vstack([means[1:], values[-1:]])
+
+    columns = np.arange(values.shape[1])
+    picked = np.empty((points, values.shape[1]), dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    for b in range(points - 2):
+        start, stop = edges[b], edges[b + 1]
+        ax, ay = x[picked[b]], values[picked[b], columns]
+        with np.errstate(invalid="ignore"):
+            area = np.abs((ax - next_x[b]) * (values[start:stop] - ay) - (ax - x[start:stop, None]) * (next_y[b] - ay))
+        area = np.where(np.isfinite(area), area, np.where(finite[start:stop], 0.0, -1.0))
+        picked[b + 1] = start + area.argmax(axis=0)
+    return np.unique(picked)
+
+def minmax_indices(x, values, points):
+    """Sorted row indices of each column's minimum and maximum per time bucket.
+
+    x must be ascending; the range is cut into (points - 2) // 2 buckets of equal
+    duration. The first and last rows are always kept.
+    """
+    n = len(x)
+    if points >= n:
+        return np.arange(n)
+    buckets = max(1, (points - 2) // 2)
+    span = x[-1] - x[0]
+    bucket = np.minimum(((x - x[0]) * (buckets / span)).astype(np.int64), buckets - 1) if span > 0 \
+        else np.zeros(n, dtype=np.int64)
+    # Rows are in bucket order, so each occupied bucket is one contiguous segment
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    segment = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, n]))
+    valid = np.isfinite(values)
+    mins = np.minimum.reduceat(np.where(valid, values, np.inf), starts, axis=0)
+    maxs = np.maximum.reduceat(np.where(valid, values, -np.inf), starts, axis=0)
+
+    def first_per_segment(mask):
+        rows = np.flatnonzero(mask)
+        return rows[np.r_[True, segment[rows][1:] != segment[rows][:-1]]] if len(rows) else rows
+
+    keep = [np.array([0, n - 1])]
+    for c in range(values.shape[1]):
+        keep.append(first_per_segment(valid[:, c] & (values[:, c] == mins[segment, c])))
+        keep.append(first_per_segment(valid[:, c] & (values[:, c] == maxs[segment, c])))
+        # One unread row for buckets without any value, so the chart shows the gap
+        keep.append(starts[np.isinf(mins[:, c])])
+    return np.unique(np.concatenate(keep))
+
+def downsample_indices(mode, x, values, points):
+    """Rows to keep for a chart of at most `points` points per column (see VISUAL DOWNSAMPLING)"""
+    return lttb_indices(x, values, points) if mode == "lttb" else minmax_indices(x, values, points)
 
 # Load/Membuat tabel jika belum ada
 def create_table():
     conn = sqlite3.connect(DATABASE)
     c = conn.cursor()
+
+    # WAL lets dashboard/download readers run while the ingest writer commits
+    c.execute("PRAGMA journal_mode=WAL")
     
     # Check if data table exists and has all columns
     c.execute("PRAGMA table_info(data)")
@@ -287,18 +1764,7 @@ def create_table():
     
     if 'data' not in [table[0] for table in c.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()]:
         # Create new table with all 7 channels
-        c.execute('''CREATE TABLE data (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        date TEXT,
-                        time TEXT,
-                        ch1 REAL,
-                        ch2 REAL,
-                        ch3 REAL,
-                        ch4 REAL,
-                        ch5 REAL,
-                        ch6 REAL,
-                        ch7 REAL
-                    )''')
+        c.execute(TABLE_SCHEMAS["data"].format(table="data"))
     else:
         # Add missing columns if they don't exist
         required_columns = ['ch4', 'ch5', 'ch6', 'ch7']
@@ -306,9 +1772,24 @@ def create_table():
             if col not in columns:
                 try:
                     c.execute(f"ALTER TABLE data ADD COLUMN {col} REAL DEFAULT 0.0")
-                    print(f"Added column {col} to data table")
+                    db_log.info("Added column %s to data table", col)
                 except sqlite3.OperationalError as e:
-                    print(f"Column {col} might already exist: {e}")
+                    db_log.warning("Column %s might already exist: %s", col, e)
+
+        # Raw register values and the calibration version they were recorded with
+        for col, col_type in ([(f"raw{i}", "REAL") for i in range(1, 8)]
+                              + [("cal_version", "INTEGER"), ("ts", "INTEGER"), ("quality", "INTEGER"),
+                                 ("held", "INTEGER")]):
+            if col not in columns:
+                c.execute(f"ALTER TABLE data ADD COLUMN {col} {col_type}")
+                db_log.info("Added column %s to data table", col)
+
+    # Every distinct set of calibration settings gets a version id
+    c.execute('''CREATE TABLE IF NOT EXISTS calibration_versions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    created_at TEXT,
+                    settings TEXT
+                )''')
 
     # Tabel Powermeter
     c.execute('''CREATE TABLE IF NOT EXISTS powermeter_settings (
@@ -338,21 +1819,71 @@ def create_table():
     
     if not table_exists:
         # Create full_data table
-        c.execute('''CREATE TABLE full_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT,
-                time TEXT,
-                e_speed REAL,
-                e_load REAL,
-                e_fuelrate REAL,
-                e_runhour REAL,
-                e_oilpressure REAL,
-                pm_current REAL,
-                pm_voltage REAL,
-                pm_r REAL,
-                pm_q REAL,
-                pm_s REAL
-            )''')
+        c.execute(TABLE_SCHEMAS["full_data"].format(table="full_data"))
+    else:
+        c.execute("PRAGMA table_info(full_data)")
+        columns = [column[1] for column in c.fetchall()]
+        for col in ("ts", "quality", "held"):
+            if col not in columns:
+                c.execute(f"ALTER TABLE full_data ADD COLUMN {col} INTEGER")
+                db_log.info("Added column %s to full_data table", col)
+
+    # Partition files created before the quality and held columns
+    for partition in list_partitions():
+        if not partition["archive"] and partition["table"] not in NARROW_TABLES:
+            with sqlite3.connect(partition["path"]) as part:
+                existing = [col[1] for col in part.execute(f"PRAGMA table_info({partition['table']})")]
+                for col in ("quality", "held"):
+                    if col not in existing:
+                        part.execute(f"ALTER TABLE {partition['table']} ADD COLUMN {col} INTEGER")
+                        db_log.info("Added column %s to partition %s_%s", col, partition['table'], partition['key'])
+
+    # Outages: one row per run of cycles in which a device did not answer
+    c.execute('''CREATE TABLE IF NOT EXISTS gaps (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    device TEXT,
+                    start_ts INTEGER,
+                    end_ts INTEGER,
+                    cycles INTEGER,
+                    quality INTEGER,
+                    UNIQUE (device, start_ts)
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_gaps_end_ts ON gaps(end_ts)")
+
+    # Channel registry: every recorded channel, and the extra devices to poll
+    c.execute(TABLE_SCHEMAS["samples"].format(table="samples"))
+    c.execute('''CREATE TABLE IF NOT EXISTS devices (
+                    name TEXT PRIMARY KEY,
+                    ip TEXT NOT NULL,
+                    port INTEGER DEFAULT 502,
+                    unit_id INTEGER DEFAULT 1,
+                    enabled INTEGER DEFAULT 1
+                )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS channels (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL,
+                    device TEXT NOT NULL,
+                    address INTEGER,
+                    unit TEXT,
+                    label TEXT,
+                    storage TEXT NOT NULL DEFAULT 'narrow',
+                    enabled INTEGER DEFAULT 1
+                )''')
+    c.executemany("INSERT OR IGNORE INTO channels (name, device, storage) VALUES (?, ?, 'wide')",
+                  [(name, device) for device, names in WIDE_CHANNEL_DEVICES.items() for name in names])
+
+    # Epoch-ms timestamps; range queries and bucketing run on these indexes
+    c.execute("CREATE INDEX IF NOT EXISTS idx_data_ts ON data(ts)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_full_data_ts ON full_data(ts)")
+
+    create_rollup_tables(c)
+
+    # Progress of resumable background migrations
+    c.execute('''CREATE TABLE IF NOT EXISTS migration_state (
+                    name TEXT PRIMARY KEY,
+                    position INTEGER,
+                    done INTEGER DEFAULT 0
+                )''')
 
     # Create sensor_settings table if it doesn't exist
     c.execute('''CREATE TABLE IF NOT EXISTS sensor_settings (
@@ -372,15 +1903,15 @@ def create_table():
     # Add calibration columns if they don't exist
     if 'min_value' not in existing_columns:
         c.execute("ALTER TABLE sensor_settings ADD COLUMN min_value REAL DEFAULT 0.0")
-        print("Added min_value column to sensor_settings")
+        db_log.info("Added min_value column to sensor_settings")
     
     if 'max_value' not in existing_columns:
         c.execute("ALTER TABLE sensor_settings ADD COLUMN max_value REAL DEFAULT 100.0")
-        print("Added max_value column to sensor_settings")
+        db_log.info("Added max_value column to sensor_settings")
     
     if 'unit' not in existing_columns:
         c.execute("ALTER TABLE sensor_settings ADD COLUMN unit TEXT DEFAULT ''")
-        print("Added unit column to sensor_settings")
+        db_log.info("Added unit column to sensor_settings")
 
     # Check if sensor_settings table is empty and add default values if needed
     c.execute("SELECT COUNT(*) FROM sensor_settings")
@@ -400,7 +1931,7 @@ def create_table():
             c.execute('''INSERT INTO sensor_settings 
                         (sensor_number, sensor_name, enabled, min_value, max_value, unit) 
                         VALUES (?, ?, ?, ?, ?, ?)''', sensor_data)
-        print("Added default sensor settings with calibration")
+        db_log.info("Added default sensor settings with calibration")
 
     c.execute('''CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -425,11 +1956,93 @@ def create_table():
 
     ensure_user("ksbengdev", "Milo@1015", True)
 
+    # High-rate capture blocks: raw float32 samples at a fixed rate
+    c.execute('''CREATE TABLE IF NOT EXISTS hr_blocks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    sensor_number INTEGER,
+                    start_ts REAL,
+                    fs REAL,
+                    n INTEGER,
+                    samples BLOB
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_hr_blocks_sensor_ts ON hr_blocks (sensor_number, start_ts)")
+    # Retention pruning deletes by start_ts across all channels
+    c.execute("CREATE INDEX IF NOT EXISTS idx_hr_blocks_start_ts ON hr_blocks (start_ts)")
+
     conn.commit()
     conn.close()
 
 # Panggil saat startup
 create_table()
+calibration_table.reload()
+
+# === TIMESTAMP MIGRATION ===
+TS_MIGRATION_BATCH = 5000
+TS_FROM_TEXT = "CAST(strftime('%s', date || ' ' || time, 'utc') AS INTEGER) * 1000"
+
+def to_epoch_ms(value):
+    """Epoch milliseconds for a local 'YYYY-MM-DD HH:MM:SS' string"""
+    return int(datetime.strptime(value.strip(), "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+
+def migrate_timestamps(table, batch_size=TS_MIGRATION_BATCH):
+    """Backfill ts for rows written before the column existed.
+
+    Works from the newest rows down in id windows, one short transaction each,
+    so recent ranges become searchable first. The position reached is kept in
+    migration_state, so a restart resumes where the last run stopped.
+    """
+    name = f"{table}.ts"
+    conn = sqlite3.connect(DATABASE)
+    c = conn.cursor()
+    state = c.execute("SELECT position, done FROM migration_state WHERE name = ?", (name,)).fetchone()
+    if state and state[1]:
+        conn.close()
+        return
+    first_id, last_id = c.execute(f"SELECT MIN(id), MAX(id) FROM {table}").fetchone()
+    position = state[0] if state else (last_id or 0) + 1
+    first_id = first_id or position
+    db_log.info("[MIGRATION] Backfilling %s for ids %s..%s", name, first_id, position - 1)
+
+    batches = 0
+    while position > first_id:
+        low = max(first_id, position - batch_size)
+        c.execute(f"UPDATE {table} SET ts = {TS_FROM_TEXT} WHERE id >= ? AND id < ? AND ts IS NULL", (low, position))
+        position = low
+        c.execute("INSERT OR REPLACE INTO migration_state (name, position, done) VALUES (?, ?, 0)", (name, position))
+        conn.commit()
+        batches += 1
+        if batches % 20 == 0:
+            db_log.info("[MIGRATION] %s: %s rows left", name, position - first_id)
+        time.sleep(0.05)  # leave the write lock to the ingest writer between batches
+
+    c.execute("INSERT OR REPLACE INTO migration_state (name, position, done) VALUES (?, ?, 1)", (name, position))
+    conn.commit()
+    conn.close()
+    db_log.info("[MIGRATION] %s complete", name)
+
+def migration_done(name):
+    with sqlite3.connect(DATABASE) as conn:
+        row = conn.execute("SELECT done FROM migration_state WHERE name = ?", (name,)).fetchone()
+    return bool(row and row[0])
+
+def build_initial_rollups(table):
+    """Fill rollups once from raw rows that predate them"""
+    name = f"{table}.rollups"
+    if migration_done(name):
+        return
+    rebuild_rollups(table)
+    with sqlite3.connect(DATABASE) as conn:
+        conn.execute("INSERT OR REPLACE INTO migration_state (name, position, done) VALUES (?, 0, 1)", (name,))
+
+def start_timestamp_migration():
+    def run():
+        for table in ("data", "full_data"):
+            try:
+                migrate_timestamps(table)
+                build_initial_rollups(table)
+            except Exception as e:
+                db_log.error("[MIGRATION] %s failed, will resume on next start: %s", table, e)
+    threading.Thread(target=run, name="ts-migration", daemon=True).start()
 
 def get_system_state():
     """Check if the system should be running based on stored state"""
@@ -458,7 +2071,7 @@ def get_latest_engine_settings():
         conn.close()
         
         if row:
-            print(f"Engine settings found: IP={row[0]}, Speed={row[1]}, Load={row[2]}, Fuel={row[3]}, RunHour={row[4]}, Oil={row[5]}")
+            db_log.info("Engine settings found: IP=%s, Speed=%s, Load=%s, Fuel=%s, RunHour=%s, Oil=%s", *row[:6])
             return {
                 "ip": row[0],
                 "speed": int(row[1]),
@@ -468,10 +2081,10 @@ def get_latest_engine_settings():
                 "oilpressure": int(row[5])
             }
         else:
-            print("No engine settings found in database")
+            db_log.info("No engine settings found in database")
             return None
     except Exception as e:
-        print(f"Error getting engine settings: {e}")
+        db_log.error("Error getting engine settings: %s", e)
         return None
 
 def get_latest_powermeter_settings():
@@ -484,7 +2097,7 @@ def get_latest_powermeter_settings():
         conn.close()
         
         if row:
-            print(f"Powermeter settings found: IP={row[0]}, Current={row[1]}, Voltage={row[2]}, R={row[3]}, Q={row[4]}, S={row[5]}")
+            db_log.info("Powermeter settings found: IP=%s, Current=%s, Voltage=%s, R=%s, Q=%s, S=%s", *row[:6])
             return {
                 "ip": row[0],
                 "current": int(row[1]),
@@ -494,10 +2107,10 @@ def get_latest_powermeter_settings():
                 "s": int(row[5])
             }
         else:
-            print("No powermeter settings found in database")
+            db_log.info("No powermeter settings found in database")
             return None
     except Exception as e:
-        print(f"Error getting powermeter settings: {e}")
+        db_log.error("Error getting powermeter settings: %s", e)
         return None
 
 def get_current_interval():
@@ -505,286 +2118,1625 @@ def get_current_interval():
     with interval_lock:
         return secTimeInterval
 
-def read_basic_sensor_data():
-    global running, thread_stop_event
-    print(f"[BASIC] Starting basic sensor data collection thread")
-    
-    while running and not thread_stop_event.is_set():
+# === INGEST WRITER ===
+INGEST_QUEUE_SIZE = 10000       # pending statements before new ones go to the spool file
+INGEST_BATCH_ROWS = 500         # commit once this many rows are gathered...
+INGEST_FLUSH_INTERVAL = 0.5     # ...or this many seconds after the first one
+INGEST_SPOOL_DEADLINE = 3.0     # a batch the database refuses for this long goes to the spool file
+
+WRITER_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",     # durable across app crashes in WAL mode, one fsync per checkpoint
+    "PRAGMA busy_timeout=1000",      # short, so INGEST_SPOOL_DEADLINE is what bounds a blocked batch
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",       # 8 MB page cache
+    "PRAGMA wal_autocheckpoint=1000",
+]
+
+SPOOL_PATH = os.path.join(BASE_DIR, "ingest.spool")
+SPOOL_QUARANTINE_PATH = SPOOL_PATH + ".rejected"  # spooled rows the database refused, as JSON lines
+SPOOL_MAGIC = b"ISMSSPL1"
+SPOOL_FSYNC_INTERVAL = 1.0      # spooled records are fsynced together, at most this long after the append
+SPOOL_REPLAY_ROWS = 2000        # rows per replay transaction
+SPOOL_BYTES_TAG = "$b64"        # bytes values (hr_blocks payloads) are spooled as {"$b64": base64}
+
+def spool_json_default(value):
+    """JSON form of row values json cannot write itself; bytes round-trip through spool_json_object"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {SPOOL_BYTES_TAG: base64.b64encode(value).decode("ascii")}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} values cannot be spooled")
+
+def spool_json_object(obj):
+    return base64.b64decode(obj[SPOOL_BYTES_TAG]) if len(obj) == 1 and SPOOL_BYTES_TAG in obj else obj
+
+
+class SampleSpool:
+    """Append-only file holding ingest items the database could not take in time.
+
+    Layout: SPOOL_MAGIC, generation (uint64), then records of payload length
+    (uint32), crc32 (uint32) and a JSON payload: ["S", n, sql] names a
+    statement once per file, ["R", n, rows, partition] holds rows for it.
+    Bytes values are written as {"$b64": base64} (see spool_json_default).
+
+    Appends only hand the bytes to the OS, so a process crash loses nothing
+    and the collector never waits for the disk; sync() fsyncs whatever was
+    appended since the last call. Records are replayed in order, and the
+    position reached is committed with the replayed rows (migration_state
+    "ingest.spool:<generation>"), so a restart neither loses nor repeats them.
+    A torn record at the end of the file is cut off when the spool is opened.
+    """
+
+    HEADER = struct.Struct("<8sQ")
+    RECORD = struct.Struct("<II")
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()  # held by appenders and by whoever switches the spool on or off
+        self.file = None
+        self.generation = None
+        self.position = 0
+        self.size = 0
+        self.dirty = False
+        self.statements = {}  # sql -> number, for the current file
+        self.sql = {}  # number -> sql
+        self.stats = {"spooled": 0, "replayed": 0, "quarantined": 0, "spool_errors": 0}
+        if os.path.exists(path):
+            self._reopen()
+
+    @property
+    def active(self):
+        """True while records are waiting; new items must then be spooled too, to stay in order"""
+        return self.file is not None
+
+    @property
+    def state_name(self):
+        return f"ingest.spool:{self.generation}"
+
+    def _reopen(self):
+        with open(self.path, "rb") as f:
+            header = f.read(self.HEADER.size)
+            if len(header) < self.HEADER.size or header[:len(SPOOL_MAGIC)] != SPOOL_MAGIC:
+                f.close()
+                db_log.error("[SPOOL] %s is not a spool file, moving it aside", self.path)
+                os.replace(self.path, self.path + ".bad")
+                return
+            self.generation = self.HEADER.unpack(header)[1]
+            end = self.HEADER.size
+            for _, end in self._records(f, end):
+                pass
+        length = os.path.getsize(self.path)
+        if end < length:
+            db_log.warning("[SPOOL] Cutting %s bytes of a torn record", length - end)
+        self.file = open(self.path, "r+b")
+        self.file.truncate(end)
+        self.file.seek(end)
+        self.size = end
+        with sqlite3.connect(DATABASE) as conn:
+            row = conn.execute("SELECT position FROM migration_state WHERE name = ?", (self.state_name,)).fetchone()
+        self.position = row[0] if row else self.HEADER.size
+        db_log.info("[SPOOL] Resuming replay of %s spooled bytes", self.size - self.position)
+
+    def _records(self, f, offset):
+        """(item, end offset) of every complete record in open file f from offset on"""
+        f.seek(offset)
+        while True:
+            header = f.read(self.RECORD.size)
+            if len(header) < self.RECORD.size:
+                return
+            length, crc = self.RECORD.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+            record = json.loads(payload, object_hook=spool_json_object)
+            offset += self.RECORD.size + length
+            if record[0] == "S":
+                self.sql[record[1]] = record[2]
+                self.statements[record[2]] = record[1]
+                continue
+            _, number, rows, partition = record
+            yield (self.sql[number], rows, tuple(partition) if partition else None), offset
+
+    def append(self, items):
+        """Append (sql, rows, partition) items; the caller holds self.lock.
+
+        All records are encoded before anything is written, so an item that
+        cannot be spooled leaves the file (and whether it exists) untouched.
+        False if an item could not be encoded or the disk refused.
+        """
+        try:
+            statements = {} if self.file is None else dict(self.statements)
+            records = []
+            for sql, rows, partition in items:
+                payloads = []
+                if sql not in statements:
+                    statements[sql] = len(statements)
+                    payloads.append(["S", statements[sql], sql])
+                payloads.append(["R", statements[sql], rows, partition])
+                for payload in payloads:
+                    payload = json.dumps(payload, default=spool_json_default).encode()
+                    records.append(self.RECORD.pack(len(payload), zlib.crc32(payload)) + payload)
+            data = b"".join(records)
+            if self.file is None:
+                self.generation = time.time_ns()
+                self.file = open(self.path, "wb")
+                self.file.write(self.HEADER.pack(SPOOL_MAGIC, self.generation))
+                self.position = self.size = self.HEADER.size
+            self.file.write(data)
+            self.file.flush()
+        except (OSError, TypeError, ValueError) as e:
+            self.stats["spool_errors"] += 1
+            db_log.error("[SPOOL] Append failed: %s", e)
+            return False
+        self.statements = statements
+        self.sql = {number: sql for sql, number in statements.items()}
+        self.size += len(data)
+        self.dirty = True
+        self.stats["spooled"] += sum(len(rows) for _, rows, _ in items)
+        return True
+
+    def quarantine(self, rejected):
+        """Keep (sql, row, error) of spooled rows the database rejected in SPOOL_QUARANTINE_PATH, one JSON line each"""
+        try:
+            with open(SPOOL_QUARANTINE_PATH, "a") as f:
+                for sql, row, error in rejected:
+                    f.write(json.dumps({"sql": sql, "row": row, "error": error}, default=spool_json_default) + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            self.stats["spool_errors"] += 1
+            db_log.error("[SPOOL] Could not quarantine %s rejected rows: %s", len(rejected), e)
+        self.stats["quarantined"] += len(rejected)
+        db_log.error("[SPOOL] %s spooled rows rejected by the database, kept in %s", len(rejected), SPOOL_QUARANTINE_PATH)
+
+    def sync(self):
+        with self.lock:
+            if self.file is None or not self.dirty:
+                return
+            self.dirty = False
+            try:
+                os.fsync(self.file.fileno())
+            except OSError as e:
+                self.stats["spool_errors"] += 1
+                db_log.error("[SPOOL] fsync failed: %s", e)
+
+    def read(self, max_rows=SPOOL_REPLAY_ROWS):
+        """Items from the replay position on, up to about max_rows rows, and the position after them"""
+        items, end, rows = [], self.position, 0
+        with open(self.path, "rb") as f:
+            for item, end in self._records(f, self.position):
+                items.append(item)
+                rows += len(item[1])
+                if rows >= max_rows:
+                    break
+        return items, end
+
+    def remove(self):
+        """Delete the fully replayed file; the caller holds self.lock"""
+        self.file.close()
+        self.file = None
+        os.remove(self.path)
+
+    def status(self):
+        return {"active": self.active, "pending_bytes": self.size - self.position if self.active else 0,
+                **self.stats}
+
+class IngestWriter:
+    """Single writer thread that owns all sample inserts.
+
+    Acquisition sources submit (statement, rows) to a bounded queue; the writer
+    gathers them into one transaction per batch and runs all rows of the same
+    statement through one executemany, in order of first appearance. Busy/locked
+    errors are retried with backoff; a batch still refused after
+    INGEST_SPOOL_DEADLINE goes to the spool file together with everything
+    queued behind it, as do submissions while the queue is full. Producers
+    never block. Until the spool thread has replayed the file, new items are
+    spooled as well, so rows reach the database in submission order.
+
+    Statements for partitioned tables name their table as {partition}.table and
+    are routed to the partition of the row's timestamp, which the writer attaches
+    (and creates) on demand. Their first column is id, assigned here from one
+    counter per table so ids keep increasing across partitions. Dropping partitions also runs here, between batches,
+    so it never races an insert.
+    """
+
+    MAX_ATTACHED = 4
+    EXPIRY_CHECK_SECONDS = 3600
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.spool_thread = None
+        self.spool = SampleSpool(SPOOL_PATH)
+        self._start_lock = threading.Lock()
+        self.attached = {}  # schema name -> partition path, oldest attach first
+        self.last_ids = {}  # partitioned table -> last id handed out
+        self.last_expiry = 0.0
+        self.last_maintenance = 0.0
+        self.stats = {"submitted": 0, "written": 0, "commits": 0, "retries": 0, "dropped": 0, "failed": 0,
+                      "last_commit_ms": None, "last_error": None}
+
+    def start(self):
+        with self._start_lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+            self.thread.start()
+            self.spool_thread = threading.Thread(target=self._run_spool, name="ingest-spool", daemon=True)
+            self.spool_thread.start()
+
+    def submit(self, sql, rows, partition=None):
+        """Queue rows for one statement, or spool them; False only if the spool file failed too.
+
+        partition=(table, ts_ms) routes a {partition}.table statement to the
+        partition holding ts_ms; its rows leave out the leading id parameter.
+        """
+        self.start()
+        rows = list(rows)
+        with self.spool.lock:
+            if not self.spool.active:
+                try:
+                    self.queue.put_nowait((sql, rows, partition))
+                    self.stats["submitted"] += len(rows)
+                    return True
+                except queue.Full:
+                    db_log.warning("[INGEST] Queue full, spooling to disk")
+            if self.spool.append([(sql, rows, partition)]):
+                self.stats["submitted"] += len(rows)
+                return True
+        self.stats["dropped"] += len(rows)
+        db_log.warning("[INGEST] Spool unavailable, dropped %d rows", len(rows))
+        return False
+
+    def run_in_writer(self, fn, timeout=30.0):
+        """Run fn(conn) on the writer thread between batches and return its result"""
+        self.start()
+        done = threading.Event()
+        outcome = {}
+
+        def call(conn):
+            try:
+                outcome["result"] = fn(conn)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                done.set()
+
+        self.queue.put((None, call, None))
+        if not done.wait(timeout):
+            raise TimeoutError("Writer did not run the operation in time")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome.get("result")
+
+    def flush(self, timeout=10.0):
+        """Wait until everything submitted so far is committed, spooled rows included"""
+        deadline = time.monotonic() + timeout
+        while (self.queue.unfinished_tasks or self.spool.active) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not (self.queue.unfinished_tasks or self.spool.active)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=INGEST_FLUSH_INTERVAL + INGEST_SPOOL_DEADLINE + 10)
+        self.spool.sync()
+
+    def _run(self):
+        conn = sqlite3.connect(DATABASE)
+        for pragma in WRITER_PRAGMAS:
+            conn.execute(pragma)
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write(conn, batch)
+            elif self.stop_event.is_set():
+                break
+            if time.monotonic() - self.last_expiry > self.EXPIRY_CHECK_SECONDS:
+                self.last_expiry = time.monotonic()
+                try:
+                    self.expire_partitions(conn)
+                except Exception as e:
+                    db_log.error("[STORAGE] Retention check failed: %s", e)
+            # Maintenance only takes slots in which nothing is waiting to be written
+            if not self.queue.qsize() and time.monotonic() - self.last_maintenance > MAINTENANCE_STEP_SECONDS:
+                self.last_maintenance = time.monotonic()
+                try:
+                    run_maintenance(conn, ["main"] + list(self.attached))
+                except Exception as e:
+                    maintenance_stats["last_error"] = str(e)
+                    db_log.error("[MAINTENANCE] Step failed: %s", e)
+        conn.close()
+
+    def _next_batch(self):
+        """Wait for a first item, then keep gathering until the batch is full or the flush interval passes"""
         try:
-            # Get current interval setting
+            batch = [self.queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        rows = len(batch[0][1]) if batch[0][0] else 0
+        deadline = time.monotonic() + INGEST_FLUSH_INTERVAL
+        while rows < INGEST_BATCH_ROWS and batch[-1][0] is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self.stop_event.is_set():
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[1]) if item[0] else 0
+        return batch
+
+    def _write(self, conn, batch):
+        # A control operation ends the batch; rows queued before it are committed first
+        control = batch.pop() if batch[-1][0] is None else None
+        try:
+            if batch and self._commit(conn, batch) is False:
+                self._spool_backlog(conn, batch)
+        except Exception as e:
+            self._fail(sum(len(rows) for _, rows, _ in batch), e)
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+        if control:
+            control[1](conn)
+            self.queue.task_done()
+
+    def _groups(self, conn, batch):
+        """[(sql, rows)] of a batch, one entry per statement, routed to partitions and with ids assigned"""
+        groups = {}
+        in_use = set()
+        for sql, rows, partition in batch:
+            if partition:
+                schema = self._attach_partition(conn, *partition, in_use=in_use)
+                in_use.add(schema)
+                sql = sql.format(partition=schema)
+                if partition[0] not in NARROW_TABLES:
+                    rows = [(self._next_id(partition[0]), *row) for row in rows]
+            groups.setdefault(sql, []).extend(rows)
+        return list(groups.items())
+
+    def _commit(self, conn, batch, deadline=INGEST_SPOOL_DEADLINE, report=True):
+        """Write a batch in one transaction: True once committed, False if the database
+        stayed locked past the deadline (nothing written), None if the rows failed
+        (counted as failed unless report is False)"""
+        groups = self._groups(conn, batch)
+        n_rows = sum(len(rows) for _, rows in groups)
+
+        delay = 0.05
+        give_up = time.monotonic() + deadline
+        while True:
+            started = time.perf_counter()
+            try:
+                with conn:
+                    for sql, rows in groups:
+                        conn.executemany(sql, rows)
+                self.stats["written"] += n_rows
+                self.stats["commits"] += 1
+                self.stats["last_commit_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                return True
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if "locked" not in message and "busy" not in message:
+                    if report:
+                        self._fail(n_rows, e)
+                    return None
+                # Another connection holds the write lock; keep the batch and retry
+                self.stats["retries"] += 1
+                self.stats["last_error"] = str(e)
+                if time.monotonic() + delay > give_up:
+                    return False
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+            except sqlite3.Error as e:
+                if report:
+                    self._fail(n_rows, e)
+                return None
+
+    def _spool_backlog(self, conn, batch):
+        """Move a refused batch and everything queued behind it to the spool, in order.
+
+        Queued items only leave the queue once the spool holds them; if the
+        append fails they stay queued for the next batch and only the refused
+        batch is counted as failed.
+        """
+        controls = []
+        with self.spool.lock:
+            # Producers hold spool.lock to queue rows, so no row can slip in behind this snapshot
+            with self.queue.mutex:
+                queued = list(self.queue.queue)
+            items = list(batch) + [item for item in queued if item[0] is not None]
+            if not self.spool.append(items):
+                self._fail(sum(len(rows) for _, rows, _ in batch), "spool append failed")
+                return
+            for _ in queued:
+                item = self.queue.get_nowait()
+                if item[0] is None:
+                    controls.append(item)
+                else:
+                    self.queue.task_done()
+        db_log.warning("[INGEST] Database locked for %.0fs, spooled %d statements", INGEST_SPOOL_DEADLINE, len(items))
+        for _, call, _ in controls:
+            call(conn)
+            self.queue.task_done()
+
+    def _run_spool(self):
+        """fsync spooled records in batches and replay them once the database takes writes again"""
+        while not self.stop_event.wait(SPOOL_FSYNC_INTERVAL):
+            self.spool.sync()
+            try:
+                while self.spool.active and not self.stop_event.is_set():
+                    if not self._replay_spool():
+                        break
+            except Exception as e:
+                db_log.error("[SPOOL] Replay failed: %s", e)
+
+    def _replay_spool(self):
+        """Replay one chunk of the spool; False when there is nothing more to do for now"""
+        spool = self.spool
+        items, end = spool.read()
+        if not items:
+            # Caught up: switch producers back to the queue and delete the file
+            def finish(conn):
+                with spool.lock:
+                    if spool.active and spool.position >= spool.size:
+                        name = spool.state_name
+                        spool.remove()
+                        with conn:
+                            conn.execute("DELETE FROM migration_state WHERE name = ?", (name,))
+                        db_log.info("[SPOOL] Replay complete")
+            self.run_in_writer(finish)
+            return False
+
+        def replay(conn):
+            position = ("INSERT OR REPLACE INTO migration_state (name, position, done) VALUES (?, ?, 0)",
+                        [(spool.state_name, end)], None)
+            committed = self._commit(conn, items + [position], report=False)
+            if committed is None:
+                # Rows the database rejects would block the spool forever: write the
+                # chunk row by row and quarantine only the rows that fail
+                committed = self._commit_each(conn, items + [position])
+            return committed is not False
+
+        if not self.run_in_writer(replay):
+            return False
+        spool.position = end
+        spool.stats["replayed"] += sum(len(rows) for _, rows, _ in items)
+        return True
+
+    def _commit_each(self, conn, batch):
+        """Write a batch row by row in one transaction, quarantining the rows the database rejects.
+
+        Each row gets its own savepoint, so a rejected row is rolled back alone.
+        False if the database is locked (nothing written).
+        """
+        groups = self._groups(conn, batch)
+        rejected = []
+        try:
+            conn.execute("BEGIN")
+            for sql, rows in groups:
+                for row in rows:
+                    conn.execute("SAVEPOINT spool_row")
+                    try:
+                        conn.execute(sql, row)
+                    except sqlite3.Error as e:
+                        if "locked" in str(e).lower() or "busy" in str(e).lower():
+                            raise
+                        conn.execute("ROLLBACK TO spool_row")
+                        rejected.append((sql, row, str(e)))
+                    conn.execute("RELEASE spool_row")
+            if rejected:
+                self.spool.quarantine(rejected)
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            self.stats["last_error"] = str(e)
+            return False
+        except Exception:
+            conn.rollback()
+            raise
+        self.stats["written"] += sum(len(rows) for _, rows in groups) - len(rejected)
+        self.stats["commits"] += 1
+        if rejected:
+            self._fail(len(rejected), rejected[-1][2])
+        return True
+
+    def _next_id(self, table):
+        if table not in self.last_ids:
+            self.last_ids[table] = max_stored_id(table)
+        self.last_ids[table] += 1
+        return self.last_ids[table]
+
+    def _attach_partition(self, conn, table, ts, in_use=()):
+        key = partition_key(ts)
+        schema = f"p_{table}_{key.replace('-', '_')}"
+        if schema in self.attached:
+            return schema
+        path = partition_path(table, key)
+        if not os.path.exists(path):
+            create_partition(table, key)
+        # Keep a few partitions attached, never one the current batch still writes to
+        idle = [name for name in self.attached if name not in in_use]
+        if len(self.attached) >= self.MAX_ATTACHED and idle:
+            conn.execute(f"DETACH DATABASE {idle[0]}")
+            del self.attached[idle[0]]
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+        conn.execute(f"PRAGMA {schema}.synchronous=NORMAL")
+        self.attached[schema] = path
+        return schema
+
+    def drop_partitions(self, conn, partitions):
+        """Detach and delete partition files; runs on the writer thread"""
+        dropped = []
+        for partition in partitions:
+            for schema, path in list(self.attached.items()):
+                if path == partition["path"]:
+                    conn.execute(f"DETACH DATABASE {schema}")
+                    del self.attached[schema]
+            if remove_partition_file(partition["path"]):
+                dropped.append(f"{partition['table']}_{partition['key']}")
+        if dropped:
+            db_log.info("[STORAGE] Dropped partitions: %s", ', '.join(dropped))
+        return dropped
+
+    def expire_partitions(self, conn):
+        """Drop raw partitions that ended before the retention window"""
+        retention_days = float(get_storage_config()["retentionDays"] or 0)
+        if retention_days <= 0:
+            return []
+        cutoff = (time.time() - retention_days * 86400) * 1000
+        with conn:
+            conn.execute("DELETE FROM main.gaps WHERE end_ts < ?", (cutoff,))
+        return self.drop_partitions(conn, [p for p in list_partitions() if p["end_ms"] <= cutoff])
+
+    def _fail(self, n_rows, error):
+        self.stats["failed"] += n_rows
+        self.stats["last_error"] = str(error)
+        db_log.error("[INGEST] Write of %s rows failed: %s", n_rows, error)
+
+    def status(self):
+        return {"queued": self.queue.qsize(), "alive": bool(self.thread and self.thread.is_alive()),
+                "attached_partitions": list(self.attached.values()), "spool": self.spool.status(), **self.stats}
+
+
+ingest_writer = IngestWriter()
+atexit.register(ingest_writer.stop)
+
+# === DATABASE MAINTENANCE ===
+# Space is handed back a little at a time instead of by a full VACUUM. The
+# database runs with auto_vacuum=INCREMENTAL and the ingest writer, whenever
+# its queue is empty, reclaims at most MAINTENANCE_VACUUM_PAGES free pages
+# per file. PRAGMA optimize and TRUNCATE checkpoints run on a schedule in
+# the same slots. Switching an existing database to incremental needs one
+# VACUUM: small files are converted on the first step, larger ones only
+# through /api/maintenance (ingest is spooled while it runs).
+MAINTENANCE_STEP_SECONDS = 10  # at most one step this often
+MAINTENANCE_VACUUM_PAGES = 256  # free pages reclaimed per file and step
+MAINTENANCE_OPTIMIZE_SECONDS = 6 * 3600
+MAINTENANCE_CHECKPOINT_SECONDS = 15 * 60
+AUTO_VACUUM_CONVERT_MAX_BYTES = 64 * 1024 * 1024  # larger files are converted on request only
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+maintenance_stats = {"steps": 0, "pages_reclaimed": 0, "last_step_ms": None, "last_vacuum": None,
+                     "last_optimize": None, "last_checkpoint": None, "checkpoint_busy": 0,
+                     "converted": None, "last_error": None}
+maintenance_due = {"conversion_checked": False, "optimize": time.monotonic(), "checkpoint": time.monotonic()}
+
+def convert_to_incremental(conn):
+    """Switch the main database to auto_vacuum=INCREMENTAL; rewrites the whole file once"""
+    started = time.perf_counter()
+    conn.execute("PRAGMA main.auto_vacuum=INCREMENTAL")
+    conn.execute("VACUUM")
+    seconds = round(time.perf_counter() - started, 2)
+    maintenance_stats["converted"] = datetime.now().isoformat(timespec='seconds')
+    db_log.info("[MAINTENANCE] Database switched to incremental auto_vacuum in %ss", seconds)
+    return seconds
+
+def run_maintenance(conn, schemas):
+    """One bounded maintenance step on the writer connection"""
+    started = time.perf_counter()
+    now = time.monotonic()
+    if not maintenance_due["conversion_checked"]:
+        maintenance_due["conversion_checked"] = True
+        if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] != 2:
+            if os.path.getsize(DATABASE) <= AUTO_VACUUM_CONVERT_MAX_BYTES:
+                convert_to_incremental(conn)
+            else:
+                db_log.warning("[MAINTENANCE] Database is too large to switch to incremental auto_vacuum "
+                               "automatically; POST /api/maintenance {\"convert\": true} to do it")
+
+    for schema in schemas:
+        if conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] != 2:
+            continue
+        free = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+        if free:
+            # executescript steps the pragma to the end; execute() would free a single page
+            conn.executescript(f"PRAGMA {schema}.incremental_vacuum({MAINTENANCE_VACUUM_PAGES});")
+            maintenance_stats["pages_reclaimed"] += free - conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+            maintenance_stats["last_vacuum"] = datetime.now().isoformat(timespec='seconds')
+
+    if now - maintenance_due["optimize"] >= MAINTENANCE_OPTIMIZE_SECONDS:
+        maintenance_due["optimize"] = now
+        conn.execute("PRAGMA optimize")
+        maintenance_stats["last_optimize"] = datetime.now().isoformat(timespec='seconds')
+
+    if now - maintenance_due["checkpoint"] >= MAINTENANCE_CHECKPOINT_SECONDS:
+        maintenance_due["checkpoint"] = now
+        for schema in schemas:
+            busy, _, _ = conn.execute(f"PRAGMA {schema}.wal_checkpoint(TRUNCATE)").fetchone()
+            maintenance_stats["checkpoint_busy"] += busy  # a reader was in the way; the next run retries
+        maintenance_stats["last_checkpoint"] = datetime.now().isoformat(timespec='seconds')
+
+    maintenance_stats["steps"] += 1
+    maintenance_stats["last_step_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+def database_space(path, detail=False):
+    """Page and free-page figures of one SQLite file; with detail, fragmentation from dbstat.
+
+    fill is the share of leaf page bytes holding data; out_of_order the share of
+    leaf pages not stored right after the previous leaf of the same table or
+    index, which is what makes range scans seek. dbstat reads the whole file.
+    """
+    conn = sqlite3.connect(path)
+    page_size, page_count, free, mode = (conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+                                         for pragma in ("page_size", "page_count", "freelist_count", "auto_vacuum"))
+    wal = path + "-wal"
+    space = {"path": path, "file_bytes": os.path.getsize(path), "wal_bytes": os.path.getsize(wal) if os.path.exists(wal) else 0,
+             "page_size": page_size, "page_count": page_count, "free_pages": free,
+             "free_percent": round(100.0 * free / page_count, 2) if page_count else 0.0,
+             "auto_vacuum": AUTO_VACUUM_MODES.get(mode, mode)}
+    if detail:
+        try:
+            leaves = conn.execute("SELECT name, pageno, pgsize, unused FROM dbstat WHERE pagetype = 'leaf' "
+                                  "ORDER BY name, path").fetchall()
+            jumps = sum(1 for a, b in zip(leaves, leaves[1:]) if a[0] == b[0] and b[1] != a[1] + 1)
+            size = sum(row[2] for row in leaves)
+            space["fill_percent"] = round(100.0 * (1 - sum(row[3] for row in leaves) / size), 2) if size else None
+            space["out_of_order_percent"] = round(100.0 * jumps / max(len(leaves) - 1, 1), 2)
+        except sqlite3.OperationalError:
+            space["fill_percent"] = space["out_of_order_percent"] = None  # SQLite built without dbstat
+    conn.close()
+    return space
+
+# === ACQUISITION SCHEDULER ===
+class MonotonicScheduler:
+    """Fixed-rate ticks on wall-clock aligned boundaries, driven by time.monotonic() deadlines.
+
+    A 5 s interval ticks at :00, :05, :10 ... regardless of how long each cycle
+    takes. Ticks that have already passed by more than half an interval are
+    skipped and counted in `missed` rather than fired back to back.
+    """
+
+    def __init__(self, interval, stop_event):
+        self.stop_event = stop_event
+        self.ticks = 0
+        self.missed = 0
+        self.interval = None
+        self.next_deadline = None
+        self.next_tick_wall = None
+        self.set_interval(interval)
+
+    def set_interval(self, interval):
+        """Re-align deadlines to the wall-clock grid of a new interval"""
+        self.interval = float(interval)
+        wall = time.time()
+        mono = time.monotonic()
+        self.next_tick_wall = (math.floor(wall / self.interval) + 1) * self.interval
+        self.next_deadline = mono + (self.next_tick_wall - wall)
+
+    def wait(self):
+        """Block until the next tick; returns False as soon as the stop event is set"""
+        now = time.monotonic()
+        late = now - self.next_deadline
+        if late > self.interval / 2:
+            skipped = math.floor(late / self.interval + 0.5)
+            self.missed += skipped
+            self.next_deadline += skipped * self.interval
+            self.next_tick_wall += skipped * self.interval
+
+        if self.stop_event.wait(max(0.0, self.next_deadline - time.monotonic())):
+            return False
+
+        self.ticks += 1
+        self.next_deadline += self.interval
+        self.next_tick_wall += self.interval
+        return True
+
+    def stats(self):
+        return {"interval": self.interval, "ticks": self.ticks, "missed_ticks": self.missed}
+
+
+# === CHANNEL REGISTRY ===
+# Every recorded channel has a row in channels. The fixed ones (ch1..ch7 and
+# the engine/powermeter values) are columns of data/full_data ("wide").
+# Devices and channels added through /api/channels are polled like the engine
+# and stored one row per channel and sample in the samples partitions
+# ("narrow"), so adding channels or devices needs no schema change.
+SAMPLE_INSERT = "INSERT OR REPLACE INTO {partition}.samples (channel_id, ts, value, quality) VALUES (?, ?, ?, ?)"
+
+def get_channel_registry():
+    """All registered channels as dicts, in id order"""
+    conn = sqlite3.connect(DATABASE)
+    conn.row_factory = sqlite3.Row
+    channels = [dict(row) for row in conn.execute("SELECT * FROM channels ORDER BY id")]
+    conn.close()
+    return channels
+
+def get_registry_devices():
+    """Enabled registry devices with their enabled channels: [{name, ip, port, unit_id, channels: [...]}]"""
+    conn = sqlite3.connect(DATABASE)
+    conn.row_factory = sqlite3.Row
+    devices = {row["name"]: dict(row, channels=[])
+               for row in conn.execute("SELECT name, ip, port, unit_id FROM devices WHERE enabled = 1")}
+    for row in conn.execute("""SELECT id, name, device, address FROM channels
+                               WHERE storage = 'narrow' AND enabled = 1 AND address IS NOT NULL ORDER BY id"""):
+        if row["device"] in devices:
+            devices[row["device"]]["channels"].append(dict(row))
+    conn.close()
+    return [device for device in devices.values() if device["channels"]]
+
+# === DEVICE REGISTER MAPS ===
+def compile_device_map(settings, field_names):
+    """Turn a settings row into register offsets and a precompiled read plan"""
+    if not settings:
+        return None
+    fields = {name: settings[name] - 40001 for name in field_names}
+    return {"ip": settings["ip"], "fields": fields, "plan": plan_register_reads(fields)}
+
+
+class DeviceMapCache:
+    """Engine, powermeter and registry device register maps kept in memory.
+
+    /save-engine, /save-powermeter and /api/channels bump the generation; the next get()
+    recompiles from the database, so the running collector picks up new
+    settings on its next tick without a restart.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = 1
+        self._compiled_generation = 0
+        self._maps = {}
+
+    def invalidate(self):
+        with self.lock:
+            self.generation += 1
+
+    def get(self):
+        if self._compiled_generation == self.generation:
+            return self._maps
+        with self.lock:
+            generation = self.generation
+            maps = {
+                "engine": compile_device_map(get_latest_engine_settings(), ENGINE_FIELDS),
+                "powermeter": compile_device_map(get_latest_powermeter_settings(), POWERMETER_FIELDS),
+            }
+            for name, device in maps.items():
+                if device is None:
+                    acq_log.warning("No %s settings available, its values are not recorded", name)
+            for device in get_registry_devices():
+                fields = {channel["name"]: channel["address"] - 40001 for channel in device["channels"]}
+                maps[device["name"]] = {"ip": device["ip"], "port": device["port"], "unit": device["unit_id"],
+                                        "fields": fields, "plan": plan_register_reads(fields),
+                                        "channel_ids": {channel["name"]: channel["id"] for channel in device["channels"]}}
+            self._maps = maps
+            self._compiled_generation = generation
+            acq_log.info("[DEVICES] Register maps compiled (generation %s)", generation)
+            return maps
+
+
+device_maps = DeviceMapCache()
+
+# === ASYNC ACQUISITION ENGINE ===
+ACQUISITION_DEVICE_TIMEOUT = 2.5  # seconds one device may take before its cycle is abandoned
+# A read abandoned at the timeout keeps its thread until the socket times out;
+# the second thread per device lets the next cycle start without waiting for it
+ACQUISITION_WORKERS_PER_DEVICE = 2
+ENGINE_FIELDS = ["speed", "load", "fuelrate", "runhour", "oilpressure"]
+POWERMETER_FIELDS = ["current", "voltage", "r", "q", "s"]
+
+# Latest acquisition snapshot, replaced once per cycle
+snapshot_lock = threading.Lock()
+latest_snapshot = None
+acquisition_scheduler = None
+
+def get_latest_snapshot():
+    with snapshot_lock:
+        return latest_snapshot
+
+
+class AcquisitionEngine:
+    """Polls every configured device concurrently, coordinated by one asyncio loop.
+
+    The Modbus I/O itself is blocking: pymodbus 2.5's asyncio client does not
+    import on Python 3.11+, so each device is read with the pooled sync client
+    on a worker thread and the loop only schedules the reads and enforces the
+    per-device timeout. The pool has ACQUISITION_WORKERS_PER_DEVICE threads per
+    device, so reads never queue behind each other and one dead device only
+    costs its own timeout, not the whole cycle.
+    """
+
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+        self.loop = None
+        self.executor = None
+        self.workers = 0
+        self.scheduler = None
+
+    def run(self):
+        acq_log.info("[ACQ] Starting acquisition engine (pooled sync client in worker threads)")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._main())
+        finally:
+            self.loop.close()
+            if self.executor:
+                self.executor.shutdown(wait=False)
+            flush_compressors()
+        acq_log.info("[ACQ] Acquisition engine stopped")
+
+    async def _main(self):
+        global latest_snapshot, acquisition_scheduler
+        self.scheduler = MonotonicScheduler(get_current_interval(), self.stop_event)
+        acquisition_scheduler = self.scheduler
+        while running and not self.stop_event.is_set():
             current_interval = get_current_interval()
-            
-            now = datetime.now()
-            date = now.strftime("%Y-%m-%d")
-            clock = now.strftime("%H:%M:%S")
-            
-            # Initialize default values (raw 0-100 values)
-            raw_values = [0.0] * 7
-            connection_successful = False
-            
+            if current_interval != self.scheduler.interval:
+                self.scheduler.set_interval(current_interval)
+
+            # Wait for the next aligned tick off the event loop so stop is immediate
+            if not await self.loop.run_in_executor(None, self.scheduler.wait):
+                acq_log.info("[ACQ] Thread stopping due to stop event")
+                return
+            if not running:
+                return
+
+            try:
+                snapshot = await self.acquire_snapshot()
+                snapshot["missed_ticks"] = self.scheduler.missed
+                with snapshot_lock:
+                    latest_snapshot = snapshot
+                live_stream.publish(snapshot, store_snapshot(snapshot, current_interval))
+            except Exception as e:
+                acq_log.error("Global error in acquisition cycle: %s", e)
+
+    async def acquire_snapshot(self):
+        """Poll every configured device concurrently and return one timestamped snapshot"""
+        now = datetime.now()
+        started = time.monotonic()
+
+        polls = {"basic": self._poll("basic", MODBUS_IP, BASIC_FIELDS, MODBUS_PORT, UNIT_ID, BASIC_READ_PLAN)}
+        for name, device in device_maps.get().items():
+            if device:
+                polls[name] = self._poll(name, device["ip"], device["fields"], device.get("port", 502),
+                                         device.get("unit", 1), plan=device["plan"])
+
+        self._size_executor(len(polls))
+        results = await asyncio.gather(*polls.values())
+        devices = dict(zip(polls.keys(), results))
+        return {
+            "timestamp": now.isoformat(timespec='milliseconds'),
+            "date": now.strftime("%Y-%m-%d"),
+            "time": now.strftime("%H:%M:%S"),
+            "ts": int(now.timestamp() * 1000),
+            "cycle_ms": round((time.monotonic() - started) * 1000, 1),
+            "devices": devices,
+        }
+
+    def _size_executor(self, devices):
+        """Grow the read pool with the device count; reads still running finish on the old pool"""
+        workers = max(devices, 1) * ACQUISITION_WORKERS_PER_DEVICE
+        if workers > self.workers:
+            old = self.executor
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="modbus")
+            self.workers = workers
+            if old:
+                old.shutdown(wait=False)
+            acq_log.info("[ACQ] Read pool sized to %s threads for %s devices", workers, devices)
+
+    async def _poll(self, name, ip, fields, port=502, unit=1, plan=None):
+        started = time.monotonic()
+        entry = {"ip": ip, "connected": False, "timed_out": False, "values": {field: None for field in fields}}
+        if plan is None:
+            plan = plan_register_reads(fields)
+        try:
+            read = self.loop.run_in_executor(self.executor, read_float_fields, ip, fields, port, unit, plan)
+            entry["connected"], entry["values"] = await asyncio.wait_for(read, timeout=ACQUISITION_DEVICE_TIMEOUT)
+        except asyncio.TimeoutError:
+            entry["timed_out"] = True
+            acq_log.warning("%s at %s timed out after %ss, values not recorded",
+                            name.upper(), ip, ACQUISITION_DEVICE_TIMEOUT)
+        except Exception as e:
+            acq_log.warning("%s read error: %s, values not recorded", name.upper(), e)
+        entry["latency_ms"] = round((time.monotonic() - started) * 1000, 1)
+        return entry
+
+
+DATA_INSERT = (f"INSERT INTO {{partition}}.data (id, ts, date, time, {', '.join(DATA_CHANNELS + DATA_RAW_CHANNELS)}, "
+               f"cal_version, quality, held) VALUES (?, ?, ?, ?, {', '.join('?' * (2 * SENSOR_COUNT))}, ?, ?, ?)")
+FULL_DATA_INSERT = '''INSERT INTO {partition}.full_data (
+    id, ts, date, time,
+    e_speed, e_load, e_fuelrate, e_runhour, e_oilpressure,
+    pm_current, pm_voltage, pm_r, pm_q, pm_s, quality, held
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+GAP_FLUSH_SECONDS = 60  # an open gap record is rewritten at most this often
+GAP_UPSERT = """INSERT INTO gaps (device, start_ts, end_ts, cycles, quality) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(device, start_ts) DO UPDATE SET
+        end_ts = excluded.end_ts, cycles = excluded.cycles, quality = excluded.quality"""
+
+def device_quality(entry, fields):
+    """Quality bits of one polled device and its values, None where nothing usable was read"""
+    if entry is None:
+        return QUALITY_DISABLED, {field: None for field in fields}
+    if entry.get("timed_out"):
+        return QUALITY_TIMEOUT, {field: None for field in fields}
+    if not entry["connected"]:
+        return QUALITY_OFFLINE, {field: None for field in fields}
+    values = {}
+    for field in fields:
+        value = entry["values"].get(field)
+        values[field] = value if value is not None and math.isfinite(value) else None
+    return (QUALITY_DECODE_ERROR if None in values.values() else QUALITY_OK), values
+
+
+class GapTracker:
+    """Turns consecutive cycles in which a device did not answer into one gaps row.
+
+    The row is written when the outage starts, at most every GAP_FLUSH_SECONDS
+    while it lasts and once more when the device answers again, so an outage
+    costs a few small writes instead of a placeholder row per cycle.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.open = {}  # device -> {start_ts, end_ts, cycles, quality, written}
+
+    def update(self, device, ts, quality):
+        with self.lock:
+            gap = self.open.get(device)
+            if quality & QUALITY_NO_ANSWER:
+                if gap is None:
+                    gap = self.open[device] = {"start_ts": ts, "end_ts": ts, "cycles": 0, "quality": 0, "written": None}
+                    acq_log.warning("[GAP] %s stopped answering, recording a gap instead of rows", device)
+                gap["end_ts"] = ts
+                gap["cycles"] += 1
+                gap["quality"] |= quality
+                if gap["written"] is None or time.monotonic() - gap["written"] >= GAP_FLUSH_SECONDS:
+                    self._write(device, gap)
+            elif gap is not None:
+                self._write(device, self.open.pop(device))
+                acq_log.info("[GAP] %s answering again after %s missed cycles", device, gap['cycles'])
+
+    def _write(self, device, gap):
+        gap["written"] = time.monotonic()
+        ingest_writer.submit(GAP_UPSERT, [(device, gap["start_ts"], gap["end_ts"], gap["cycles"], gap["quality"])])
+
+    def status(self):
+        with self.lock:
+            return {device: {k: v for k, v in gap.items() if k != "written"} for device, gap in self.open.items()}
+
+
+gap_tracker = GapTracker()
+
+# === CHANNEL COMPRESSION ===
+# Slow channels (suction pressure, temperatures) can be stored only when they
+# move. Per channel, "deadband" leaves a value out while it stays within the
+# tolerance of the last stored one; "swinging_door" leaves it out while it lies
+# within the tolerance of the straight line between its stored neighbours.
+# Left-out values are NULL with the channel's bit set in the row's held column,
+# and readers rebuild them (reconstruct_held). A row whose channels are all
+# held is still written, without values, so every sample keeps its row and a
+# rollup rebuild counts the same samples ingest did.
+COMPRESSION_MODES = ("deadband", "swinging_door")
+COMPRESSION_DEFAULTS = {
+    "maxHoldSeconds": 600,  # a compressed channel is stored at least this often; 0 = no limit
+    "channels": {},  # channel -> {"mode": ..., "tolerance": float, "percent": bool}
+}
+
+def get_compression_config():
+    config = dict(COMPRESSION_DEFAULTS)
+    config.update(load_config().get("compression") or {})
+    return config
+
+
+class ChannelCompressor:
+    """Deadband / swinging-door filter for the channels of one table.
+
+    Works one sample behind: a sample is released when the next one arrives,
+    because swinging door can only tell whether a point has to be stored once
+    it has seen the following one. With a percent tolerance the band is that
+    percentage of the last stored value.
+    """
+
+    def __init__(self, table, config):
+        self.table = table
+        self.channels = COMPRESSIBLE_CHANNELS[table]
+        settings = config.get("channels") or {}
+        self.settings = [settings.get(name) if (settings.get(name) or {}).get("mode") in COMPRESSION_MODES else None
+                         for name in self.channels]
+        self.max_hold_ms = float(config.get("maxHoldSeconds") or 0) * 1000
+        self.points = [None] * len(self.channels)  # last stored (ts, value) per channel
+        self.doors = [None] * len(self.channels)  # swinging door: slopes still allowed from that point
+        self.pending = None
+        self.stats = {"samples": 0, "values": 0, "held": 0}
+
+    @property
+    def enabled(self):
+        return any(self.settings)
+
+    def push(self, ts, values, row):
+        """Queue one sample; returns the previous one as (row, held bits), or None"""
+        released = self._release((ts, values)) if self.pending else None
+        self.pending = (ts, values, row)
+        return released
+
+    def flush(self):
+        """Release the queued sample, storing every swinging-door channel"""
+        released = self._release(None) if self.pending else None
+        self.pending = None
+        return released
+
+    def _tolerance(self, setting, reference):
+        tolerance = float(setting.get("tolerance") or 0)
+        return abs(reference) * tolerance / 100.0 if setting.get("percent") else tolerance
+
+    def _within_hold(self, point, ts):
+        return not self.max_hold_ms or ts - point[0] < self.max_hold_ms
+
+    def _release(self, following):
+        ts, values, row = self.pending
+        held = 0
+        for i, setting in enumerate(self.settings):
+            value, point = values[i], self.points[i]
+            if setting is not None and value is not None and point is not None and ts > point[0]:
+                tolerance = self._tolerance(setting, point[1])
+                if setting["mode"] == "deadband":
+                    if abs(value - point[1]) <= tolerance and self._within_hold(point, ts):
+                        held |= 1 << i
+                        continue
+                else:
+                    # Keep the point out only if the line to the next sample still
+                    # passes within tolerance of it and every point left out before
+                    low, high = self.doors[i] or (-math.inf, math.inf)
+                    dt = ts - point[0]
+                    low = max(low, (value - tolerance - point[1]) / dt)
+                    high = min(high, (value + tolerance - point[1]) / dt)
+                    if following is not None and following[1][i] is not None and self._within_hold(point, following[0]):
+                        slope = (following[1][i] - point[1]) / (following[0] - point[0])
+                        if low <= slope <= high:
+                            self.doors[i] = (low, high)
+                            held |= 1 << (HELD_INTERP_SHIFT + i)
+                            continue
+            # Stored; an unread value restarts the channel
+            self.points[i] = None if value is None else (ts, value)
+            self.doors[i] = None
+
+        self.stats["samples"] += 1
+        self.stats["values"] += sum(v is not None for v in values)
+        self.stats["held"] += bin(held).count("1")
+        return row, held
+
+
+compressors_lock = threading.RLock()
+compressors = {}
+
+def load_compressors():
+    """(Re)build the compressors from the config, writing out what the old ones still hold"""
+    config = get_compression_config()
+    with compressors_lock:
+        flush_compressors()
+        for table in COMPRESSIBLE_CHANNELS:
+            compressors[table] = ChannelCompressor(table, config)
+
+def flush_compressors():
+    with compressors_lock:
+        for table, compressor in compressors.items():
+            released = compressor.flush()
+            if released:
+                submit_held_row(table, *released)
+
+def submit_held_row(table, row, held):
+    """Queue a row with its held channels left out.
+    Called with compressors_lock held, so rows are queued in sample order."""
+    count = len(COMPRESSIBLE_CHANNELS[table])
+    row = list(row)
+    for i in range(count):
+        if held & (1 << i | 1 << (HELD_INTERP_SHIFT + i)):
+            row[3 + i] = None
+            if table == "data":
+                row[3 + count + i] = None  # raw value
+    ingest_writer.submit(DATA_INSERT if table == "data" else FULL_DATA_INSERT, [tuple(row) + (held,)],
+                         partition=(table, row[0]))
+
+def submit_compressed(table, ts, values, row):
+    """Queue a row through the table's compressor (values: the channels it compares)"""
+    with compressors_lock:
+        compressor = compressors.get(table)
+        released = compressor.push(ts, values, row) if compressor and compressor.enabled else (row, 0)
+        if released:
+            submit_held_row(table, *released)
+
+load_compressors()
+atexit.register(flush_compressors)
+
+# === LIVE SAMPLE RING ===
+# The newest samples of data and full_data, published by store_snapshot as
+# they are acquired. /api/data and /api/latest-full-data answer from here
+# without touching SQLite. Every sample is kept, compressed or not, and seq
+# numbers them in acquisition order. Samples have the keys of the database
+# fallback rows; id is None, since the ingest writer hands ids out later, and
+# rows read from the database have seq None.
+LIVE_RING_SIZE = 600  # samples kept per table
+
+class LiveRing:
+    """Thread-safe fixed-size ring of JSON-ready samples, newest last.
+
+    The payload of the default "latest N" request is serialized once per
+    published sample, so polling clients only cost a lookup.
+    """
+
+    def __init__(self, capacity, default_n):
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=capacity)
+        self.seq = 0
+        self.default_n = default_n
+        self.payload = None
+
+    def publish(self, sample):
+        with self.lock:
+            self.seq += 1
+            sample["seq"] = self.seq
+            self.samples.append(sample)
+            self.payload = self._dumps(self.default_n)
+        return sample
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+            self.payload = None
+
+    def latest(self, n=None):
+        """Newest first as a JSON string, or None while the ring is empty"""
+        with self.lock:
+            if not self.samples:
+                return None
+            if n is None or n == self.default_n:
+                return self.payload
+            return self._dumps(n)
+
+    def _dumps(self, n):
+        newest = [self.samples[-i] for i in range(1, min(n, len(self.samples)) + 1)]
+        return json.dumps(newest, sort_keys=True)
+
+
+live_rings = {"data": LiveRing(LIVE_RING_SIZE, 10), "full_data": LiveRing(LIVE_RING_SIZE, 1)}
+
+def publish_sample(table, ts, date, clock, names, values, quality):
+    """Put one sample into the table's ring; unread values become None"""
+    sample = {"id": None, "ts": ts, "date": date, "time": clock, "quality": quality}
+    for name, value in zip(names, values):
+        sample[name] = None if value is None or value != value else round(value, 4)
+    return live_rings[table].publish(sample)
+
+def store_samples(snapshot, live):
+    """Queue one samples row per registry channel of the snapshot's devices"""
+    ts = snapshot["ts"]
+    for name, device in device_maps.get().items():
+        if not device or "channel_ids" not in device or name not in snapshot["devices"]:
+            continue
+        quality, values = device_quality(snapshot["devices"][name], list(device["fields"]))
+        gap_tracker.update(name, ts, quality)
+        live["quality"][name] = quality
+        live["values"].update(values)
+        if quality & QUALITY_NO_ANSWER:
+            continue
+        rows = [(device["channel_ids"][field], ts, value, QUALITY_OK if value is not None else QUALITY_DECODE_ERROR)
+                for field, value in values.items()]
+        ingest_writer.submit(SAMPLE_INSERT, rows, partition=("samples", ts))
+
+def store_snapshot(snapshot, current_interval):
+    """Calibrate one acquisition snapshot and queue it for data and full_data.
+
+    Values that were not read are stored as NULL and flagged in the row's
+    quality bits; switched-off channels are NULL without a flag and stay out
+    of the live values. A table gets no row at all while none of its devices
+    answer; gap_tracker records the outage instead. Returns the calibrated
+    values and per-device quality for the live stream.
+    """
+    ts, date, clock = snapshot["ts"], snapshot["date"], snapshot["time"]
+    devices = snapshot["devices"]
+    live = {"values": {}, "quality": {}}
+    store_samples(snapshot, live)
+
+    # Basic sensors: raw 0-100 values
+    quality, basic_values = device_quality(devices["basic"], DATA_CHANNELS)
+    gap_tracker.update("basic", ts, quality)
+    live["quality"]["basic"] = quality
+    if quality & QUALITY_NO_ANSWER:
+        acq_log.warning("Basic Modbus device not answering, no data row (interval: %ss): %s %s",
+                        current_interval, date, clock)
+    else:
+        raw_values = [basic_values[name] for name in DATA_CHANNELS]
+        if quality:
+            acq_log.warning("Basic Modbus read incomplete (interval: %ss): %s %s", current_interval, date, clock)
+        else:
+            acq_log.debug("Basic raw data collected (interval: %ss): %s %s", current_interval, date, clock)
+
+        # Apply calibration to raw values before storing (all 7 channels at once)
+        calibration = calibration_table.current
+        calibrated = calibration.apply([np.nan if v is None else v for v in raw_values]).tolist()
+        calibrated_values = [None if v != v else v for v in calibrated]
+        if acq_log.isEnabledFor(logging.DEBUG):
+            for i, raw_value in enumerate(raw_values):
+                if calibration.enabled[i]:
+                    acq_log.debug("  CH%d: %s (raw) -> %s %s (calibrated)", i + 1, raw_value, calibrated_values[i],
+                                  calibration.calibrations[i]['unit'])
+
+        live["quality"]["basic"] = quality
+        live["values"].update((name, value) for name, value, enabled
+                              in zip(DATA_CHANNELS, calibrated_values, calibration.enabled) if enabled)
+        publish_sample("data", ts, date, clock, DATA_CHANNELS, calibrated_values, quality)
+        # Compressed on calibrated values, so tolerances are in engineering units
+        submit_compressed("data", ts, calibrated_values,
+                          (ts, date, clock, *calibrated_values, *raw_values, calibration.version, quality))
+        submit_rollups("data", ts, calibrated_values)
+
+    # Engine and powermeter share full_data; a row is written while either answers
+    engine_quality, engine_data = device_quality(devices.get("engine"), ENGINE_FIELDS)
+    power_quality, powermeter_data = device_quality(devices.get("powermeter"), POWERMETER_FIELDS)
+    for name, device_bits in (("engine", engine_quality), ("powermeter", power_quality)):
+        if not device_bits & QUALITY_DISABLED:
+            gap_tracker.update(name, ts, device_bits)
+    live["quality"].update(engine=engine_quality, powermeter=power_quality)
+    full_values = [engine_data[name] for name in ENGINE_FIELDS] + [powermeter_data[name] for name in POWERMETER_FIELDS]
+    live["values"].update(zip(FULL_DATA_COLUMNS, full_values))
+    if all(bits & (QUALITY_NO_ANSWER | QUALITY_DISABLED) for bits in (engine_quality, power_quality)):
+        acq_log.debug("No advanced device answering, no full_data row (interval: %ss): %s %s",
+                      current_interval, date, clock)
+        return live
+
+    # An unconfigured device's channels are NULL; that is not a quality problem of the row
+    row_quality = (engine_quality | power_quality) & ~QUALITY_DISABLED
+    publish_sample("full_data", ts, date, clock, FULL_DATA_COLUMNS, full_values, row_quality)
+    submit_compressed("full_data", ts, full_values, (ts, date, clock, *full_values, row_quality))
+    submit_rollups("full_data", ts, full_values)
+    acq_log.debug("Advanced data queued (interval: %ss, cycle: %sms): %s %s",
+                  current_interval, snapshot['cycle_ms'], date, clock)
+    return live
+
+# === LIVE STREAM ===
+# /api/stream pushes one Server-Sent Events "snapshot" event per acquisition
+# cycle to every subscriber, instead of each dashboard polling three
+# endpoints. Event ids are sequence numbers; a reconnecting EventSource sends
+# Last-Event-ID and gets the events it missed while they are still kept.
+STREAM_BACKLOG = 600  # events kept for resuming clients
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_RETRY_MS = 3000
+
+
+class LiveStream:
+    """Fans acquisition snapshots out to SSE subscribers.
+
+    Each event is encoded once per distinct channel filter and the frame is
+    shared by every client using that filter, so a subscriber costs a wakeup
+    and a socket write per event.
+    """
+
+    def __init__(self, backlog):
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=backlog)  # (seq, event, {filter: encoded frame})
+        self.seq = 0
+        self.subscribers = 0
+        self.stats = {"published": 0, "frames_encoded": 0}
+
+    def publish(self, snapshot, live):
+        values = {name: None if value is None or value != value else round(value, 4)
+                  for name, value in live["values"].items()}
+        event = {"ts": snapshot["ts"], "date": snapshot["date"], "time": snapshot["time"],
+                 "values": values, "quality": live["quality"]}
+        with self.condition:
+            self.seq += 1
+            event["seq"] = self.seq
+            self.events.append((self.seq, event, {}))
+            self.stats["published"] += 1
+            self.condition.notify_all()
+
+    def _frame(self, entry, channels):
+        seq, event, frames = entry
+        frame = frames.get(channels)
+        if frame is None:
+            if channels is not None:
+                event = dict(event, values={name: event["values"][name] for name in channels if name in event["values"]})
+            frame = f"id: {seq}\nevent: snapshot\ndata: {json.dumps(event, sort_keys=True)}\n\n"
+            frames[channels] = frame
+            self.stats["frames_encoded"] += 1
+        return frame
+
+    def _pending(self, sent):
+        """Kept events after seq `sent` (caller holds the condition)"""
+        count = min(self.seq - sent, len(self.events))
+        return [self.events[i] for i in range(len(self.events) - count, len(self.events))]
+
+    def subscribe(self, channels=None, last_id=None):
+        """SSE frames for one client: the latest event (or everything after last_id), then each new one"""
+        with self.condition:
+            self.subscribers += 1
+            # An id from before a restart is newer than anything here; start over.
+            # Before the first event (seq 0) this waits for it like everyone else.
+            sent = max(self.seq - 1, 0) if last_id is None or last_id > self.seq else last_id
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n\n"
+            while True:
+                with self.condition:
+                    self.condition.wait_for(lambda: self.seq > sent, STREAM_HEARTBEAT_SECONDS)
+                    pending = self._pending(sent)
+                if not pending:
+                    yield ": heartbeat\n\n"
+                    continue
+                if pending[0][0] > sent + 1 and sent > 0:
+                    yield f"event: gap\ndata: {json.dumps({'missed': pending[0][0] - sent - 1})}\n\n"
+                for entry in pending:
+                    yield self._frame(entry, channels)
+                sent = pending[-1][0]
+        finally:
+            with self.condition:
+                self.subscribers -= 1
+
+    def status(self):
+        with self.condition:
+            return {"subscribers": self.subscribers, "seq": self.seq, **self.stats}
+
+
+live_stream = LiveStream(STREAM_BACKLOG)
+
+
+# === HIGH-RATE CAPTURE ===
+HIGHRATE_MAX_RATE = 500  # Hz
+HIGHRATE_PRUNE_SECONDS = 60  # blocks past retention are deleted at most this often
+HIGHRATE_DEFAULTS = {
+    "enabled": False,
+    "channels": [3],  # sensor numbers, CH3 = Vibration
+    "rate": 100,  # Hz
+    "bufferSeconds": 120,  # in-memory history per channel
+    "flushSeconds": 1.0,  # how often finished samples are written as one block
+    "retentionHours": 24,  # stored blocks older than this are pruned
+}
+
+highrate_capture = None
+highrate_lock = threading.Lock()
+
+def get_highrate_config():
+    config = dict(HIGHRATE_DEFAULTS)
+    config.update(load_config().get("highRateCapture") or {})
+    return config
+
+
+class SampleRingBuffer:
+    """Preallocated NumPy ring of timestamped sample rows"""
+
+    def __init__(self, capacity, n_channels):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = np.full((capacity, n_channels), np.nan, dtype=np.float32)
+        self.total = 0  # samples ever written; next slot is total % capacity
+        self.lock = threading.Lock()
+
+    def append(self, timestamp, row):
+        with self.lock:
+            i = self.total % self.capacity
+            self.timestamps[i] = timestamp
+            self.values[i] = row
+            self.total += 1
+
+    def read_range(self, start, end):
+        """Copy samples with absolute index in [start, end) that are still in the ring"""
+        with self.lock:
+            start = max(start, self.total - self.capacity, 0)
+            end = min(end, self.total)
+            if end <= start:
+                return start, self.timestamps[:0].copy(), self.values[:0].copy()
+            idx = np.arange(start, end) % self.capacity
+            return start, self.timestamps[idx], self.values[idx]
+
+    def latest(self, n):
+        total = self.total
+        return self.read_range(total - n, total)
+
+
+class HighRateCapture:
+    """Samples selected basic channels at tens to hundreds of Hz into a ring buffer.
+
+    Raw 0-100 values are kept; calibration is applied when they are read. Missed
+    ticks and failed reads are stored as NaN so every block stays uniformly
+    sampled at the nominal rate.
+    """
+
+    def __init__(self, channels, rate, buffer_seconds, flush_seconds, retention_hours):
+        self.channels = sorted(set(int(ch) for ch in channels))
+        self.rate = float(rate)
+        self.flush_seconds = float(flush_seconds)
+        self.retention_hours = float(retention_hours)
+        self.fields = {f"ch{ch}": BASIC_FIELDS[f"ch{ch}"] for ch in self.channels}
+        self.plan = plan_register_reads(self.fields)
+        self.ring = SampleRingBuffer(max(1, int(self.rate * buffer_seconds)), len(self.channels))
+        self.stop_event = threading.Event()
+        self.flushed = 0
+        self.last_prune = 0.0
+        self.stats = {"samples": 0, "read_errors": 0, "missed_ticks": 0, "blocks_written": 0, "overruns": 0}
+        self.threads = []
+
+    def start(self):
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name="highrate-capture", daemon=True),
+            threading.Thread(target=self._flush_loop, name="highrate-flush", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        acq_log.info("[HIGHRATE] Capturing %s at %g Hz", ', '.join(self.fields), self.rate)
+
+    def stop(self):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=MODBUS_TIMEOUT + 1)
+        acq_log.info("[HIGHRATE] Capture stopped")
+
+    def _capture_loop(self):
+        scheduler = MonotonicScheduler(1.0 / self.rate, self.stop_event)
+        conn = modbus_pool.get(MODBUS_IP, MODBUS_PORT, UNIT_ID)
+        missing = np.full(len(self.channels), np.nan, dtype=np.float32)
+        missed_seen = 0
+
+        while running and scheduler.wait():
+            tick_wall = scheduler.next_tick_wall - scheduler.interval
+
+            # Keep the timeline uniform: one NaN row per skipped tick
+            skipped = min(scheduler.missed - missed_seen, self.ring.capacity)
+            missed_seen = scheduler.missed
+            for k in range(skipped, 0, -1):
+                self.ring.append(tick_wall - k * scheduler.interval, missing)
+            self.stats["missed_ticks"] = scheduler.missed
+
+            row = missing
             try:
-                basic_client = ModbusTcpClient(MODBUS_IP, port=MODBUS_PORT)
-                if basic_client.connect():
-                    # Read all 7 channels
-                    responses = []
-                    for i in range(7):
-                        register_address = 50 + (i * 2)  # 50, 52, 54, 56, 58, 60, 62
-                        response = basic_client.read_holding_registers(address=register_address, count=2, slave=UNIT_ID)
-                        responses.append(response)
-                    
-                    # Check if all responses are valid
-                    if all(not resp.isError() for resp in responses):
-                        connection_successful = True
-                        for i, response in enumerate(responses):
-                            try:
-                                decoder = BinaryPayloadDecoder.fromRegisters(response.registers, byteorder=Endian.Big, wordorder=Endian.Big)
-                                value = round(decoder.decode_32bit_float(), 4)
-                                raw_values[i] = value
-                            except Exception as e:
-                                print(f"Error decoding CH{i+1}: {e}")
-                                raw_values[i] = 0.0  # Keep default value on decode error
-                    
-                    basic_client.close()
-                    
-                if connection_successful:
-                    print(f"✓ Basic raw data collected (interval: {current_interval}s): {date} {clock}")
-                    for i, raw_val in enumerate(raw_values):
-                        print(f"  CH{i+1} raw: {raw_val}")
+                with conn.acquire() as client:
+                    registers = execute_read_plan(client, self.plan, self.fields) if client else None
+                if registers and all(regs is not None for regs in registers.values()):
+                    row = np.array([decode_float_registers(registers[name]) for name in self.fields], dtype=np.float32)
                 else:
-                    print(f"⚠ Basic Modbus connection failed, using default values (interval: {current_interval}s): {date} {clock}")
-                    
+                    self.stats["read_errors"] += 1
             except Exception as e:
-                print(f"✗ Error reading basic Modbus data: {e}")
-                print(f"⚠ Using default values (interval: {current_interval}s): {date} {clock}")
-            
-            # Apply calibration to raw values before storing
-            calibrated_values = []
-            for i, raw_value in enumerate(raw_values):
-                calibrated_value = apply_sensor_calibration(raw_value, i + 1)
-                calibrated_values.append(calibrated_value)
-                
-                # Log calibration info
-                calibration = get_sensor_calibration(i + 1)
-                if calibration['enabled']:
-                    print(f"  CH{i+1}: {raw_value} (raw) -> {calibrated_value} {calibration['unit']} (calibrated)")
-            
-            # Store calibrated data in database
-            ch1, ch2, ch3, ch4, ch5, ch6, ch7 = calibrated_values
-            with sqlite3.connect(DATABASE) as conn:
-                c = conn.cursor()
-                c.execute("INSERT INTO data (date, time, ch1, ch2, ch3, ch4, ch5, ch6, ch7) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                        (date, clock, ch1, ch2, ch3, ch4, ch5, ch6, ch7))
-                conn.commit()
-            
-        except Exception as e:
-            print("Global error in read_basic_sensor_data:", e)
-            # Even on global error, log default data to maintain continuity
-            current_interval = get_current_interval()
-            now = datetime.now()
-            date = now.strftime("%Y-%m-%d")
-            clock = now.strftime("%H:%M:%S")
-            
-            # Apply calibration to default values (0.0)
-            calibrated_values = []
-            for i in range(7):
-                calibrated_value = apply_sensor_calibration(0.0, i + 1)
-                calibrated_values.append(calibrated_value)
-            
-            ch1, ch2, ch3, ch4, ch5, ch6, ch7 = calibrated_values
-            try:
-                with sqlite3.connect(DATABASE) as conn:
-                    c = conn.cursor()
-                    c.execute("INSERT INTO data (date, time, ch1, ch2, ch3, ch4, ch5, ch6, ch7) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
-                            (date, clock, ch1, ch2, ch3, ch4, ch5, ch6, ch7))
-                    conn.commit()
-                print(f"✓ Default calibrated data logged due to global error (interval: {current_interval}s): {date} {clock}")
-            except Exception as db_error:
-                print(f"✗ Database error: {db_error}")
-        
-        # Use current interval setting for sleep with interruption check
-        current_interval = get_current_interval()
-        print(f"[BASIC] Sleeping for {current_interval} seconds...")
-        
-        # Sleep in small chunks to allow for quick thread termination
-        sleep_chunks = max(1, current_interval)  # At least 1 second chunks
-        chunk_size = min(1, current_interval)  # 1 second or less per chunk
-        
-        for _ in range(int(current_interval / chunk_size)):
-            if thread_stop_event.is_set() or not running:
-                print("[BASIC] Thread stopping due to stop event")
-                return
-            time.sleep(1)
-    
-    print("[BASIC] Basic sensor data collection thread stopped")
+                self.stats["read_errors"] += 1
+                acq_log.warning("[HIGHRATE] Read error: %s", e)
+            self.ring.append(tick_wall, row)
+            self.stats["samples"] += 1
+
+    def _flush_loop(self):
+        while not self.stop_event.wait(self.flush_seconds):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        """Write samples captured since the last flush as one float32 block per channel"""
+        total = self.ring.total
+        start, timestamps, values = self.ring.read_range(self.flushed, total)
+        if start > self.flushed:
+            self.stats["overruns"] += start - self.flushed
+        if not len(timestamps):
+            return
+
+        rows = [
+            (ch, float(timestamps[0]), self.rate, len(timestamps), values[:, j].astype('<f4').tobytes())
+            for j, ch in enumerate(self.channels)
+        ]
+        if ingest_writer.submit("INSERT INTO hr_blocks (sensor_number, start_ts, fs, n, samples) VALUES (?, ?, ?, ?, ?)", rows):
+            if time.monotonic() - self.last_prune >= HIGHRATE_PRUNE_SECONDS:
+                self.last_prune = time.monotonic()
+                cutoff = time.time() - self.retention_hours * 3600
+                ingest_writer.submit("DELETE FROM hr_blocks WHERE start_ts < ?", [(cutoff,)])
+            self.flushed = start + len(timestamps)
+            self.stats["blocks_written"] += len(rows)
+        else:
+            # Samples stay in the ring and are retried on the next flush
+            acq_log.warning("[HIGHRATE] Flush deferred, ingest queue full")
 
-def decode_float(response):
-    try:
-        decoder = BinaryPayloadDecoder.fromRegisters(
-            response.registers, byteorder=Endian.Big, wordorder=Endian.Big
+    def status(self):
+        return {
+            "channels": self.channels,
+            "rate": self.rate,
+            "buffered": min(self.ring.total, self.ring.capacity),
+            "unflushed": self.ring.total - self.flushed,
+            **self.stats,
+        }
+
+
+def start_highrate_capture():
+    """(Re)start high-rate capture from config; no-op when disabled"""
+    global highrate_capture
+    with highrate_lock:
+        if highrate_capture is not None:
+            highrate_capture.stop()
+            highrate_capture = None
+        config = get_highrate_config()
+        if not (running and config["enabled"] and config["channels"]):
+            return
+        highrate_capture = HighRateCapture(
+            config["channels"], config["rate"], config["bufferSeconds"],
+            config["flushSeconds"], config["retentionHours"],
         )
-        return round(decoder.decode_32bit_float(), 4)
-    except Exception as e:
-        print(" — Error decoding float:", e)
-        return None
+        highrate_capture.start()
+
+def stop_highrate_capture():
+    global highrate_capture
+    with highrate_lock:
+        if highrate_capture is not None:
+            highrate_capture.stop()
+            highrate_capture = None
+
+def calibrate_raw_array(raw, sensor_number):
+    """Map raw 0-100 samples of one channel to the sensor's min-max range"""
+    calibration = calibration_table.current
+    i = sensor_number - 1
+    if not calibration.enabled[i]:
+        return np.zeros(len(raw))
+    raw = np.clip(np.asarray(raw, dtype=np.float64), 0, 100)
+    return calibration.mins[i] + (raw / 100.0) * calibration.spans[i]
+
+def read_highrate_samples(sensor_number, n):
+    """Latest n high-rate samples of one channel as (calibrated values, fs), or None.
+
+    Served from the in-memory ring when it holds enough history, otherwise from
+    the most recent stored blocks recorded at a single rate. NaN gaps are filled
+    by linear interpolation.
+    """
+    values = None
+    fs = None
 
-# === ADVANCED MODBUS LOGIC ===
-def read_advanced_data():
-    global running, thread_stop_event
-    print(f"[ADVANCED] Starting advanced data collection thread")
-    
-    while running and not thread_stop_event.is_set():
-        try:
-            # Get current interval setting
-            current_interval = get_current_interval()
-            
-            now = datetime.now()
-            date = now.strftime("%Y-%m-%d")
-            clock = now.strftime("%H:%M:%S")
-
-            # Initialize default data dictionaries
-            engine_data = {
-                "speed": 0.0,
-                "load": 0.0,
-                "fuelrate": 0.0,
-                "runhour": 0.0,
-                "oilpressure": 0.0
-            }
-            powermeter_data = {
-                "current": 0.0,
-                "voltage": 0.0,
-                "r": 0.0,
-                "q": 0.0,
-                "s": 0.0
-            }
-            
-            engine_connected = False
-            powermeter_connected = False
-            
-            try:
-                # Get settings
-                engine = get_latest_engine_settings()
-                power = get_latest_powermeter_settings()
-                
-                # ENGINE
-                if engine:
-                    try:
-                        print(f"Connecting to ENGINE at {engine['ip']}...")
-                        client = ModbusTcpClient(engine["ip"], port=502)
-                        if client.connect():
-                            print(f"Connected to ENGINE. Reading registers...")
-                            engine_connected = True
-                            
-                            # Read each register and handle errors individually
-                            registers = ["speed", "load", "fuelrate", "runhour", "oilpressure"]
-                            for i, reg_name in enumerate(registers):
-                                try:
-                                    response = client.read_holding_registers(address=engine.get(reg_name) - 40001, count=2, slave=1)
-                                    if not response.isError():
-                                        engine_data[reg_name] = decode_float(response)
-                                        print(f"  {reg_name}: {engine_data[reg_name]}")
-                                    else:
-                                        print(f"  Error reading {reg_name} register {engine.get(reg_name)}")
-                                        engine_data[reg_name] = 0.0
-                                except Exception as e:
-                                    print(f"  Exception reading {reg_name}: {e}")
-                                    engine_data[reg_name] = 0.0
-                        else:
-                            print(f"⚠ Failed to connect to ENGINE {engine['ip']}, using default values")
-                        client.close()
-                    except Exception as e:
-                        print(f"⚠ Engine read error: {e}, using default values")
-                else:
-                    print("⚠ No engine settings available, using default values")
-                
-                # POWERMETER
-                if power:
-                    try:
-                        print(f"Connecting to POWERMETER at {power['ip']}...")
-                        client = ModbusTcpClient(power["ip"], port=502)
-                        if client.connect():
-                            print(f"Connected to POWERMETER. Reading registers...")
-                            powermeter_connected = True
-                            
-                            # Read each register and handle errors individually
-                            registers = ["current", "voltage", "r", "q", "s"]
-                            for i, reg_name in enumerate(registers):
-                                try:
-                                    response = client.read_holding_registers(address=power.get(reg_name) - 40001, count=2, slave=1)
-                                    if not response.isError():
-                                        powermeter_data[reg_name] = decode_float(response)
-                                        print(f"  {reg_name}: {powermeter_data[reg_name]}")
-                                    else:
-                                        print(f"  Error reading {reg_name} register {power.get(reg_name)}")
-                                        powermeter_data[reg_name] = 0.0
-                                except Exception as e:
-                                    print(f"  Exception reading {reg_name}: {e}")
-                                    powermeter_data[reg_name] = 0.0
-                        else:
-                            print(f"⚠ Failed to connect to POWERMETER {power['ip']}, using default values")
-                        client.close()
-                    except Exception as e:
-                        print(f"⚠ Powermeter read error: {e}, using default values")
-                else:
-                    print("⚠ No powermeter settings available, using default values")
+    capture = highrate_capture
+    if capture is not None and sensor_number in capture.channels:
+        _, _, ring_values = capture.ring.latest(n)
+        values = ring_values[:, capture.channels.index(sensor_number)]
+        fs = capture.rate
 
-                # Always save to full_data (either real or default values)
-                try:
-                    with sqlite3.connect(DATABASE) as conn:
-                        c = conn.cursor()
-                        c.execute('''INSERT INTO full_data (
-                            date, time,
-                            e_speed, e_load, e_fuelrate, e_runhour, e_oilpressure,
-                            pm_current, pm_voltage, pm_r, pm_q, pm_s
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', (
-                            date, clock,
-                            engine_data.get("speed"),
-                            engine_data.get("load"),
-                            engine_data.get("fuelrate"),
-                            engine_data.get("runhour"),
-                            engine_data.get("oilpressure"),
-                            powermeter_data.get("current"),
-                            powermeter_data.get("voltage"),
-                            powermeter_data.get("r"),
-                            powermeter_data.get("q"),
-                            powermeter_data.get("s")
-                        ))
-                        conn.commit()
-                    
-                    if engine_connected or powermeter_connected:
-                        print(f"✓ Advanced data saved (interval: {current_interval}s): {date} {clock}")
-                    else:
-                        print(f"⚠ Default advanced data saved (interval: {current_interval}s): {date} {clock}")
-                        
-                except Exception as e:
-                    print(f"✗ Error saving to full_data: {e}")
-                    
-            except Exception as e:
-                print(f"⚠ Critical advanced Modbus read failure: {e}")
-                
-        except Exception as e:
-            print(f"⚠ Global error in read_advanced_data: {e}")
+    if values is None or len(values) < n:
+        with sqlite3.connect(DATABASE) as conn:
+            c = conn.cursor()
+            c.execute("SELECT fs, n, samples FROM hr_blocks WHERE sensor_number = ? ORDER BY start_ts DESC", (sensor_number,))
+            blocks = []
+            count = 0
+            block_fs = None
+            for row_fs, row_n, samples in c:
+                if block_fs is None:
+                    block_fs = row_fs
+                elif row_fs != block_fs:
+                    break
+                blocks.append(np.frombuffer(samples, dtype='<f4'))
+                count += row_n
+                if count >= n:
+                    break
+        if blocks and (values is None or count > len(values)):
+            values = np.concatenate(blocks[::-1])[-n:]
+            fs = block_fs
 
-        # Use current interval setting for sleep with interruption check
-        current_interval = get_current_interval()
-        print(f"[ADVANCED] Sleeping for {current_interval} seconds...")
-        
-        # Sleep in small chunks to allow for quick thread termination
-        sleep_chunks = max(1, current_interval)  # At least 1 second chunks
-        chunk_size = min(1, current_interval)  # 1 second or less per chunk
-        
-        for _ in range(int(current_interval / chunk_size)):
-            if thread_stop_event.is_set() or not running:
-                print("[ADVANCED] Thread stopping due to stop event")
-                return
-            time.sleep(1)
-    
-    print("[ADVANCED] Advanced data collection thread stopped")
+    if values is None or not len(values):
+        return None
+
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    if missing.all():
+        return None
+    if missing.any():
+        idx = np.arange(len(values))
+        values[missing] = np.interp(idx[missing], idx[~missing], values[~missing])
+    return calibrate_raw_array(values, sensor_number), fs
 
 
 # Endpoint untuk memulai pencatatan data (single button)
 @app.route('/start', methods=['POST'])
 def start_logging():
-    global running, basic_thread, advanced_thread, thread_stop_event
+    global running, acquisition_thread, thread_stop_event
     if not running:
         running = True
         set_system_state(True)
@@ -792,68 +3744,58 @@ def start_logging():
         # Clear any existing stop event
         thread_stop_event.clear()
         
-        print(f"[START] Starting data collection with interval: {get_current_interval()} seconds")
-        
-        # Start basic sensor data thread
-        basic_thread = threading.Thread(target=read_basic_sensor_data)
-        basic_thread.daemon = True
-        basic_thread.start()
+        acq_log.info("[START] Starting data collection with interval: %s seconds", get_current_interval())
         
-        # Start advanced data thread
-        advanced_thread = threading.Thread(target=read_advanced_data)
-        advanced_thread.daemon = True
-        advanced_thread.start()
+        # Start the acquisition engine for all devices
+        start_acquisition_thread()
+        start_highrate_capture()
         
     return jsonify({"status": "started", "message": "Data collection started for all sensors"})
 
 # Endpoint untuk menghentikan pencatatan data
 @app.route('/stop', methods=['POST'])
 def stop_logging():
-    global running, basic_thread, advanced_thread, thread_stop_event
+    global running, acquisition_thread, thread_stop_event
     running = False
     set_system_state(False)
     
-    # Signal threads to stop
+    # Signal the acquisition thread to stop
     thread_stop_event.set()
     
-    # Wait for threads to finish gracefully
-    if basic_thread and basic_thread.is_alive():
-        basic_thread.join(timeout=3)
-    if advanced_thread and advanced_thread.is_alive():
-        advanced_thread.join(timeout=3)
+    # Wait for it to finish gracefully
+    if acquisition_thread and acquisition_thread.is_alive():
+        acquisition_thread.join(timeout=3)
+    stop_highrate_capture()
     
-    print("[STOP] Data collection stopped")
+    acq_log.info("[STOP] Data collection stopped")
     return jsonify({"status": "stopped", "message": "Data collection stopped for all sensors"})
 
 # Endpoint untuk mendapatkan data terbaru
 @app.route('/api/data')
 def get_data():
-    conn = sqlite3.connect(DATABASE)
-    c = conn.cursor()
-    c.execute("SELECT id, date, time, ch1, ch2, ch3, ch4, ch5, ch6, ch7 FROM data ORDER BY id DESC LIMIT 10")
-    rows = c.fetchall()
-    conn.close()
+    """Latest samples, newest first (?n=, default 10); from the live ring while acquisition runs"""
+    n = max(1, min(int(request.args.get('n', 10)), LIVE_RING_SIZE))
+    payload = live_rings["data"].latest(n)
+    if payload is not None:
+        return Response(payload, mimetype='application/json')
 
-    data = []
-    for r in rows:
-        # Handle cases where some channels might be None
-        row_data = {
-            "id": r[0], 
-            "date": r[1], 
-            "time": r[2], 
-            "ch1": round(r[3] if r[3] is not None else 0.0, 4), 
-            "ch2": round(r[4] if r[4] is not None else 0.0, 4), 
-            "ch3": round(r[5] if r[5] is not None else 0.0, 4),
-            "ch4": round(r[6] if r[6] is not None else 0.0, 4) if len(r) > 6 else 0.0,
-            "ch5": round(r[7] if r[7] is not None else 0.0, 4) if len(r) > 7 else 0.0,
-            "ch6": round(r[8] if r[8] is not None else 0.0, 4) if len(r) > 8 else 0.0,
-            "ch7": round(r[9] if r[9] is not None else 0.0, 4) if len(r) > 9 else 0.0
-        }
-        data.append(row_data)
+    rows = read_rows("data", ["ts"] + DATA_COLUMNS, newest_first=True, limit=n)
+
+    data = data_rows_to_dicts([row[1:] for row in rows], calibrated_data_values([row[1:] for row in rows]))
+    for item, row in zip(data, rows):
+        item.update(ts=row[0], seq=None)
 
     return jsonify(data)
 
 
+# Berganti setiap clear-log; cursor delta membawanya agar cursor dari sebelum clear dikenali
+data_log_epoch = int(time.time() * 1000)
+
+def newest_data_id():
+    """Highest data id handed out so far: the writer's counter, or the stores before its first write"""
+    last = ingest_writer.last_ids.get("data")
+    return max_stored_id("data") if last is None else last
+
 @app.route('/api/all-data')
 def get_all_data():
     """
@@ -868,40 +3810,111 @@ def get_all_data():
     }
     time_delta_seconds = time_delta_map.get(time_range_str)
 
-    # Bangun Query yang paling kuat
-    # WHERE clause akan dinonaktifkan jika time_delta_seconds adalah None (untuk 'all')
-    query = """
-        WITH NumberedRows AS (
-            SELECT
-                *,
-                ROW_NUMBER() OVER(
-                    PARTITION BY CAST(strftime('%s', date || ' ' || time) / ? AS INT)
-                    ORDER BY id DESC
-                ) as rn
-            FROM data
-            WHERE
-                -- Klausa ini aktif hanya jika time_delta_seconds bukan None
-                ? IS NULL OR datetime(date || ' ' || time) >= datetime('now', '-' || ? || ' seconds', 'localtime')
-        )
-        SELECT * FROM NumberedRows WHERE rn = 1 ORDER BY id DESC;
-    """
-    
-    params = [
-        interval_seconds,
-        time_delta_seconds, 
-        time_delta_seconds  
-    ]
+    # Satu baris (yang terbaru) per bucket interval. Subquery hanya membaca
+    # indeks idx_data_ts (ts + rowid), lalu baris lengkap diambil lewat id.
+    # Untuk 'all' batas bawahnya 0 sehingga seluruh indeks dipindai.
+    since_ms = int((time.time() - time_delta_seconds) * 1000) if time_delta_seconds else 0
+
+    # ?since_id= / ?since_ts= (+ ?epoch=): delta untuk refresh chart, memakai cursor dari respons sebelumnya.
+    # Respons berupa {rows, cursor, bucket_ms, start_ts, reset}; baris dengan "bucket" yang sudah ada di
+    # klien menggantikannya, baris lain ditambahkan, dan baris dengan bucket < start_ts dibuang.
+    # reset: cursor dari sebelum clear-log (epoch lain, atau since_id di atas id terbaru karena
+    # sequence direset); rows berisi seluruh range dan klien membuang data lamanya.
+    bucket_ms = interval_seconds * 1000
+    delta = 'since_id' in request.args or 'since_ts' in request.args
+    since_id = since_ts = None
+    reset = False
+    if delta:
+        try:
+            since_id = int(request.args['since_id']) if request.args.get('since_id') else None
+            since_ts = int(request.args['since_ts']) if request.args.get('since_ts') else None
+        except ValueError:
+            return jsonify({"status": "error", "message": "since_id and since_ts must be integers"}), 400
+        if request.args.get('points'):
+            return jsonify({"status": "error", "message": "since_id/since_ts cannot be combined with points"}), 400
+        epoch = request.args.get('epoch')
+        if (epoch and epoch != str(data_log_epoch)) or (since_id and since_id > newest_data_id()):
+            since_id = since_ts = None
+            reset = True
+
+    # ?points=N: downsampling visual (lttb / minmax) di server, paling banyak N titik per channel.
+    # ?channels=ch1,ch3 membatasi channel yang menentukan baris terpilih.
+    if request.args.get('points'):
+        mode = (request.args.get('downsample') or 'lttb').lower()
+        channels = [name for name in (request.args.get('channels') or '').split(',') if name] or DATA_CHANNELS
+        try:
+            points = int(request.args['points'])
+        except ValueError:
+            points = 0
+        if mode not in DOWNSAMPLE_MODES or not 3 <= points <= DOWNSAMPLE_MAX_POINTS \
+                or any(name not in DATA_CHANNELS for name in channels):
+            return jsonify({"status": "error", "message": f"points must be 3..{DOWNSAMPLE_MAX_POINTS}, "
+                                                          f"downsample one of {', '.join(DOWNSAMPLE_MODES)}, "
+                                                          f"channels from {', '.join(DATA_CHANNELS)}"}), 400
+
+        # Sumber dibaca mentah, atau satu baris per interval bila interval > 1
+        rows = read_rows("data", ["ts"] + DATA_COLUMNS, start_ms=since_ms,
+                         bucket_ms=interval_seconds * 1000 if interval_seconds > 1 else None)
+        ts = np.array([row[0] for row in rows], dtype=np.float64)
+        order = np.argsort(ts, kind="stable")
+        rows = [rows[i][1:] for i in order]
+        values = calibrated_data_values(rows)
+        x = (ts[order] - ts[order[0]]) / 1000 if len(rows) else ts
+        keep = downsample_indices(mode, x, values[:, [DATA_CHANNELS.index(name) for name in channels]], points)[::-1]
+
+        data = data_rows_to_dicts([rows[i] for i in keep], values[keep])
+        api_log.debug("API FINAL: %d dari %d baris (%s, %d titik) untuk range '%s'",
+                      len(data), len(rows), mode, points, time_range_str)
+        return jsonify(data)
 
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
-    c = conn.cursor()
-    c.execute(query, params)
-    rows = c.fetchall()
-    conn.close()
+    # Interval panjang dibaca dari tabel rollup (resolusi terkasar yang masih cukup rapat)
+    agg = (request.args.get('agg') or 'last').lower()
+    rollup = pick_rollup_resolution(interval_seconds)
+    if rollup and agg in ('last', 'mean', 'min', 'max') and migration_done("data.rollups"):
+        resolution, seconds = rollup
+        start_ms = since_ms - seconds * 1000
+        if delta and since_ts is not None:
+            # Grup interval yang memuat cursor dihitung ulang; grup sebelumnya tidak berubah lagi
+            start_ms = max(start_ms, since_ts // (seconds * 1000) * (seconds * 1000) // bucket_ms * bucket_ms)
+        rows = read_rollup_rows("data", resolution, start_ms, interval_seconds, agg)
+        data = []
+        for bucket, last_ts, n, *values in rows:
+            stamp = datetime.fromtimestamp(last_ts / 1000)
+            item = {"id": None, "date": stamp.strftime("%Y-%m-%d"), "time": stamp.strftime("%H:%M:%S"), "n": n}
+            for name, value in zip(DATA_CHANNELS, values):
+                item[name] = None if value is None else round(value, 4)
+            if delta:
+                item["bucket"] = bucket // bucket_ms * bucket_ms
+            data.append(item)
+        api_log.debug("API FINAL: Mengirim %d baris rollup %s untuk range '%s'", len(data), resolution, time_range_str)
+        if delta:
+            # Rollup tidak punya id; since_id dikembalikan apa adanya
+            cursor = {"since_id": since_id, "since_ts": max([row[1] for row in rows], default=since_ts),
+                      "epoch": data_log_epoch}
+            return jsonify({"rows": data, "cursor": cursor, "bucket_ms": bucket_ms, "start_ts": since_ms,
+                            "reset": reset})
+        return jsonify(data)
 
-    data = [dict(row) for row in rows]
-    print(f"API FINAL: Mengirim {len(data)} baris data untuk range '{time_range_str}'")
-    return jsonify(data)
+    # Setiap partisi/arsip yang beririsan dengan range dibaca, yang terbaru lebih dulu.
+    # Di SQLite: id IN (SELECT MAX(id) ... WHERE ts >= ? GROUP BY ts / ?)
+    if not delta:
+        rows = read_rows("data", DATA_COLUMNS, start_ms=since_ms, newest_first=True, bucket_ms=bucket_ms)
+        data = data_rows_to_dicts(rows, calibrated_data_values(rows))
+        api_log.debug("API FINAL: Mengirim %d baris data untuk range '%s'", len(data), time_range_str)
+        return jsonify(data)
+
+    # Delta: hanya baris sesudah cursor (id > since_id, atau ts > since_ts). Bucket yang
+    # mendapat baris baru dikirim ulang dengan baris terbarunya.
+    start_ms = since_ms if since_id is not None or since_ts is None else max(since_ms, since_ts + 1)
+    rows = read_rows("data", ["ts"] + DATA_COLUMNS, start_ms=start_ms, newest_first=True, bucket_ms=bucket_ms,
+                     after_id=since_id or None)
+    data = data_rows_to_dicts([row[1:] for row in rows], calibrated_data_values([row[1:] for row in rows]))
+    for item, row in zip(data, rows):
+        item["bucket"] = row[0] // bucket_ms * bucket_ms
+    cursor = {"since_id": max([row[1] for row in rows], default=since_id),
+              "since_ts": max([row[0] for row in rows], default=since_ts), "epoch": data_log_epoch}
+    api_log.debug("API FINAL: Mengirim %d baris delta untuk range '%s' sejak %s", len(data), time_range_str, cursor)
+    return jsonify({"rows": data, "cursor": cursor, "bucket_ms": bucket_ms, "start_ts": since_ms, "reset": reset})
 
 def generate_csv(data):
     # Ambil label nama sensor dari database dengan unit
@@ -964,9 +3977,8 @@ def download():
             sensor_info[f"ch{sensor_number}"] = header
 
         # Ambil data
-        c.execute("SELECT id, date, time, ch1, ch2, ch3, ch4, ch5, ch6, ch7 FROM data ORDER BY id ASC")
-        rows = c.fetchall()
         conn.close()
+        rows = data_export_rows(read_rows("data", DATA_COLUMNS))
 
         if not rows:
             return jsonify({"status": "error", "message": "No data available to download"}), 404
@@ -977,6 +3989,7 @@ def download():
             key = f"ch{i}"
             label = sensor_info.get(key, key.upper())
             headers.append(label)
+        headers.append('Quality')
 
         # Buat CSV
         output = io.StringIO()
@@ -989,7 +4002,7 @@ def download():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"KSB_ISMS_{timestamp}.csv"
 
-        print(f"✓ Local download started: {filename} ({len(rows)} records)")
+        api_log.info("Local download started: %s (%s records)", filename, len(rows))
 
         return Response(
             output.getvalue(),
@@ -998,14 +4011,14 @@ def download():
         )
 
     except Exception as e:
-        print(f"✗ Error downloading data: {e}")
+        api_log.error("Error downloading data: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
 @app.route('/download/usb')
 def download_usb():
     try:
-        print("🔄 Starting USB download process...")
+        api_log.info("Starting USB download process...")
         
         # Ambil nama sensor dari DB dengan unit
         conn = sqlite3.connect(DATABASE)
@@ -1020,30 +4033,29 @@ def download_usb():
             sensor_info[f"ch{sensor_number}"] = header
 
         # Ambil data
-        c.execute("SELECT id, date, time, ch1, ch2, ch3, ch4, ch5, ch6, ch7 FROM data ORDER BY id ASC")
-        rows = c.fetchall()
         conn.close()
+        rows = data_export_rows(read_rows("data", DATA_COLUMNS))
 
         if not rows:
-            print("✗ No data available for USB download")
+            api_log.warning("No data available for USB download")
             return jsonify({"status": "error", "message": "No data available to download"}), 404
 
-        print(f"📊 Found {len(rows)} records to export")
+        api_log.info("Found %s records to export", len(rows))
 
         # Generate nama file & path
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"KSB_ISMS_{timestamp}.csv"
         local_path = os.path.join(DOWNLOAD_FOLDER, filename)
         
-        print("🔍 Searching for USB drive...")
+        api_log.info("Searching for USB drive...")
         
         # Find USB drive using cross-platform detection
         usb_drive = find_usb_drive()
         if not usb_drive:
-            print("✗ USB drive not found")
+            api_log.error("USB drive not found")
             return jsonify({"status": "error", "message": "USB drive not found. Please insert a USB drive and ensure it's writable."}), 404
 
-        print(f"✓ USB drive found: {usb_drive}")
+        api_log.info("USB drive found: %s", usb_drive)
         usb_path = os.path.join(usb_drive, filename)
 
         # Header CSV
@@ -1052,8 +4064,9 @@ def download_usb():
             key = f"ch{i}"
             label = sensor_info.get(key, key.upper())
             headers.append(label)
+        headers.append('Quality')
 
-        print("💾 Creating CSV file...")
+        api_log.info("Creating CSV file...")
         
         # Simpan CSV lokal
         with open(local_path, mode='w', newline='') as file:
@@ -1061,15 +4074,15 @@ def download_usb():
             writer.writerow(headers)
             writer.writerows(rows)
 
-        print(f"✓ CSV file created: {local_path}")
+        api_log.info("CSV file created: %s", local_path)
 
         # Salin ke USB
-        print("📁 Copying file to USB drive...")
+        api_log.info("Copying file to USB drive...")
         try:
             shutil.copy2(local_path, usb_path)
-            print(f"✓ File successfully copied to USB: {usb_path}")
+            api_log.info("File successfully copied to USB: %s", usb_path)
         except Exception as e:
-            print(f"✗ Error copying to USB: {e}")
+            api_log.error("Error copying to USB: %s", e)
             # Clean up local file on error
             try:
                 os.remove(local_path)
@@ -1078,14 +4091,14 @@ def download_usb():
             return jsonify({"status": "error", "message": f"Error copying to USB: {str(e)}"}), 500
 
         # Hapus file lokal
-        print("🧹 Cleaning up temporary file...")
+        api_log.info("Cleaning up temporary file...")
         try:
             os.remove(local_path)
-            print(f"✓ Temporary file deleted: {local_path}")
+            api_log.info("Temporary file deleted: %s", local_path)
         except Exception as e:
-            print(f"⚠️ Warning: Could not delete temporary file: {e}")
+            api_log.warning("Warning: Could not delete temporary file: %s", e)
 
-        print(f"🎉 USB download completed successfully: {filename}")
+        api_log.info("USB download completed successfully: %s", filename)
         return jsonify({
             "status": "success", 
             "message": f"Data successfully copied to USB as {filename}",
@@ -1095,7 +4108,258 @@ def download_usb():
         })
 
     except Exception as e:
-        print(f"✗ Critical error during USB download: {e}")
+        api_log.error("Critical error during USB download: %s", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+# === ONLINE BACKUP ===
+# Copies data.db (settings included), every partition and archive, and
+# config.json into a dated folder on the USB stick or any directory, while
+# acquisition keeps writing. SQLite files go through the backup API a few
+# pages per step; the copy holds a read transaction on its source, which pins
+# one WAL snapshot, so it is consistent and never restarts because of new rows
+# (the WAL cannot be reset until that file is done). Steps are paced to a byte
+# budget so a slow stick does not starve the writer of I/O. A manifest records
+# the finished files, and an interrupted backup resumes where it stopped.
+BACKUP_DEFAULTS = {
+    "rateKBps": 2048,  # I/O budget of a running backup
+    "stepPages": 64,  # pages copied per backup step
+}
+BACKUP_PREFIX = "ISMS_backup_"
+BACKUP_MANIFEST = "backup.json"
+BACKUP_CHUNK = 256 * 1024  # archives and config.json are plain file copies in chunks of this size
+
+def get_backup_config():
+    config = dict(BACKUP_DEFAULTS)
+    config.update(load_config().get("backup") or {})
+    return config
+
+
+class BackupCancelled(Exception):
+    pass
+
+
+class BackupJob:
+    """One backup run on a background thread; status() reports its progress"""
+
+    def __init__(self, folder, config):
+        self.folder = folder
+        self.rate = max(float(config["rateKBps"]), 1.0) * 1024
+        self.step_pages = max(int(config["stepPages"]), 1)
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.progress = {"state": "pending", "folder": folder, "files_total": 0, "files_done": 0,
+                         "files_skipped": 0, "bytes_total": 0, "bytes_done": 0, "current": None,
+                         "started": None, "finished": None, "error": None}
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="backup", daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def running(self):
+        return bool(self.thread and self.thread.is_alive())
+
+    def status(self):
+        with self.lock:
+            status = dict(self.progress)
+        # Files still being written grow while they are copied
+        status["percent"] = min(round(100.0 * status["bytes_done"] / status["bytes_total"], 1), 100.0) \
+            if status["bytes_total"] else 0.0
+        return status
+
+    def _update(self, **values):
+        with self.lock:
+            self.progress.update(values)
+
+    def _advance(self, n_bytes):
+        """Count copied bytes, then sleep them off against the budget"""
+        with self.lock:
+            self.progress["bytes_done"] += n_bytes
+        if self.cancel_event.is_set():
+            raise BackupCancelled()
+        time.sleep(n_bytes / self.rate)
+
+    def _sources(self):
+        """(source path, path inside the backup folder, kind) of every file to copy"""
+        sources = [(DATABASE, os.path.basename(DATABASE), "sqlite")]
+        for partition in list_partitions():
+            sources.append((partition["path"], os.path.join("partitions", os.path.basename(partition["path"])),
+                            "archive" if partition["archive"] else "sqlite"))
+        if os.path.exists("config.json"):
+            sources.append((os.path.abspath("config.json"), "config.json", "file"))
+        return sources
+
+    @staticmethod
+    def _fingerprint(path, kind):
+        """(bytes to copy, mtime, WAL mtime) of a file. New rows of a SQLite file land in its
+        WAL first, so both times tell whether it changed; its size is the database's page count."""
+        if kind != "sqlite":
+            stat = os.stat(path)
+            return stat.st_size, stat.st_mtime, None
+        conn = sqlite3.connect(path)
+        size = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+        conn.close()
+        wal = path + "-wal"
+        return size, os.stat(path).st_mtime, os.stat(wal).st_mtime if os.path.exists(wal) else None
+
+    def _save_manifest(self, manifest):
+        path = os.path.join(self.folder, BACKUP_MANIFEST)
+        with open(path + ".part", "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".part", path)
+
+    def _run(self):
+        self._update(state="running", started=datetime.now().isoformat(timespec='seconds'))
+        try:
+            os.makedirs(os.path.join(self.folder, "partitions"), exist_ok=True)
+            manifest_path = os.path.join(self.folder, BACKUP_MANIFEST)
+            manifest = {"files": {}}
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+            manifest["complete"] = False
+
+            sources = [(path, name, kind, self._fingerprint(path, kind))
+                       for path, name, kind in self._sources() if os.path.exists(path)]
+            self._update(files_total=len(sources), bytes_total=sum(fingerprint[0] for *_, fingerprint in sources))
+            for path, name, kind, fingerprint in sources:
+                dest = os.path.join(self.folder, name)
+                if manifest["files"].get(name) == list(fingerprint) and os.path.exists(dest):
+                    # Finished before and unchanged since
+                    with self.lock:
+                        self.progress["files_skipped"] += 1
+                        self.progress["bytes_done"] += fingerprint[0]
+                    continue
+                self._update(current=name)
+                try:
+                    if kind == "sqlite":
+                        self._copy_database(path, dest)
+                    else:
+                        self._copy_file(path, dest)
+                except (FileNotFoundError, sqlite3.OperationalError) as e:
+                    # A partition dropped or archived while the backup ran
+                    db_log.info("[BACKUP] Skipping %s: %s", name, e)
+                    continue
+                manifest["files"][name] = list(fingerprint)
+                self._save_manifest(manifest)
+                with self.lock:
+                    self.progress["files_done"] += 1
+
+            manifest["complete"] = True
+            manifest["finished"] = datetime.now().isoformat(timespec='seconds')
+            self._save_manifest(manifest)
+            self._update(state="done", current=None, finished=manifest["finished"])
+            db_log.info("[BACKUP] Completed: %s", self.folder)
+        except BackupCancelled:
+            self._update(state="cancelled", finished=datetime.now().isoformat(timespec='seconds'))
+            db_log.info("[BACKUP] Cancelled, resumable: %s", self.folder)
+        except Exception as e:
+            self._update(state="failed", error=str(e), finished=datetime.now().isoformat(timespec='seconds'))
+            db_log.error("[BACKUP] Failed: %s", e)
+
+    def _copy_database(self, path, dest):
+        """Consistent copy of one SQLite file through the backup API, stepPages pages at a time"""
+        temp_path = dest + ".part"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        source = sqlite3.connect(path, isolation_level=None)
+        target = sqlite3.connect(temp_path)
+        copied = 0
+        try:
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()  # pins the snapshot
+            page_size = source.execute("PRAGMA page_size").fetchone()[0]
+
+            def progress(status, remaining, total):
+                nonlocal copied
+                pages, copied = total - remaining - copied, total - remaining
+                self._advance(pages * page_size)
+
+            source.backup(target, pages=self.step_pages, progress=progress)
+        finally:
+            source.close()
+            target.close()
+        os.replace(temp_path, dest)
+
+    def _copy_file(self, path, dest):
+        temp_path = dest + ".part"
+        with open(path, "rb") as src, open(temp_path, "wb") as dst:
+            while True:
+                chunk = src.read(BACKUP_CHUNK)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                self._advance(len(chunk))
+        os.replace(temp_path, dest)
+
+
+backup_job = None
+
+def resumable_backup(target):
+    """Newest unfinished backup folder in target, or None"""
+    folders = sorted(name for name in os.listdir(target) if name.startswith(BACKUP_PREFIX))
+    for name in reversed(folders):
+        manifest_path = os.path.join(target, name, BACKUP_MANIFEST)
+        try:
+            with open(manifest_path) as f:
+                if not json.load(f).get("complete"):
+                    return os.path.join(target, name)
+        except (OSError, ValueError):
+            continue
+    return None
+
+@app.route('/api/backup', methods=['GET', 'POST'])
+def api_backup():
+    """Backup progress (GET), or start/resume/cancel a backup (POST).
+
+    POST {"target": dir (default: the detected USB drive), "resume": true,
+          "cancel": true, "rateKBps": ..., "stepPages": ...}
+    """
+    global backup_job
+    if request.method == 'GET':
+        return jsonify({"config": get_backup_config(), "status": backup_job.status() if backup_job else None})
+
+    try:
+        data = request.get_json() or {}
+        if data.get("cancel"):
+            if backup_job and backup_job.running:
+                backup_job.cancel()
+            return jsonify({"status": "success", "backup": backup_job.status() if backup_job else None})
+
+        config = get_backup_config()
+        for key in BACKUP_DEFAULTS:
+            if key in data:
+                config[key] = float(data[key]) if key == "rateKBps" else int(data[key])
+                if config[key] <= 0:
+                    return jsonify({"status": "error", "message": f"{key} must be positive"}), 400
+        update_config(backup=config)
+
+        if backup_job and backup_job.running:
+            return jsonify({"status": "error", "message": "A backup is already running",
+                            "backup": backup_job.status()}), 409
+        target = data.get("target") or find_usb_drive()
+        if not target:
+            return jsonify({"status": "error", "message": "USB drive not found. Please insert a USB drive and ensure it's writable."}), 404
+        if not os.path.isdir(target):
+            return jsonify({"status": "error", "message": f"Target directory {target} does not exist"}), 400
+
+        folder = resumable_backup(target) if data.get("resume") else None
+        if folder is None:
+            folder = os.path.join(target, BACKUP_PREFIX + datetime.now().strftime("%Y%m%d_%H%M%S"))
+        backup_job = BackupJob(folder, config)
+        backup_job.start()
+        db_log.info("[BACKUP] Started: %s (%s KB/s)", folder, config['rateKBps'])
+        return jsonify({"status": "success", "backup": backup_job.status()})
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        db_log.error("[BACKUP] Could not start: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 # === SAVE SENSOR SETTINGS ===
@@ -1137,11 +4401,12 @@ def save_sensors():
         
         conn.commit()
         conn.close()
+        calibration_table.reload()
         
-        print("Sensor settings with calibration saved successfully")
+        api_log.info("Sensor settings with calibration saved successfully")
         return jsonify({"status": "success", "message": "Sensor settings saved successfully"})
     except Exception as e:
-        print(f"Error saving sensor settings: {e}")
+        api_log.error("Error saving sensor settings: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
     
 
@@ -1170,7 +4435,7 @@ def load_sensors():
         
         return jsonify(sensor_data)
     except Exception as e:
-        print(f"Error loading sensor settings: {e}")
+        api_log.error("Error loading sensor settings: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 # Add a new endpoint to check the system state
@@ -1178,6 +4443,309 @@ def load_sensors():
 def get_api_system_state():
     return jsonify({"running": get_system_state()})
 
+@app.route('/api/acquisition-status')
+def get_acquisition_status():
+    """Scheduler tick counters and timing of the latest acquisition cycle"""
+    scheduler = acquisition_scheduler
+    snapshot = get_latest_snapshot()
+    return jsonify({
+        "running": running,
+        "scheduler": scheduler.stats() if scheduler else None,
+        "ingest": ingest_writer.status(),
+        "device_maps_generation": device_maps.generation,
+        "open_gaps": gap_tracker.status(),
+        "stream": live_stream.status(),
+        "device_reads": dict(device_reads.stats),
+        "last_cycle": {
+            "timestamp": snapshot["timestamp"],
+            "cycle_ms": snapshot["cycle_ms"],
+            "devices": {name: device["latency_ms"] for name, device in snapshot["devices"].items()},
+        } if snapshot else None,
+    })
+
+@app.route('/api/logs', methods=['GET', 'POST'])
+def api_logs():
+    """Dump recent log records from the in-memory ring (GET) or change the log level (POST)"""
+    if request.method == 'POST':
+        data = request.get_json() or {}
+        level = str(data.get("level", "")).upper()
+        if not isinstance(logging.getLevelName(level), int):
+            return jsonify({"status": "error", "message": f"Unknown log level: {level}"}), 400
+        settings = {**load_config().get("logging", {}), "level": level}
+        update_config(logging=settings)
+        configure_logging()
+        log.info("[LOGGING] Level set to %s", level)
+        return jsonify({"status": "success", "logging": settings})
+
+    try:
+        min_level = logging.getLevelName((request.args.get('level') or 'NOTSET').upper())
+        since = int(request.args.get('since', 0))
+        limit = min(int(request.args.get('limit', 500)), log_ring.records.maxlen)
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid level, since or limit"}), 400
+    if not isinstance(min_level, int):
+        return jsonify({"status": "error", "message": "Unknown log level"}), 400
+    return jsonify({
+        "level": logging.getLevelName(log.level),
+        "last_seq": log_ring.seq,
+        "records": log_ring.dump(min_level, since, limit, request.args.get('logger')),
+    })
+
+@app.route('/api/storage', methods=['GET', 'POST'])
+def api_storage():
+    """Partition layout and retention policy (GET) or update them (POST)"""
+    if request.method == 'GET':
+        partitions = [
+            {"table": p["table"], "key": p["key"], "archive": p["archive"], "bytes": os.path.getsize(p["path"])}
+            for p in list_partitions() if os.path.exists(p["path"])
+        ]
+        return jsonify({"config": get_storage_config(), "partitions": partitions})
+
+    try:
+        data = request.get_json() or {}
+        config = get_storage_config()
+        if "partitionPeriod" in data:
+            if data["partitionPeriod"] not in ("month", "day"):
+                return jsonify({"status": "error", "message": "partitionPeriod must be 'month' or 'day'"}), 400
+            config["partitionPeriod"] = data["partitionPeriod"]
+        if "retentionDays" in data:
+            config["retentionDays"] = float(data["retentionDays"])
+            if config["retentionDays"] < 0:
+                return jsonify({"status": "error", "message": "retentionDays cannot be negative"}), 400
+        if "archive" in data:
+            config["archive"] = bool(data["archive"])
+
+        update_config(storage=config)
+        dropped = ingest_writer.run_in_writer(ingest_writer.expire_partitions)
+        db_log.info("[STORAGE] Settings updated: %s", config)
+        # "compact": true archives finished partitions now instead of at the next hourly check
+        archived = compact_finished_partitions() if data.get("compact") else []
+        return jsonify({"status": "success", "config": config, "dropped": dropped, "archived": archived})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/stream')
+def api_stream():
+    """Server-Sent Events stream of acquisition snapshots.
+
+    ?channels=ch1,e_speed and/or ?devices=basic,engine limit the values sent;
+    Last-Event-ID (or ?lastEventId=) resumes after that event.
+    """
+    channels = {name for name in (request.args.get('channels') or '').split(',') if name}
+    for device in (request.args.get('devices') or '').split(','):
+        if device in WIDE_CHANNEL_DEVICES:
+            channels.update(WIDE_CHANNEL_DEVICES[device])
+        elif device:
+            channels.update(channel["name"] for channel in get_channel_registry() if channel["device"] == device)
+    last_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+    stream = live_stream.subscribe(tuple(sorted(channels)) if channels else None, last_id)
+    return Response(stream, mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/maintenance', methods=['GET', 'POST'])
+def api_maintenance():
+    """Free pages, fragmentation (?detail=1) and maintenance counters (GET); POST {"convert": true}
+    switches the database to incremental auto_vacuum, {"step": true} runs a maintenance step now"""
+    if request.method == 'GET':
+        detail = request.args.get('detail', '0').lower() in ('1', 'true', 'yes')
+        stores = []
+        for path in [DATABASE] + [p["path"] for p in list_partitions() if not p["archive"]]:
+            try:
+                stores.append(database_space(path, detail))
+            except (sqlite3.Error, OSError) as e:
+                db_log.debug("Skipping store %s: %s", path, e)
+        return jsonify({"stats": maintenance_stats, "stores": stores})
+
+    try:
+        data = request.get_json() or {}
+        result = {"status": "success"}
+        if data.get("convert"):
+            # The writer is busy for the whole VACUUM; new rows wait in the queue and spool
+            result["seconds"] = ingest_writer.run_in_writer(convert_to_incremental, timeout=3600)
+        if data.get("step"):
+            ingest_writer.run_in_writer(lambda conn: run_maintenance(conn, ["main"] + list(ingest_writer.attached)))
+        result["stats"] = maintenance_stats
+        return jsonify(result)
+    except Exception as e:
+        db_log.error("[MAINTENANCE] Request failed: %s", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/compression', methods=['GET', 'POST'])
+def api_compression():
+    """Per-channel deadband / swinging-door settings and what they saved (GET) or update them (POST)"""
+    if request.method == 'GET':
+        with compressors_lock:
+            stats = {table: dict(compressor.stats) for table, compressor in compressors.items()}
+        return jsonify({"config": get_compression_config(), "stats": stats})
+
+    try:
+        data = request.get_json() or {}
+        config = get_compression_config()
+        if "maxHoldSeconds" in data:
+            config["maxHoldSeconds"] = float(data["maxHoldSeconds"])
+            if config["maxHoldSeconds"] < 0:
+                return jsonify({"status": "error", "message": "maxHoldSeconds cannot be negative"}), 400
+        if "channels" in data:
+            known = DATA_CHANNELS + FULL_DATA_COLUMNS
+            channels = dict(config["channels"])
+            for name, setting in (data["channels"] or {}).items():
+                if name not in known:
+                    return jsonify({"status": "error", "message": f"Unknown channel {name}"}), 400
+                if not setting or setting.get("mode", "off") == "off":
+                    channels.pop(name, None)
+                    continue
+                if setting.get("mode") not in COMPRESSION_MODES:
+                    return jsonify({"status": "error",
+                                    "message": f"mode must be 'off' or one of {', '.join(COMPRESSION_MODES)}"}), 400
+                tolerance = float(setting.get("tolerance") or 0)
+                if tolerance < 0:
+                    return jsonify({"status": "error", "message": "tolerance cannot be negative"}), 400
+                channels[name] = {"mode": setting["mode"], "tolerance": tolerance,
+                                  "percent": bool(setting.get("percent"))}
+            config["channels"] = channels
+
+        update_config(compression=config)
+        load_compressors()
+        acq_log.info("[COMPRESSION] Settings updated: %s", config)
+        return jsonify({"status": "success", "config": config})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/channels', methods=['GET', 'POST'])
+def api_channels():
+    """Channel registry and registry devices (GET), or add/update one device and its channels (POST).
+
+    POST {"device": {"name", "ip", "port", "unit_id", "enabled"},
+          "channels": [{"name", "address" (4xxxx), "unit", "label", "enabled"}]}
+    """
+    if request.method == 'GET':
+        conn = sqlite3.connect(DATABASE)
+        conn.row_factory = sqlite3.Row
+        devices = [dict(row) for row in conn.execute("SELECT * FROM devices ORDER BY name")]
+        conn.close()
+        return jsonify({"devices": devices, "channels": get_channel_registry()})
+
+    try:
+        data = request.get_json() or {}
+        device = data.get("device") or {}
+        name = str(device.get("name") or "").strip()
+        if not re.match(r"^[A-Za-z][A-Za-z0-9_]*$", name) or name in WIDE_CHANNEL_DEVICES:
+            return jsonify({"status": "error", "message": "device name must be an identifier other than "
+                                                          + ", ".join(WIDE_CHANNEL_DEVICES)}), 400
+        if not device.get("ip"):
+            return jsonify({"status": "error", "message": "IP address is required"}), 400
+        channels = []
+        for channel in data.get("channels") or []:
+            channel_name = str(channel.get("name") or "").strip()
+            address = int(channel.get("address") or 0)
+            if not channel_name or address < 40001:
+                return jsonify({"status": "error", "message": "each channel needs a name and a 4xxxx address"}), 400
+            channels.append((channel_name, name, address, channel.get("unit"), channel.get("label"),
+                             int(bool(channel.get("enabled", True)))))
+
+        conn = sqlite3.connect(DATABASE)
+        taken = [row[0] for row in conn.execute(
+            f"SELECT name FROM channels WHERE device != ? AND name IN ({', '.join('?' * len(channels))})",
+            [name] + [channel[0] for channel in channels])]
+        if taken:
+            conn.close()
+            return jsonify({"status": "error", "message": f"Channel names already used: {', '.join(taken)}"}), 400
+        with conn:
+            conn.execute("""INSERT INTO devices (name, ip, port, unit_id, enabled) VALUES (?, ?, ?, ?, ?)
+                            ON CONFLICT(name) DO UPDATE SET ip = excluded.ip, port = excluded.port,
+                                unit_id = excluded.unit_id, enabled = excluded.enabled""",
+                         (name, device["ip"], int(device.get("port") or 502), int(device.get("unit_id") or 1),
+                          int(bool(device.get("enabled", True)))))
+            conn.executemany("""INSERT INTO channels (name, device, address, unit, label, enabled, storage)
+                                VALUES (?, ?, ?, ?, ?, ?, 'narrow')
+                                ON CONFLICT(name) DO UPDATE SET address = excluded.address, unit = excluded.unit,
+                                    label = excluded.label, enabled = excluded.enabled""", channels)
+        conn.close()
+        device_maps.invalidate()
+        api_log.info("[CHANNELS] Device %s saved with %s channels", name, len(channels))
+        return jsonify({"status": "success", "channels": get_channel_registry()})
+    except (TypeError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/api/channel-data')
+def api_channel_data():
+    """Any registered channels over a time range (?channels=ch1,chiller_temp&range=1h), one array per channel"""
+    time_delta_map = {'1h': 3600, '6h': 21600, '24h': 86400, '7d': 604800, '30d': 2592000}
+    names = [name for name in (request.args.get('channels') or '').split(',') if name]
+    if not names:
+        return jsonify({"error": "channels is required"}), 400
+    seconds = time_delta_map.get(request.args.get('range', '1h'), 3600)
+    try:
+        ts, values = read_channels(names, start_ms=int((time.time() - seconds) * 1000))
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 400
+    return jsonify({"ts": ts.tolist(),
+                    "values": {name: [None if v != v else v for v in column]
+                               for name, column in zip(names, values.T.tolist())}})
+
+@app.route('/api/gaps')
+def api_gaps():
+    """Device outages overlapping a time range (?range=24h, default all; ?device=basic|engine|powermeter)"""
+    time_delta_map = {'1h': 3600, '6h': 21600, '24h': 86400, '7d': 604800, '30d': 2592000}
+    seconds = time_delta_map.get(request.args.get('range'))
+    since_ms = int((time.time() - seconds) * 1000) if seconds else 0
+    device = request.args.get('device')
+    query = "SELECT device, start_ts, end_ts, cycles, quality FROM gaps WHERE end_ts >= ?"
+    params = [since_ms]
+    if device:
+        query += " AND device = ?"
+        params.append(device)
+    with sqlite3.connect(DATABASE) as conn:
+        rows = conn.execute(query + " ORDER BY start_ts DESC", params).fetchall()
+    open_gaps = gap_tracker.status()
+    gaps = []
+    for name, start_ts, end_ts, cycles, quality in rows:
+        gap = open_gaps.get(name)
+        is_open = bool(gap and gap["start_ts"] == start_ts)
+        if is_open:
+            end_ts, cycles, quality = gap["end_ts"], gap["cycles"], gap["quality"]
+        gaps.append({"device": name, "start_ts": start_ts, "end_ts": end_ts, "cycles": cycles,
+                     "quality": quality, "reason": quality_label(quality), "open": is_open})
+    return jsonify(gaps)
+
+@app.route('/api/highrate', methods=['GET', 'POST'])
+def api_highrate():
+    """Get or update the high-rate capture settings"""
+    if request.method == 'GET':
+        capture = highrate_capture
+        return jsonify({"config": get_highrate_config(), "status": capture.status() if capture else None})
+
+    try:
+        data = request.get_json() or {}
+        config = get_highrate_config()
+        if "enabled" in data:
+            config["enabled"] = bool(data["enabled"])
+        if "channels" in data:
+            channels = sorted(set(int(ch) for ch in data["channels"]))
+            if not all(1 <= ch <= 7 for ch in channels):
+                return jsonify({"status": "error", "message": "Channels must be between 1 and 7"}), 400
+            config["channels"] = channels
+        for key in ("rate", "bufferSeconds", "flushSeconds", "retentionHours"):
+            if key in data:
+                config[key] = float(data[key])
+        if not 1 <= config["rate"] <= HIGHRATE_MAX_RATE:
+            return jsonify({"status": "error", "message": f"Rate must be between 1-{HIGHRATE_MAX_RATE} Hz"}), 400
+        if config["bufferSeconds"] <= 0 or config["flushSeconds"] <= 0:
+            return jsonify({"status": "error", "message": "bufferSeconds and flushSeconds must be positive"}), 400
+
+        update_config(highRateCapture=config)
+        start_highrate_capture()
+        api_log.info("[HIGHRATE] Settings updated: %s", config)
+        return jsonify({"status": "success", "config": config})
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/api/sensor-calibration/<int:sensor_number>')
 def get_sensor_calibration_api(sensor_number):
     """API endpoint to get sensor calibration info"""
@@ -1191,14 +4759,141 @@ def get_sensor_calibration_api(sensor_number):
 def get_all_sensor_calibrations():
     """API endpoint to get all sensor calibration info"""
     try:
+        calibration = calibration_table.current
         calibrations = {}
-        for i in range(1, 8):
-            calibrations[f'ch{i}'] = get_sensor_calibration(i)
+        for i in range(1, SENSOR_COUNT + 1):
+            calibrations[f'ch{i}'] = dict(calibration.calibrations[i - 1])
         return jsonify(calibrations)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+# === RECALIBRATION ===
+RECALIBRATION_BATCH = 5000
+
+recalibration_lock = threading.Lock()
+recalibration_status = {"state": "idle"}
+
+def recalibrate_archive(path, start_ms, end_ms, version):
+    """Point archived rows with ts in [start_ms, end_ms] at another calibration version.
+
+    Archives keep raw values and the version, not calibrated values, so only
+    the cal_version column changes, on every row recorded with a version; the
+    file is rewritten and swapped in. Returns (rows in range, rows with raw
+    values updated).
+    """
+    total = updated = 0
+    with ArchiveReader(path) as archive:
+        if not archive.block_numbers(start_ms, end_ms + 1):
+            return 0, 0
+        writer = ArchiveWriter(path + ".tmp", "data")
+        for number in range(len(archive.blocks)):
+            block = archive.read_block(number)
+            in_range = (block["ts"] >= start_ms) & (block["ts"] <= end_ms)
+            has_raw = has_raw_values(np.column_stack([block[name] for name in DATA_RAW_CHANNELS]), block["cal_version"])
+            block["cal_version"] = np.where(in_range & ~np.isnan(block["cal_version"]), version, block["cal_version"])
+            total += int(in_range.sum())
+            updated += int((in_range & has_raw).sum())
+            writer.add_block(block)
+        writer.close()
+    os.replace(path + ".tmp", path)
+    return total, updated
+
+def run_recalibration(start, end, version):
+    """Rewrite stored ch1..ch7 of rows in [start, end] from their raw values.
+
+    Works through id windows of RECALIBRATION_BATCH rows, one transaction each,
+    so acquisition writes are never blocked for long. Rows recorded before raw
+    values were kept cannot be recalibrated and are counted as skipped; rows
+    recorded with a version but without raw values (every channel held or
+    unread) are skipped too, yet still get the new version, since their
+    reconstructed values are calibrated with it. Archived rows get the new
+    version through recalibrate_archive.
+    """
+    status = recalibration_status
+    try:
+        snapshot = calibration_table.get_version(version)
+        range_filter = "ts BETWEEN ? AND ?"
+        start_ms, end_ms = to_epoch_ms(start), to_epoch_ms(end)
+        raw_columns = ", ".join(DATA_RAW_CHANNELS)
+        assignments = ", ".join(f"{name} = ?" for name in DATA_CHANNELS)
+        status.update({"total": 0, "updated": 0, "skipped": 0})
+
+        for path in data_stores("data", start_ms, end_ms + 1):
+            conn = sqlite3.connect(path)
+            c = conn.cursor()
+            c.execute(f"SELECT MIN(id), MAX(id), COUNT(*) FROM data WHERE {range_filter}", (start_ms, end_ms))
+            first_id, last_id, total = c.fetchone()
+            status["total"] += total
+            for lo in range(first_id or 0, (last_id or -1) + 1, RECALIBRATION_BATCH):
+                hi = lo + RECALIBRATION_BATCH - 1
+                c.execute(f"SELECT id, cal_version, {raw_columns} FROM data "
+                          f"WHERE id BETWEEN ? AND ? AND {range_filter}", (lo, hi, start_ms, end_ms))
+                rows = c.fetchall()
+                with_raw = [row for row in rows if any(v is not None for v in row[2:])]
+                # Rows whose channels were all held or unread carry no raw values, but
+                # reconstructed values are calibrated with the row's own version
+                versioned = [(version, row[0]) for row in rows
+                             if row[1] is not None and all(v is None for v in row[2:])]
+                if with_raw:
+                    ids = [row[0] for row in with_raw]
+                    raw = np.array([row[2:] for row in with_raw], dtype=np.float64)
+                    values = snapshot.apply(raw).tolist()
+                    c.executemany(f"UPDATE data SET {assignments}, cal_version = ? WHERE id = ?",
+                                  [(*row_values, version, row_id) for row_values, row_id in zip(values, ids)])
+                if versioned:
+                    c.executemany("UPDATE data SET cal_version = ? WHERE id = ?", versioned)
+                conn.commit()
+                status["updated"] += len(with_raw)
+                status["skipped"] += len(rows) - len(with_raw)
+                time.sleep(0.01)  # let the acquisition writer in between batches
+            conn.close()
+        for path in [path for kind, path in list_stores("data", start_ms, end_ms + 1) if kind == "archive"]:
+            with archive_lock:
+                total, updated = recalibrate_archive(path, start_ms, end_ms, version)
+            status["total"] += total
+            status["updated"] += updated
+            status["skipped"] += total - updated
+        if status["total"]:
+            rebuild_rollups("data", start_ms, end_ms + 1)
+        status["state"] = "done"
+        db_log.info("[RECALIBRATION] Version %s: %s rows updated, %s skipped",
+                    version, status['updated'], status['skipped'])
+    except Exception as e:
+        status.update({"state": "error", "error": str(e)})
+        db_log.error("[RECALIBRATION ERROR] %s", e)
+    finally:
+        status["finished_at"] = datetime.now().isoformat(timespec='seconds')
+
+
+@app.route('/api/recalibrate', methods=['GET', 'POST'])
+def recalibrate():
+    """Start a recalibration job for a time range (POST) or report its progress (GET)"""
+    global recalibration_status
+    if request.method == 'GET':
+        return jsonify(recalibration_status)
+
+    payload = request.get_json(silent=True) or request.form
+    start = payload.get('start')
+    end = payload.get('end')
+    if not start or not end:
+        return jsonify({"status": "error", "message": "start and end are required (YYYY-MM-DD HH:MM:SS)"}), 400
+    try:
+        to_epoch_ms(start), to_epoch_ms(end)
+        version = int(payload.get('version') or calibration_table.current.version)
+        calibration_table.get_version(version)
+    except (KeyError, ValueError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    with recalibration_lock:
+        if recalibration_status.get("state") == "running":
+            return jsonify({"status": "error", "message": "A recalibration is already running"}), 409
+        recalibration_status = {"state": "running", "start": start, "end": end, "version": version,
+                                "started_at": datetime.now().isoformat(timespec='seconds')}
+        threading.Thread(target=run_recalibration, args=(start, end, version), daemon=True).start()
+    return jsonify({"status": "success", "job": recalibration_status})
+
+
 #Data Engine
 @app.route('/save-engine', methods=['POST'])
 def save_engine():
@@ -1212,7 +4907,8 @@ def save_engine():
         e_ip = request.form.get("e_ip", "")
         
         # Print debug info
-        print(f"Saving engine settings: IP={e_ip}, Speed={e_speed}, Load={e_load}, Fuel={e_fuelrate}, RunHour={e_runhour}, Oil={e_oilpressure}")
+        api_log.info("Saving engine settings: IP=%s, Speed=%s, Load=%s, Fuel=%s, RunHour=%s, Oil=%s",
+                     e_ip, e_speed, e_load, e_fuelrate, e_runhour, e_oilpressure)
         
         # Validate data
         if not e_ip:
@@ -1237,11 +4933,12 @@ def save_engine():
                      (e_speed, e_load, e_fuelrate, e_runhour, e_oilpressure, e_ip))
         conn.commit()
         conn.close()
+        device_maps.invalidate()
         
-        print("Engine settings saved successfully")
+        api_log.info("Engine settings saved successfully")
         return jsonify({"status": "success", "message": "Engine settings saved successfully"})
     except Exception as e:
-        print(f"Error saving engine settings: {e}")
+        api_log.error("Error saving engine settings: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/load-engine')
@@ -1279,7 +4976,8 @@ def save_powermeter():
         pm_ip = request.form.get("pm_ip", "")
         
         # Print debug info
-        print(f"Saving powermeter settings: IP={pm_ip}, Current={pm_current}, Voltage={pm_voltage}, R={pm_r}, Q={pm_q}, S={pm_s}")
+        api_log.info("Saving powermeter settings: IP=%s, Current=%s, Voltage=%s, R=%s, Q=%s, S=%s",
+                     pm_ip, pm_current, pm_voltage, pm_r, pm_q, pm_s)
         
         # Validate data
         if not pm_ip:
@@ -1304,11 +5002,12 @@ def save_powermeter():
                      (pm_current, pm_voltage, pm_r, pm_q, pm_s, pm_ip))
         conn.commit()
         conn.close()
+        device_maps.invalidate()
         
-        print("Powermeter settings saved successfully")
+        api_log.info("Powermeter settings saved successfully")
         return jsonify({"status": "success", "message": "Powermeter settings saved successfully"})
     except Exception as e:
-        print(f"Error saving powermeter settings: {e}")
+        api_log.error("Error saving powermeter settings: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/load-powermeter')
@@ -1334,173 +5033,163 @@ def load_powermeter():
         return jsonify({"status": "error", "message": str(e)}), 500
 
 # === READ MODBUS DATA ===
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one call.
+
+    The first caller runs the function; callers arriving while it is in
+    flight wait for it and get the same result (or exception). Nothing is
+    cached afterwards, the next call after completion reads again.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}  # key -> {"done": Event, "result", "error"}
+        self.stats = {"calls": 0, "shared": 0}
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = {"done": threading.Event(), "result": None, "error": None}
+                self.stats["calls"] += 1
+            else:
+                self.stats["shared"] += 1
+        if leader:
+            try:
+                call["result"] = fn()
+            except Exception as e:
+                call["error"] = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call["done"].set()
+        else:
+            call["done"].wait()
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+
+
+device_reads = SingleFlight()
+
 def read_device_data(ip, registers, unit=1):
     try:
-        client = ModbusTcpClient(ip, port=502)
-        if not client.connect():
-            print(f"⚠ Failed to connect to {ip}, returning default values")
+        fields = {i: reg - 40001 for i, reg in enumerate(registers)}
+        connected, values = read_float_fields(ip, fields, unit=unit)
+        if not connected:
+            modbus_log.warning("Failed to connect to %s, returning default values", ip)
             return [0.0] * len(registers)  # Return default values instead of None
 
         result = []
-        for reg in registers:
-            try:
-                resp = client.read_holding_registers(address=reg - 40001, count=2, slave=unit)
-                if resp.isError():
-                    print(f"⚠ Error reading register {reg}, using default value")
-                    result.append(0.0)
-                else:
-                    try:
-                        decoder = BinaryPayloadDecoder.fromRegisters(
-                            resp.registers, byteorder=Endian.Big, wordorder=Endian.Big
-                        )
-                        value = decoder.decode_32bit_float()
-                        result.append(round(value, 4))
-                    except Exception as err:
-                        print(f"⚠ Decode error at reg {reg}: {err}, using default value")
-                        result.append(0.0)
-            except Exception as e:
-                print(f"⚠ Exception reading register {reg}: {e}, using default value")
+        for i, reg in enumerate(registers):
+            if values[i] is None:
+                modbus_log.warning("Error reading register %s from %s, using default value", reg, ip)
                 result.append(0.0)
-
-        client.close()
+            else:
+                result.append(values[i])
         return result
     except Exception as e:
-        print(f"⚠ Modbus read error from {ip}: {e}, returning default values")
+        modbus_log.warning("Modbus read error from %s: %s, returning default values", ip, e)
         return [0.0] * len(registers)  # Return default values instead of None
 
-@app.route('/api/powermeter-data')
-def api_powermeter_data():
-    try:
-        with sqlite3.connect(DATABASE) as conn:
-            c = conn.cursor()
-            c.execute("SELECT pm_current, pm_voltage, pm_r, pm_q, pm_s, pm_ip FROM powermeter_settings ORDER BY id DESC LIMIT 1")
-            row = c.fetchone()
+@app.route('/api/modbus-stats')
+def api_modbus_stats():
+    """Per-connection statistics of the shared Modbus connection pool"""
+    return jsonify(modbus_pool.stats())
 
-        if not row:
-            print("[PM] No powermeter settings found, returning default values")
-            # Return default structure when no settings
-            return jsonify([
-                {"id": 1, "register": 0, "value": 0.0},
-                {"id": 2, "register": 0, "value": 0.0},
-                {"id": 3, "register": 0, "value": 0.0},
-                {"id": 4, "register": 0, "value": 0.0},
-                {"id": 5, "register": 0, "value": 0.0}
-            ])
-
-        registers = [int(row[0]), int(row[1]), int(row[2]), int(row[3]), int(row[4])]
-        ip = row[5]
-        
-        # Always return a data structure, even if connection fails
-        data = []
-        values = read_device_data(ip, registers)
-        
-        print(f"\n✓ Powermeter data request from {ip} port 502:")
-        for i, reg in enumerate(registers):
-            val = values[i] if values and i < len(values) and values[i] is not None else 0.0
-            data.append({"id": i+1, "register": reg, "value": val})
-            print(f"  {reg} : {val}")
+DEVICE_DATA_DEFAULT = [{"id": i + 1, "register": 0, "value": 0.0} for i in range(5)]
 
-        return jsonify(data)
+def device_data(name):
+    """Engine or powermeter values as [{id, register, value, age, source}].
+
+    Answers from the collector's latest snapshot while acquisition runs, so
+    dashboards never add Modbus traffic; age is the snapshot's age in
+    seconds. With ?fresh=1, or when the collector has nothing for the device,
+    the device is read directly through device_reads, so concurrent callers
+    share one read.
+    """
+    device = device_maps.get().get(name)
+    if not device:
+        api_log.debug("No %s settings found, returning default values", name)
+        return DEVICE_DATA_DEFAULT
+
+    registers = [offset + 40001 for offset in device["fields"].values()]
+    fresh = request.args.get('fresh', '0').lower() in ('1', 'true', 'yes')
+    snapshot = get_latest_snapshot() if running and not fresh else None
+    entry = snapshot["devices"].get(name) if snapshot else None
+    if entry is not None and entry["ip"] == device["ip"]:
+        values = [entry["values"].get(field) for field in device["fields"]]
+        read_at, source = snapshot["ts"] / 1000, "snapshot"
+    else:
+        key = (device["ip"], tuple(registers))
+        values, read_at = device_reads.do(key, lambda: (read_device_data(device["ip"], registers), time.time()))
+        source = "device"
 
+    age = round(max(0.0, time.time() - read_at), 3)
+    data = [{"id": i + 1, "register": reg, "value": values[i] if values[i] is not None else 0.0,
+             "age": age, "source": source} for i, reg in enumerate(registers)]
+    api_log.debug("%s data from %s (%s, %.1fs old): %s", name.capitalize(), device["ip"], source, age, data)
+    return data
+
+@app.route('/api/powermeter-data')
+def api_powermeter_data():
+    try:
+        return jsonify(device_data("powermeter"))
     except Exception as e:
-        print(f"[PM ERROR] {e}")
+        api_log.error("Powermeter data request failed: %s", e)
         # Return default structure on error
-        return jsonify([
-            {"id": 1, "register": 0, "value": 0.0},
-            {"id": 2, "register": 0, "value": 0.0},
-            {"id": 3, "register": 0, "value": 0.0},
-            {"id": 4, "register": 0, "value": 0.0},
-            {"id": 5, "register": 0, "value": 0.0}
-        ])
+        return jsonify(DEVICE_DATA_DEFAULT)
 
 @app.route('/api/engine-data')
 def api_engine_data():
     try:
-        with sqlite3.connect(DATABASE) as conn:
-            c = conn.cursor()
-            c.execute("SELECT e_speed, e_load, e_fuelrate, e_runhour, e_oilpressure, e_ip FROM engine_settings ORDER BY id DESC LIMIT 1")
-            row = c.fetchone()
-
-        if not row:
-            print("[ENGINE] No engine settings found, returning default values")
-            # Return default structure when no settings
-            return jsonify([
-                {"id": 1, "register": 0, "value": 0.0},
-                {"id": 2, "register": 0, "value": 0.0},
-                {"id": 3, "register": 0, "value": 0.0},
-                {"id": 4, "register": 0, "value": 0.0},
-                {"id": 5, "register": 0, "value": 0.0}
-            ])
-
-        registers = [int(row[0]), int(row[1]), int(row[2]), int(row[3]), int(row[4])]
-        ip = row[5]
-        
-        print(f"Reading engine data from {ip} with registers {registers}")
-        
-        # Always return a data structure, even if connection fails
-        data = []
-        values = read_device_data(ip, registers)
-
-        print(f"\n✓ Engine data request from {ip} port 502:")
-        for i, reg in enumerate(registers):
-            val = values[i] if values and i < len(values) and values[i] is not None else 0.0
-            data.append({"id": i+1, "register": reg, "value": val}) 
-            print(f"  {reg} : {val}")
-
-        return jsonify(data)
-
+        return jsonify(device_data("engine"))
     except Exception as e:
-        print(f"[ENGINE ERROR] {e}")
+        api_log.error("Engine data request failed: %s", e)
         # Return default structure on error
-        return jsonify([
-            {"id": 1, "register": 0, "value": 0.0},
-            {"id": 2, "register": 0, "value": 0.0},
-            {"id": 3, "register": 0, "value": 0.0},
-            {"id": 4, "register": 0, "value": 0.0},
-            {"id": 5, "register": 0, "value": 0.0}
-        ])
+        return jsonify(DEVICE_DATA_DEFAULT)
 
 @app.route('/clear-log', methods=['POST'])
 def clear_log():
     try:
-        conn = sqlite3.connect(DATABASE)
-        c = conn.cursor()
-        
-        # Delete all data from the table
-        c.execute("DELETE FROM data")
-        
-        # Reset the auto-increment counter
-        c.execute("DELETE FROM sqlite_sequence WHERE name='data'")
-        
-        # Commit changes before VACUUM
-        conn.commit()
-        
-        # Rebuild the database file to reclaim space and fully reset
-        c.execute("VACUUM")
-        
-        conn.commit()
-        conn.close()
-        
-        return jsonify({"status": "success", "message": "Log data cleared, ID reset, and database optimized."})
+        def clear(conn):
+            global data_log_epoch
+            # Whole partition files go; no VACUUM, so ingest is never paused
+            ingest_writer.drop_partitions(conn, list_partitions("data"))
+            with conn:
+                # Rows from before partitioning live in the main database
+                conn.execute("DELETE FROM main.data")
+                for resolution, _ in ROLLUP_RESOLUTIONS:
+                    conn.execute(f"DELETE FROM main.{rollup_table('data', resolution)}")
+                conn.execute("DELETE FROM main.gaps WHERE device = 'basic'")
+                # Reset the auto-increment counter
+                conn.execute("DELETE FROM main.sqlite_sequence WHERE name='data'")
+            ingest_writer.last_ids.pop("data", None)
+            live_rings["data"].clear()
+            # Delta cursors of other tabs now point past the reset ids
+            data_log_epoch = int(time.time() * 1000)
+
+        ingest_writer.run_in_writer(clear)
+        return jsonify({"status": "success", "message": "Log data cleared and ID reset."})
     except Exception as e:
-        print(f"Error clearing log: {e}")
+        api_log.error("Error clearing log: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route("/api/latest-full-data")
 def latest_full_data():
-    with sqlite3.connect(DATABASE) as conn:
-        c = conn.cursor()
-        c.execute('''SELECT * FROM full_data ORDER BY id DESC LIMIT 1''')
-        row = c.fetchone()
+    payload = live_rings["full_data"].latest()
+    if payload is not None:
+        return Response(payload, mimetype='application/json')
+
+    keys = ["id", "ts", "date", "time"] + FULL_DATA_COLUMNS + ["quality"]
+    rows = read_rows("full_data", keys, newest_first=True, limit=1)
+    row = rows[0] if rows else None
 
     if not row:
         return jsonify({"error": "No data yet"}), 404
 
-    keys = ["id", "date", "time",
-            "e_speed", "e_load", "e_fuelrate", "e_runhour", "e_oilpressure",
-            "pm_current", "pm_voltage", "pm_r", "pm_q", "pm_s"]
-
-    return jsonify([dict(zip(keys, row))])
+    return jsonify([dict(zip(keys, row), seq=None)])
 
 # NEW DATA VISUALIZATION ROUTES
 @app.route('/dataviz')
@@ -1511,7 +5200,7 @@ def dataviz():
 @app.route('/upload-csv', methods=['POST'])
 def upload_csv():
     try:
-        print(f"[UPLOAD] Received upload request")
+        api_log.info("[UPLOAD] Received upload request")
         
         if 'csvFile' not in request.files:
             return jsonify({"status": "error", "message": "No file uploaded"}), 400
@@ -1557,7 +5246,7 @@ def upload_csv():
         if not sensor_columns:
             return jsonify({"status": "error", "message": "CSV must contain at least one sensor column (CH1–CH7)"}), 400
         
-        print(f"[UPLOAD] Found sensor columns: {sensor_columns}")
+        api_log.info("[UPLOAD] Found sensor columns: %s", sensor_columns)
         
         # Proses baris-baris CSV
         data = []
@@ -1579,7 +5268,7 @@ def upload_csv():
                 }
                 data.append(data_row)
             except Exception as e:
-                print(f"[UPLOAD] Error processing row {index}: {e}")
+                api_log.error("[UPLOAD] Error processing row %s: %s", index, e)
                 continue
         
         # Cleanup
@@ -1596,7 +5285,7 @@ def upload_csv():
         })
     
     except Exception as e:
-        print(f"[UPLOAD] Critical error in upload_csv: {e}")
+        api_log.error("[UPLOAD] Critical error in upload_csv: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
@@ -1623,7 +5312,7 @@ def get_user_by_username(username: str):
         conn.close()
         return row
     except Exception as e:
-        print(f"[AUTH] get_user_by_username error: {e}")
+        api_log.error("[AUTH] get_user_by_username error: %s", e)
         return None
 
 @app.context_processor
@@ -1670,7 +5359,7 @@ def login():
 
         return render_template('login.html', next=request.args.get('next'))
     except Exception as e:
-        print(f"[AUTH] login error: {e}")
+        api_log.error("[AUTH] login error: %s", e)
         return render_template('login.html', error="Unexpected error, please try again")
 
 @app.route('/logout')
@@ -1682,7 +5371,7 @@ def logout():
 @app.route('/settings')
 def settings():
     try:
-        print("[SETTINGS] Loading settings page...")
+        api_log.debug("[SETTINGS] Loading settings page...")
         
         # Load current settings from database
         conn = sqlite3.connect(DATABASE)
@@ -1741,9 +5430,9 @@ def settings():
                 "pm_ip": powermeter_row[5]
             }
         
-        print(f"[SETTINGS] Loaded {len(sensors)} sensor settings")
-        print(f"[SETTINGS] Engine settings: {'Found' if engine else 'Not found'}")
-        print(f"[SETTINGS] Powermeter settings: {'Found' if powermeter else 'Not found'}")
+        api_log.debug("[SETTINGS] Loaded %s sensor settings", len(sensors))
+        api_log.debug("[SETTINGS] Engine settings: %s", 'Found' if engine else 'Not found')
+        api_log.debug("[SETTINGS] Powermeter settings: %s", 'Found' if powermeter else 'Not found')
         
         return render_template('settings.html', 
                              sensors=sensors,
@@ -1751,9 +5440,7 @@ def settings():
                              powermeter=powermeter)
                              
     except Exception as e:
-        print(f"[SETTINGS ERROR] Error loading settings page: {e}")
-        import traceback
-        traceback.print_exc()
+        api_log.exception("[SETTINGS ERROR] Error loading settings page: %s", e)
         
         # Return template with empty settings on error
         return render_template('settings.html', 
@@ -1800,23 +5487,28 @@ def users_new():
 running = get_system_state()
 
 if __name__ == '__main__':
-    print(f"[STARTUP] System state: {'RUNNING' if running else 'STOPPED'}")
-    print(f"[STARTUP] Current interval: {secTimeInterval} seconds")
-    print(f"[STARTUP] Database: {DATABASE}")
-    print(f"[STARTUP] Download folder: {DOWNLOAD_FOLDER}")
-    print(f"[STARTUP] Upload folder: {UPLOAD_FOLDER}")
-    print(f"[STARTUP] USB paths: {USB_PATHS}")
+    # `python app.py rebuild-rollups` recreates every rollup table from raw data and exits
+    if sys.argv[1:2] == ['rebuild-rollups']:
+        for source in ROLLUP_SOURCES:
+            rebuild_rollups(source)
+        sys.exit(0)
+
+    log.info("[STARTUP] System state: %s", 'RUNNING' if running else 'STOPPED')
+    log.info("[STARTUP] Current interval: %s seconds", secTimeInterval)
+    log.info("[STARTUP] Database: %s", DATABASE)
+    log.info("[STARTUP] Download folder: %s", DOWNLOAD_FOLDER)
+    log.info("[STARTUP] Upload folder: %s", UPLOAD_FOLDER)
+    log.info("[STARTUP] USB paths: %s", USB_PATHS)
     
+    start_timestamp_migration()
+    start_archiver()
+    ingest_writer.start()  # replays samples spooled by the last run, if any
+
     # Start data collection threads if system was running
     if running:
-        print("[STARTUP] Starting data collection threads...")
-        basic_thread = threading.Thread(target=read_basic_sensor_data)
-        basic_thread.daemon = True
-        basic_thread.start()
-        
-        advanced_thread = threading.Thread(target=read_advanced_data)
-        advanced_thread.daemon = True
-        advanced_thread.start()
+        log.info("[STARTUP] Starting data collection threads...")
+        start_acquisition_thread()
+        start_highrate_capture()
     
     @app.route('/api/fft')
     def api_fft():
@@ -1858,17 +5550,57 @@ if __name__ == '__main__':
             if not valid:
                 return jsonify({"error": "Invalid source or channel"}), 400
 
-            # pull last N samples from appropriate table/column
-            with sqlite3.connect(DATABASE) as conn:
-                c = conn.cursor()
-                c.execute(f"SELECT {column} FROM {table} ORDER BY id DESC LIMIT ?", (n,))
-                rows = c.fetchall()
+            # Sensor channels captured at high rate are analysed at their true sample rate
+            # unless mode=logged asks for the regular logged rows
+            mode = 'logged'
+            highrate = None
+            if source == 'sensors' and (request.args.get('mode') or '').lower() != 'logged':
+                highrate = read_highrate_samples(int(channel[2:]), n)
+
+            bad_samples = 0
+            if highrate is not None:
+                mode = 'highrate'
+                y, fs = highrate
+                dt = 1.0 / fs
+            else:
+                # pull last N samples from appropriate table/column
+                columns = (DATA_COLUMNS if table == 'data' else [column]) + ["ts"]
+                rows = read_rows(table, columns, newest_first=True, limit=n)
 
-            if not rows:
-                return jsonify({"error": "No data available"}), 404
+                if not rows:
+                    return jsonify({"error": "No data available"}), 404
 
-            # reverse to chronological order
-            y = np.array([float(r[0] or 0.0) for r in rows][::-1], dtype=float)
+                # reverse to chronological order
+                if table == 'data':
+                    y = calibrated_data_values(rows)[::-1, int(column[2:]) - 1].copy()
+                else:
+                    y = np.array([np.nan if r[0] is None else r[0] for r in rows][::-1], dtype=float)
+                ts = np.array([r[-1] or 0 for r in rows][::-1], dtype=float)
+
+                # Sampling interval (seconds) -> Fs in Hz
+                dt = float(get_current_interval()) if get_current_interval() > 0 else 1.0
+                fs = 1.0 / dt
+
+                # Only the run after the latest gap is usable. A compressed channel skips
+                # rows on purpose, so its gaps come from the gaps table instead of the
+                # ts steps, and the run is resampled onto an even grid.
+                if column in (get_compression_config()["channels"] or {}):
+                    device = {'sensors': 'basic'}.get(source, source)
+                    with sqlite3.connect(DATABASE) as conn:
+                        gap_end = conn.execute("SELECT MAX(end_ts) FROM gaps WHERE device = ? AND end_ts >= ?",
+                                               (device, int(ts[0]))).fetchone()[0]
+                    start = int(np.searchsorted(ts, gap_end, side='right')) if gap_end is not None else 0
+                else:
+                    breaks = np.flatnonzero(np.diff(ts) > 1500 * dt)
+                    start = breaks[-1] + 1 if len(breaks) else 0
+                y, ts = y[start:], ts[start:]
+                bad = np.isnan(y)
+                if bad.all():
+                    return jsonify({"error": "No valid data"}), 404
+                grid = np.arange(ts[0], ts[-1] + 1, 1000 * dt)[-n:]
+                if len(grid) != len(ts) or bad.any():
+                    y = np.interp(grid, ts[~bad], y[~bad])
+                bad_samples = int(bad.sum())
 
             # If fewer than requested samples, use what's available
             N = len(y)
@@ -1876,10 +5608,6 @@ if __name__ == '__main__':
             if detrend and N > 1:
                 y = y - np.mean(y)
 
-            # Sampling interval (seconds) -> Fs in Hz
-            dt = float(get_current_interval()) if get_current_interval() > 0 else 1.0
-            fs = 1.0 / dt
-
             # rfft computes the FFT of a real-valued signal and returns only positive frequencies
             yf = rfft(y)
             xf = rfftfreq(N, d=dt)
@@ -1895,7 +5623,9 @@ if __name__ == '__main__':
             return jsonify({
                 "source": source,
                 "channel": channel,
+                "mode": mode,
                 "n": N,
+                "interpolated": bad_samples,
                 "fs": fs,
                 "dt": dt,
                 "frequencies": xf.tolist(),
@@ -1903,9 +5633,7 @@ if __name__ == '__main__':
                 "phase": phase.tolist()
             })
         except Exception as e:
-            print(f"[FFT ERROR] {e}")
-            import traceback
-            traceback.print_exc()
+            api_log.exception("[FFT ERROR] %s", e)
             return jsonify({"error": str(e)}), 500
 
     @app.route('/fft')
@@ -168,29 +168,11 @@ function simpleMovingAverage(data, windowSize) {
           startButton.disabled = true
           stopButton.disabled = false
 
-          // Start intervals with correct server timing
-          if (!intervalId) {
-            intervalId = setInterval(fetchData, currentServerInterval)
-          }
-
-          if (!enginePowermeterChartIntervalId) {
-            updateEngineCharts()
-            updatePowermeterCharts()
+          // Follow the live stream (or poll with correct server timing)
+          if (!liveStream && !intervalId) {
             updateCombinedChart()
             updateCharts()
-            enginePowermeterChartIntervalId = setInterval(() => {
-              updateEngineCharts()
-              updatePowermeterCharts()
-            }, currentServerInterval)
-          }
-
-          if (!displayUpdateIntervalId) {
-            loadPowermeterDisplay()
-            loadEngineDisplay()
-            displayUpdateIntervalId = setInterval(() => {
-              loadPowermeterDisplay()
-              loadEngineDisplay()
-            }, currentServerInterval)
+            startLiveUpdates()
           }
 
           isRealtime = true
@@ -201,13 +183,8 @@ function simpleMovingAverage(data, windowSize) {
           startButton.disabled = false
           stopButton.disabled = true
 
-          // Clear intervals when system is stopped
-          clearInterval(intervalId)
-          clearInterval(enginePowermeterChartIntervalId)
-          clearInterval(displayUpdateIntervalId)
-          intervalId = null
-          enginePowermeterChartIntervalId = null
-          displayUpdateIntervalId = null
+          // Stop live updates when system is stopped
+          stopLiveUpdates()
 
           isRealtime = false
         }
@@ -298,6 +275,77 @@ function simpleMovingAverage(data, windowSize) {
   // Make functions globally accessible
   window.getCurrentInterval = getCurrentInterval
   window.updateAllIntervals = updateAllIntervals
+
+  // ===== LIVE UPDATES =====
+  // While recording, the dashboard follows /api/stream: each acquisition
+  // snapshot refreshes the table, the engine/powermeter charts and the device
+  // displays. Without EventSource, or when the server refuses the stream, the
+  // same updates run on timers instead.
+  const ENGINE_CHANNELS = ["e_speed", "e_load", "e_fuelrate", "e_runhour", "e_oilpressure"]
+  const POWERMETER_CHANNELS = ["pm_current", "pm_voltage", "pm_r", "pm_q", "pm_s"]
+  let liveStream = null
+
+  function startLiveUpdates() {
+    stopLiveUpdates()
+    if (typeof EventSource === "undefined") {
+      startPolling()
+      return
+    }
+
+    liveStream = new EventSource("/api/stream?devices=basic,engine,powermeter")
+    liveStream.addEventListener("open", () => {
+      // Settings may have changed while the stream was away
+      engineSettings = null
+      powermeterSettings = null
+    })
+    liveStream.addEventListener("snapshot", (event) => {
+      const values = JSON.parse(event.data).values
+      fetchData()
+      renderEngineCharts(ENGINE_CHANNELS.map((name) => ({ value: values[name] ?? 0 })))
+      renderPowermeterCharts(POWERMETER_CHANNELS.map((name) => ({ value: values[name] ?? 0 })))
+      loadEngineDisplay(values)
+      loadPowermeterDisplay(values)
+    })
+    liveStream.addEventListener("error", () => {
+      // EventSource reconnects by itself; CLOSED means the server refused the stream
+      if (liveStream && liveStream.readyState === EventSource.CLOSED) {
+        console.warn("Live stream closed, falling back to polling")
+        liveStream = null
+        startPolling()
+      }
+    })
+  }
+
+  function startPolling() {
+    intervalId = setInterval(fetchData, currentServerInterval)
+
+    updateEngineCharts()
+    updatePowermeterCharts()
+    enginePowermeterChartIntervalId = setInterval(() => {
+      updateEngineCharts()
+      updatePowermeterCharts()
+    }, currentServerInterval)
+
+    loadPowermeterDisplay()
+    loadEngineDisplay()
+    displayUpdateIntervalId = setInterval(() => {
+      loadPowermeterDisplay()
+      loadEngineDisplay()
+    }, currentServerInterval)
+  }
+
+  function stopLiveUpdates() {
+    if (liveStream) {
+      liveStream.close()
+      liveStream = null
+    }
+    clearInterval(intervalId)
+    clearInterval(enginePowermeterChartIntervalId)
+    clearInterval(displayUpdateIntervalId)
+    intervalId = null
+    enginePowermeterChartIntervalId = null
+    displayUpdateIntervalId = null
+  }
   window.currentServerInterval = currentServerInterval
 
   // ===== CONFIGURATION =====
@@ -650,6 +698,9 @@ function simpleMovingAverage(data, windowSize) {
           .then((res) => res.json())
           .then((res) => {
             console.log(res)
+            // Device displays read the saved addresses again
+            engineSettings = null
+            powermeterSettings = null
             showToast(successMessage.title, successMessage.message)
           })
           .catch((err) => {
@@ -675,20 +726,32 @@ function simpleMovingAverage(data, windowSize) {
   }
 
   // ===== POWERMETER DISPLAY FUNCTIONALITY =====
-  // Update the loadPowermeterDisplay function to improve table layout
-  async function loadPowermeterDisplay() {
+  // Settings are cached between live stream updates; polling reads them every time
+  let powermeterSettings = null
+
+  // Update the loadPowermeterDisplay function to improve table layout.
+  // liveValues: channel values of a live stream snapshot; without them the values are fetched
+  async function loadPowermeterDisplay(liveValues) {
     const powermeterDisplay = document.getElementById("powermeter-display")
     if (!powermeterDisplay) return
 
     try {
-      const [modbusResponse, settingsResponse] = await Promise.all([
-        fetch("/api/powermeter-data"),
-        fetch("/load-powermeter"),
-      ])
-
-      const modbus = await modbusResponse.json()
-      const data = await settingsResponse.json()
-      const pmValues = modbus || []
+      let pmValues
+      if (liveValues) {
+        if (!powermeterSettings) powermeterSettings = await (await fetch("/load-powermeter")).json()
+        pmValues = POWERMETER_CHANNELS.map((name) => ({
+          register: Number.parseInt(powermeterSettings?.[name]),
+          value: liveValues[name] ?? 0,
+        }))
+      } else {
+        const [modbusResponse, settingsResponse] = await Promise.all([
+          fetch("/api/powermeter-data"),
+          fetch("/load-powermeter"),
+        ])
+        pmValues = (await modbusResponse.json()) || []
+        powermeterSettings = await settingsResponse.json()
+      }
+      const data = powermeterSettings
 
       if (data && Object.keys(data).length > 0) {
         powermeterDisplay.innerHTML = `
@@ -723,18 +786,28 @@ function simpleMovingAverage(data, windowSize) {
   }
 
   // ===== ENGINE DISPLAY FUNCTIONALITY =====
-  // Update the loadEngineDisplay function to improve table layout
+  let engineSettings = null
 
-  async function loadEngineDisplay() {
+  // Update the loadEngineDisplay function to improve table layout.
+  // liveValues: channel values of a live stream snapshot; without them the values are fetched
+  async function loadEngineDisplay(liveValues) {
     const engineDisplay = document.getElementById("engine-display")
     if (!engineDisplay) return
 
     try {
-      const [modbusResponse, settingsResponse] = await Promise.all([fetch("/api/engine-data"), fetch("/load-engine")])
-
-      const modbus = await modbusResponse.json()
-      const data = await settingsResponse.json()
-      const engineValues = modbus || []
+      let engineValues
+      if (liveValues) {
+        if (!engineSettings) engineSettings = await (await fetch("/load-engine")).json()
+        engineValues = ENGINE_CHANNELS.map((name) => ({
+          register: Number.parseInt(engineSettings?.[name]),
+          value: liveValues[name] ?? 0,
+        }))
+      } else {
+        const [modbusResponse, settingsResponse] = await Promise.all([fetch("/api/engine-data"), fetch("/load-engine")])
+        engineValues = (await modbusResponse.json()) || []
+        engineSettings = await settingsResponse.json()
+      }
+      const data = engineSettings
 
       if (data && Object.keys(data).length > 0) {
         engineDisplay.innerHTML = `
@@ -795,6 +868,7 @@ function simpleMovingAverage(data, windowSize) {
   let isRealtime = true
   let intervalId = null
   let allData = []
+  let allDataCursor = null // { key: "range|interval", cursor } dari respons delta terakhir
   let filteredData = []
   const currentPage = 1
   const rowsPerPage = 10
@@ -1353,224 +1427,232 @@ function updateCombinedChart() {
 
   // Function to update Engine charts
   function updateEngineCharts() {
+    if (!engineSpeedChart) return;
+    fetch("/api/engine-data")
+      .then((response) => response.json())
+      .then(renderEngineCharts)
+      .catch((error) => {
+        console.error("Error fetching engine data:", error)
+      })
+  }
+
+  // data: [{value}, ...] in channel order, from /api/engine-data or a live stream snapshot
+  function renderEngineCharts(data) {
     // Get current timestamp for the x-axis
     if (!engineSpeedChart) return;
     const now = new Date()
     const timeString = now.toTimeString().split(" ")[0]
 
     // Update Engine Charts
-    fetch("/api/engine-data")
-      .then((response) => response.json())
-      .then((data) => {
-        if (data && data.length) {
-          // Common time operations for all engine charts
-          const maxPoints = 20
-
-          // Engine Speed Chart
-          if (engineSpeedChart.data.labels.length > maxPoints) {
-            engineSpeedChart.data.labels.pop()
-            engineSpeedChart.data.datasets[0].data.pop()
-          }
-          engineSpeedChart.data.labels.unshift(timeString)
-          const speedValue = data[0]?.value || 0
-          engineSpeedChart.data.datasets[0].data.unshift(speedValue)
-          // Update value display
+    if (data && data.length) {
+      // Common time operations for all engine charts
+      const maxPoints = 20
+
+      // Engine Speed Chart
+      if (engineSpeedChart.data.labels.length > maxPoints) {
+        engineSpeedChart.data.labels.pop()
+        engineSpeedChart.data.datasets[0].data.pop()
+      }
+      engineSpeedChart.data.labels.unshift(timeString)
+      const speedValue = data[0]?.value || 0
+      engineSpeedChart.data.datasets[0].data.unshift(speedValue)
+      // Update value display
 
-          engineSpeedChart.update()
-          document.getElementById("engine-speed-value").textContent = speedValue.toFixed(2)
+      engineSpeedChart.update()
+      document.getElementById("engine-speed-value").textContent = speedValue.toFixed(2)
 
-          // Check threshold
-          if (speedValue > warningThresholds.e_speed) {
-            showWarningPopup("Engine Speed", speedValue, warningThresholds.e_speed)
-          }
+      // Check threshold
+      if (speedValue > warningThresholds.e_speed) {
+        showWarningPopup("Engine Speed", speedValue, warningThresholds.e_speed)
+      }
 
-          // Engine Load Chart
-          if (engineLoadChart.data.labels.length > maxPoints) {
-            engineLoadChart.data.labels.pop()
-            engineLoadChart.data.datasets[0].data.pop()
-          }
-          engineLoadChart.data.labels.unshift(timeString)
-          const loadValue = data[1]?.value || 0
-          engineLoadChart.data.datasets[0].data.unshift(loadValue)
-          // Update value display
+      // Engine Load Chart
+      if (engineLoadChart.data.labels.length > maxPoints) {
+        engineLoadChart.data.labels.pop()
+        engineLoadChart.data.datasets[0].data.pop()
+      }
+      engineLoadChart.data.labels.unshift(timeString)
+      const loadValue = data[1]?.value || 0
+      engineLoadChart.data.datasets[0].data.unshift(loadValue)
+      // Update value display
 
-          engineLoadChart.update()
-          document.getElementById("engine-load-value").textContent = loadValue.toFixed(2)
+      engineLoadChart.update()
+      document.getElementById("engine-load-value").textContent = loadValue.toFixed(2)
 
-          // Check threshold
-          if (loadValue > warningThresholds.e_load) {
-            showWarningPopup("Engine Load", loadValue, warningThresholds.e_load)
-          }
+      // Check threshold
+      if (loadValue > warningThresholds.e_load) {
+        showWarningPopup("Engine Load", loadValue, warningThresholds.e_load)
+      }
 
-          // Engine Fuel Rate Chart
-          if (engineFuelrateChart.data.labels.length > maxPoints) {
-            engineFuelrateChart.data.labels.pop()
-            engineFuelrateChart.data.datasets[0].data.pop()
-          }
-          engineFuelrateChart.data.labels.unshift(timeString)
-          const fuelrateValue = data[2]?.value || 0
-          engineFuelrateChart.data.datasets[0].data.unshift(fuelrateValue)
-          // Update value display
+      // Engine Fuel Rate Chart
+      if (engineFuelrateChart.data.labels.length > maxPoints) {
+        engineFuelrateChart.data.labels.pop()
+        engineFuelrateChart.data.datasets[0].data.pop()
+      }
+      engineFuelrateChart.data.labels.unshift(timeString)
+      const fuelrateValue = data[2]?.value || 0
+      engineFuelrateChart.data.datasets[0].data.unshift(fuelrateValue)
+      // Update value display
 
-          engineFuelrateChart.update()
-          document.getElementById("engine-fuelrate-value").textContent = fuelrateValue.toFixed(2)
+      engineFuelrateChart.update()
+      document.getElementById("engine-fuelrate-value").textContent = fuelrateValue.toFixed(2)
 
-          // Check threshold
-          if (fuelrateValue > warningThresholds.e_fuelrate) {
-            showWarningPopup("Engine Fuel Rate", fuelrateValue, warningThresholds.e_fuelrate)
-          }
+      // Check threshold
+      if (fuelrateValue > warningThresholds.e_fuelrate) {
+        showWarningPopup("Engine Fuel Rate", fuelrateValue, warningThresholds.e_fuelrate)
+      }
 
-          // Engine Run Hour Chart
-          if (engineRunhourChart.data.labels.length > maxPoints) {
-            engineRunhourChart.data.labels.pop()
-            engineRunhourChart.data.datasets[0].data.pop()
-          }
-          engineRunhourChart.data.labels.unshift(timeString)
-          const runhourValue = data[3]?.value || 0
-          engineRunhourChart.data.datasets[0].data.unshift(runhourValue)
-          // Update value display
+      // Engine Run Hour Chart
+      if (engineRunhourChart.data.labels.length > maxPoints) {
+        engineRunhourChart.data.labels.pop()
+        engineRunhourChart.data.datasets[0].data.pop()
+      }
+      engineRunhourChart.data.labels.unshift(timeString)
+      const runhourValue = data[3]?.value || 0
+      engineRunhourChart.data.datasets[0].data.unshift(runhourValue)
+      // Update value display
 
-          engineRunhourChart.update()
-          document.getElementById("engine-runhour-value").textContent = runhourValue.toFixed(2)
+      engineRunhourChart.update()
+      document.getElementById("engine-runhour-value").textContent = runhourValue.toFixed(2)
 
-          // Check threshold for run hours
-          if (runhourValue > warningThresholds.e_runhour) {
-            showWarningPopup("Engine Run Hours", runhourValue, warningThresholds.e_runhour)
-          }
+      // Check threshold for run hours
+      if (runhourValue > warningThresholds.e_runhour) {
+        showWarningPopup("Engine Run Hours", runhourValue, warningThresholds.e_runhour)
+      }
 
-          // Engine Oil Pressure Chart
-          if (engineOilpressureChart.data.labels.length > maxPoints) {
-            engineOilpressureChart.data.labels.pop()
-            engineOilpressureChart.data.datasets[0].data.pop()
-          }
-          engineOilpressureChart.data.labels.unshift(timeString)
-          const oilpressureValue = data[4]?.value || 0
-          engineOilpressureChart.data.datasets[0].data.unshift(oilpressureValue)
-          // Update value display
+      // Engine Oil Pressure Chart
+      if (engineOilpressureChart.data.labels.length > maxPoints) {
+        engineOilpressureChart.data.labels.pop()
+        engineOilpressureChart.data.datasets[0].data.pop()
+      }
+      engineOilpressureChart.data.labels.unshift(timeString)
+      const oilpressureValue = data[4]?.value || 0
+      engineOilpressureChart.data.datasets[0].data.unshift(oilpressureValue)
+      // Update value display
 
-          engineOilpressureChart.update()
-          document.getElementById("engine-oilpressure-value").textContent = oilpressureValue.toFixed(2)
+      engineOilpressureChart.update()
+      document.getElementById("engine-oilpressure-value").textContent = oilpressureValue.toFixed(2)
 
-          // Check threshold
-          if (oilpressureValue > warningThresholds.e_oilpressure) {
-            showWarningPopup("Engine Oil Pressure", oilpressureValue, warningThresholds.e_oilpressure)
-          }
-        }
-      })
-      .catch((error) => {
-        console.error("Error fetching engine data:", error)
-      })
+      // Check threshold
+      if (oilpressureValue > warningThresholds.e_oilpressure) {
+        showWarningPopup("Engine Oil Pressure", oilpressureValue, warningThresholds.e_oilpressure)
+      }
+    }
   }
 
   // Modify updatePowermeterCharts to check thresholds after updating
   function updatePowermeterCharts() {
+    if (!powermeterCurrentChart) return;
+    fetch("/api/powermeter-data")
+      .then((response) => response.json())
+      .then(renderPowermeterCharts)
+      .catch((error) => {
+        console.error("Error fetching powermeter data:", error)
+      })
+  }
+
+  // data: [{value}, ...] in channel order, from /api/powermeter-data or a live stream snapshot
+  function renderPowermeterCharts(data) {
     // Get current timestamp for the x-axis
     if (!powermeterCurrentChart) return;
     const now = new Date()
     const timeString = now.toTimeString().split(" ")[0]
 
     // Update Powermeter Charts
-    fetch("/api/powermeter-data")
-      .then((response) => response.json())
-      .then((data) => {
-        if (data && data.length) {
-          // Common time operations for all powermeter charts
-          const maxPoints = 20
-
-          // Current Chart
-          if (powermeterCurrentChart.data.labels.length > maxPoints) {
-            powermeterCurrentChart.data.labels.pop()
-            powermeterCurrentChart.data.datasets[0].data.pop()
-          }
-          powermeterCurrentChart.data.labels.unshift(timeString)
-          const currentValue = data[0]?.value || 0
-          powermeterCurrentChart.data.datasets[0].data.unshift(currentValue)
-          // Update value display
+    if (data && data.length) {
+      // Common time operations for all powermeter charts
+      const maxPoints = 20
+
+      // Current Chart
+      if (powermeterCurrentChart.data.labels.length > maxPoints) {
+        powermeterCurrentChart.data.labels.pop()
+        powermeterCurrentChart.data.datasets[0].data.pop()
+      }
+      powermeterCurrentChart.data.labels.unshift(timeString)
+      const currentValue = data[0]?.value || 0
+      powermeterCurrentChart.data.datasets[0].data.unshift(currentValue)
+      // Update value display
 
-          powermeterCurrentChart.update()
-          document.getElementById("powermeter-current-value").textContent = currentValue.toFixed(2)
+      powermeterCurrentChart.update()
+      document.getElementById("powermeter-current-value").textContent = currentValue.toFixed(2)
 
-          // Check threshold
-          if (currentValue > warningThresholds.pm_current) {
-            showWarningPopup("Powermeter Current", currentValue, warningThresholds.pm_current)
-          }
+      // Check threshold
+      if (currentValue > warningThresholds.pm_current) {
+        showWarningPopup("Powermeter Current", currentValue, warningThresholds.pm_current)
+      }
 
-          // Voltage Chart
-          if (powermeterVoltageChart.data.labels.length > maxPoints) {
-            powermeterVoltageChart.data.labels.pop()
-            powermeterVoltageChart.data.datasets[0].data.pop()
-          }
-          powermeterVoltageChart.data.labels.unshift(timeString)
-          const voltageValue = data[1]?.value || 0
-          powermeterVoltageChart.data.datasets[0].data.unshift(voltageValue)
-          // Update value display
+      // Voltage Chart
+      if (powermeterVoltageChart.data.labels.length > maxPoints) {
+        powermeterVoltageChart.data.labels.pop()
+        powermeterVoltageChart.data.datasets[0].data.pop()
+      }
+      powermeterVoltageChart.data.labels.unshift(timeString)
+      const voltageValue = data[1]?.value || 0
+      powermeterVoltageChart.data.datasets[0].data.unshift(voltageValue)
+      // Update value display
 
-          powermeterVoltageChart.update()
-          document.getElementById("powermeter-voltage-value").textContent = voltageValue.toFixed(2)
+      powermeterVoltageChart.update()
+      document.getElementById("powermeter-voltage-value").textContent = voltageValue.toFixed(2)
 
-          // Check threshold
-          if (voltageValue > warningThresholds.pm_voltage) {
-            showWarningPopup("Powermeter Voltage", voltageValue, warningThresholds.pm_voltage)
-          }
+      // Check threshold
+      if (voltageValue > warningThresholds.pm_voltage) {
+        showWarningPopup("Powermeter Voltage", voltageValue, warningThresholds.pm_voltage)
+      }
 
-          // R Chart
-          if (powermeterRChart.data.labels.length > maxPoints) {
-            powermeterRChart.data.labels.pop()
-            powermeterRChart.data.datasets[0].data.pop()
-          }
-          powermeterRChart.data.labels.unshift(timeString)
-          const rValue = data[2]?.value || 0
-          powermeterRChart.data.datasets[0].data.unshift(rValue)
-          // Update value display
+      // R Chart
+      if (powermeterRChart.data.labels.length > maxPoints) {
+        powermeterRChart.data.labels.pop()
+        powermeterRChart.data.datasets[0].data.pop()
+      }
+      powermeterRChart.data.labels.unshift(timeString)
+      const rValue = data[2]?.value || 0
+      powermeterRChart.data.datasets[0].data.unshift(rValue)
+      // Update value display
 
-          powermeterRChart.update()
-          document.getElementById("powermeter-r-value").textContent = rValue.toFixed(2)
+      powermeterRChart.update()
+      document.getElementById("powermeter-r-value").textContent = rValue.toFixed(2)
 
-          // Check threshold
-          if (rValue > warningThresholds.pm_r) {
-            showWarningPopup("Powermeter R", rValue, warningThresholds.pm_r)
-          }
+      // Check threshold
+      if (rValue > warningThresholds.pm_r) {
+        showWarningPopup("Powermeter R", rValue, warningThresholds.pm_r)
+      }
 
-          // Q Chart
-          if (powermeterQChart.data.labels.length > maxPoints) {
-            powermeterQChart.data.labels.pop()
-            powermeterQChart.data.datasets[0].data.pop()
-          }
-          powermeterQChart.data.labels.unshift(timeString)
-          const qValue = data[3]?.value || 0
-          powermeterQChart.data.datasets[0].data.unshift(qValue)
-          // Update value display
+      // Q Chart
+      if (powermeterQChart.data.labels.length > maxPoints) {
+        powermeterQChart.data.labels.pop()
+        powermeterQChart.data.datasets[0].data.pop()
+      }
+      powermeterQChart.data.labels.unshift(timeString)
+      const qValue = data[3]?.value || 0
+      powermeterQChart.data.datasets[0].data.unshift(qValue)
+      // Update value display
 
-          powermeterQChart.update()
-          document.getElementById("powermeter-q-value").textContent = qValue.toFixed(2)
+      powermeterQChart.update()
+      document.getElementById("powermeter-q-value").textContent = qValue.toFixed(2)
 
-          // Check threshold
-          if (qValue > warningThresholds.pm_q) {
-            showWarningPopup("Powermeter Q", qValue, warningThresholds.pm_q)
-          }
+      // Check threshold
+      if (qValue > warningThresholds.pm_q) {
+        showWarningPopup("Powermeter Q", qValue, warningThresholds.pm_q)
+      }
 
-          // S Chart
-          if (powermeterSChart.data.labels.length > maxPoints) {
-            powermeterSChart.data.labels.pop()
-            powermeterSChart.data.datasets[0].data.pop()
-          }
-          powermeterSChart.data.labels.unshift(timeString)
-          const sValue = data[4]?.value || 0
-          powermeterSChart.data.datasets[0].data.unshift(sValue)
-          // Update value display
+      // S Chart
+      if (powermeterSChart.data.labels.length > maxPoints) {
+        powermeterSChart.data.labels.pop()
+        powermeterSChart.data.datasets[0].data.pop()
+      }
+      powermeterSChart.data.labels.unshift(timeString)
+      const sValue = data[4]?.value || 0
+      powermeterSChart.data.datasets[0].data.unshift(sValue)
+      // Update value display
 
-          powermeterSChart.update()
-          document.getElementById("powermeter-s-value").textContent = sValue.toFixed(2)
+      powermeterSChart.update()
+      document.getElementById("powermeter-s-value").textContent = sValue.toFixed(2)
 
-          // Check threshold
-          if (sValue > warningThresholds.pm_s) {
-            showWarningPopup("Powermeter S", sValue, warningThresholds.pm_s)
-          }
-        }
-      })
-      .catch((error) => {
-        console.error("Error fetching powermeter data:", error)
-      })
+      // Check threshold
+      if (sValue > warningThresholds.pm_s) {
+        showWarningPopup("Powermeter S", sValue, warningThresholds.pm_s)
+      }
+    }
   }
 
 
@@ -1668,11 +1750,29 @@ function fetchData() {
 
     console.log(`FETCH: Meminta data untuk range '${currentTimeRange}' dengan interval display '${intervalForAPI}s'`);
 
+    // Range dan interval yang sama: minta delta sejak cursor terakhir saja
+    const key = `${currentTimeRange}|${intervalForAPI}`;
+    const isDelta = allDataCursor !== null && allDataCursor.key === key;
+    const cursor = isDelta ? allDataCursor.cursor : { since_id: 0 };
+    const params = new URLSearchParams({ range: currentTimeRange, interval: intervalForAPI });
+    if (cursor.since_id !== null) params.set('since_id', cursor.since_id);
+    if (cursor.since_ts !== null && cursor.since_ts !== undefined) params.set('since_ts', cursor.since_ts);
+    if (cursor.epoch !== undefined) params.set('epoch', cursor.epoch);
+
     // Kirim 'range' dan 'interval' ke backend
-    fetch(`/api/all-data?range=${currentTimeRange}&interval=${intervalForAPI}`)
+    fetch(`/api/all-data?${params}`)
         .then(response => response.json())
-        .then(data => {
-            allData = data;
+        .then(result => {
+            if (isDelta && (allDataCursor === null || allDataCursor.key !== key)) return; // range berubah di tengah jalan
+            if (isDelta && !result.reset) {
+                // Bucket yang dikirim ulang menggantikan baris lama; baris di luar range dibuang
+                const updated = new Set(result.rows.map(row => row.bucket));
+                allData = result.rows.concat(allData.filter(row => !updated.has(row.bucket) && row.bucket >= result.start_ts));
+            } else {
+                // Respons penuh, atau log sudah di-clear (reset): data lama tidak berlaku lagi
+                allData = result.rows;
+            }
+            allDataCursor = { key, cursor: result.cursor };
             updateStatusIndicator(true);
             renderTable();
             updateCharts();
@@ -2106,59 +2206,15 @@ window.selectTimeRange = (range) => {
           console.log("Data received:", data)
           showNotification("Data logging started successfully", "success")
 
-          // Get current server interval
+          // Get current server interval (used when falling back to polling)
           await getCurrentInterval()
 
-          // Start all intervals with server timing
-          if (intervalId) clearInterval(intervalId)
-          intervalId = setInterval(() => {
-            fetchData()
-          }, currentServerInterval) // Use server interval instead of refreshRate
-
-          if (enginePowermeterChartIntervalId) clearInterval(enginePowermeterChartIntervalId)
-          updateEngineCharts()
-          updatePowermeterCharts()
-          enginePowermeterChartIntervalId = setInterval(() => {
-            updateEngineCharts()
-            updatePowermeterCharts()
-          }, currentServerInterval)
-
-          if (displayUpdateIntervalId) clearInterval(displayUpdateIntervalId)
-          loadPowermeterDisplay()
-          loadEngineDisplay()
-          displayUpdateIntervalId = setInterval(() => {
-            loadPowermeterDisplay()
-            loadEngineDisplay()
-          }, currentServerInterval)
-
-          // ... rest of existing code ...
           startButton.classList.remove("btn-primary")
           startButton.classList.add("btn-disabled")
           updateStatusIndicator(true)
 
-          // Jalankan ulang interval data utama
-          if (intervalId) clearInterval(intervalId)
-          intervalId = setInterval(() => {
-            fetchData()
-          }, refreshRate)
-
-          // Jalankan ulang interval chart engine dan powermeter
-          if (enginePowermeterChartIntervalId) clearInterval(enginePowermeterChartIntervalId)
-          updateEngineCharts()
-          updatePowermeterCharts()
-          enginePowermeterChartIntervalId = setInterval(() => {
-            updateEngineCharts()
-            updatePowermeterCharts()
-          }, intervaltime.delay)
-
-          // Jalankan ulang display engine & powermeter
-          if (displayUpdateIntervalId) clearInterval(displayUpdateIntervalId)
-          loadPowermeterDisplay()
-          loadEngineDisplay()
-          displayUpdateIntervalId = setInterval(() => {
-            loadPowermeterDisplay()
-            loadEngineDisplay()
-          }, intervaltime.delay)
+          // Tabel, chart dan display engine & powermeter mengikuti live stream
+          startLiveUpdates()
 
           isRealtime = true
           updateCombinedChart()
@@ -2201,10 +2257,8 @@ window.selectTimeRange = (range) => {
           showNotification("Data logging stopped", "success")
           updateStatusIndicator(false)
 
-          // Hentikan semua interval
-          clearInterval(intervalId)
-          clearInterval(enginePowermeterChartIntervalId)
-          clearInterval(displayUpdateIntervalId)
+          // Hentikan live stream / semua interval
+          stopLiveUpdates()
 
           // Reset UI
           startButton.disabled = false
@@ -2229,6 +2283,8 @@ window.selectTimeRange = (range) => {
         .then((res) => res.json())
         .then((data) => {
           alert(data.message)
+          allData = []
+          allDataCursor = null
           // Optional: Kosongkan isi tabel HTML juga
           document.getElementById("data-table").innerHTML = `
                 <tr>
@@ -0,0 +1,28 @@
+import importlib.util
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def isms(tmp_path_factory):
+    """app.py imported from a scratch copy, so its database and partitions live in a temp dir"""
+    base = tmp_path_factory.mktemp("isms")
+    for name in ("app.py", "config.json", "sensor_settings.json", "time_interval.txt"):
+        if os.path.exists(os.path.join(ROOT, name)):
+            shutil.copy(os.path.join(ROOT, name), base)
+    cwd = os.getcwd()
+    os.chdir(base)
+    try:
+        spec = importlib.util.spec_from_file_location("app", base / "app.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["app"] = module
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        module.ingest_writer.stop()
+        os.chdir(cwd)
@@ -0,0 +1,31 @@
+import numpy as np
+
+
+def test_flag_columns_round_trip_exactly(isms, tmp_path):
+    n = 5
+    held = [(1 << 24) | 1, 1 << (isms.HELD_INTERP_SHIFT + 9), np.nan, 0, (1 << 25) - 1]
+    columns = {"id": np.arange(1, n + 1, dtype=np.float64),
+               "ts": np.arange(n, dtype=np.float64) * 1000 + 1_700_000_000_000,
+               "held": np.array(held, dtype=np.float64),
+               "quality": np.array([0, 2, np.nan, 8, 15], dtype=np.float64)}
+    for name in isms.FULL_DATA_COLUMNS:
+        columns[name] = np.linspace(0, 1, n)
+
+    path = tmp_path / "full_data_test.arc"
+    writer = isms.ArchiveWriter(str(path), "full_data")
+    writer.add_block(columns)
+    writer.close()
+    with isms.ArchiveReader(str(path)) as archive:
+        arrays = archive.read(["held", "quality"])
+    rows = isms.archive_rows(arrays, ["id", "held", "quality"])
+
+    assert [row[1] for row in rows] == [(1 << 24) | 1, 1 << 25, None, 0, (1 << 25) - 1]
+    assert [row[2] for row in rows] == [0, 2, None, 8, 15]
+
+
+def test_exact_column_constant_and_null_blocks(isms):
+    for values, expected in (([7.0, 7.0, 7.0], [7, 7, 7]), ([np.nan] * 3, [None] * 3)):
+        entry, payload = isms.encode_archive_column(np.array(values), exact=True)
+        assert entry["enc"] == "const" and payload == b""
+        decoded = isms.decode_archive_column(b"", entry, 3)
+        assert [None if v != v else int(v) for v in decoded] == expected
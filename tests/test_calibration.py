@@ -0,0 +1,13 @@
+import math
+
+
+def test_disabled_channels_calibrate_to_nan(isms):
+    calibrations = [isms.default_calibration(i) for i in range(1, isms.SENSOR_COUNT + 1)]
+    calibrations[1].update(enabled=False)
+    calibrations[2].update(min=10.0, max=20.0)
+    snapshot = isms.CalibrationSnapshot(99, calibrations)
+
+    values = snapshot.apply([50.0] * isms.SENSOR_COUNT).tolist()
+    assert values[0] == 50.0
+    assert math.isnan(values[1])
+    assert values[2] == 15.0
@@ -0,0 +1,62 @@
+import itertools
+import time
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def client(isms):
+    client = isms.app.test_client()
+    with client.session_transaction() as session:
+        session.update(user_id=1, username="ksbengdev", is_admin=1)
+    return client
+
+
+STAMPS = itertools.count(int(time.time()) * 1000 - 600 * 1000, 1000)
+
+
+def store(isms, count):
+    for _ in range(count):
+        ts = next(STAMPS)
+        stamp = datetime.fromtimestamp(ts / 1000)
+        isms.store_snapshot({"ts": ts, "date": stamp.strftime("%Y-%m-%d"), "time": stamp.strftime("%H:%M:%S"),
+                             "cycle_ms": 1, "devices": {"basic": {"connected": True, "timed_out": False,
+                                                                 "values": {f"ch{k}": 50.0 for k in range(1, 8)}},
+                                                        "engine": None, "powermeter": None}}, 1)
+    isms.ingest_writer.flush()
+
+
+def delta(client, cursor):
+    params = {"range": "1h", "interval": 1, **{k: v for k, v in cursor.items() if v is not None}}
+    return client.get("/api/all-data", query_string=params).get_json()
+
+
+def test_cursor_from_before_clear_gets_a_full_reset_response(isms, client):
+    store(isms, 3)
+    first = delta(client, {"since_id": 0})
+    assert not first["reset"] and len(first["rows"]) >= 3
+    assert client.post("/clear-log").get_json()["status"] == "success"
+    assert isms.live_rings["data"].latest() is None
+
+    store(isms, 2)
+    # since_id above every id handed out since the sequence was reset
+    stale = delta(client, {"since_id": first["cursor"]["since_id"]})
+    assert stale["reset"] and len(stale["rows"]) == 2
+
+    store(isms, 4)
+    # ids caught up again; the epoch still tells the cursor is from before the clear
+    stale = delta(client, first["cursor"])
+    assert stale["reset"] and len(stale["rows"]) == 6
+    fresh = delta(client, stale["cursor"])
+    assert not fresh["reset"] and fresh["rows"] == []
+
+
+def test_ring_samples_and_database_rows_have_the_same_keys(isms, client):
+    store(isms, 2)
+    live = client.get("/api/data?n=1").get_json()[0]
+    isms.live_rings["data"].clear()
+    stored = client.get("/api/data?n=1").get_json()[0]
+    assert live["id"] is None and stored["seq"] is None
+    assert sorted(live) == sorted(stored)
+    assert live["ts"] == stored["ts"]
@@ -0,0 +1,22 @@
+import threading
+
+
+def test_subscriber_before_first_event_blocks_until_publish(isms, monkeypatch):
+    monkeypatch.setattr(isms, "STREAM_HEARTBEAT_SECONDS", 5)
+    stream = isms.LiveStream(10)
+    frames = stream.subscribe()
+    assert next(frames).startswith("retry:")
+
+    received = []
+    reader = threading.Thread(target=lambda: received.append(next(frames)))
+    reader.start()
+    reader.join(0.3)
+    # Nothing published yet: the subscriber waits instead of sending heartbeats in a loop
+    assert reader.is_alive()
+    assert received == []
+
+    stream.publish({"ts": 1000, "date": "2026-01-01", "time": "00:00:01"},
+                   {"values": {"ch1": 1.5}, "quality": {"basic": 0}})
+    reader.join(2)
+    assert not reader.is_alive()
+    assert received[0].startswith("id: 1\nevent: snapshot\n")
@@ -0,0 +1,28 @@
+import logging
+import threading
+
+
+def test_concurrent_emits_get_unique_sequence_numbers(isms):
+    ring = isms.LogRing(10000)
+    logger = logging.getLogger("isms.test.ring")
+    logger.propagate = False
+    logger.addHandler(ring)
+    try:
+        def worker(n):
+            for i in range(500):
+                logger.warning("worker %s record %s", n, i)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        logger.removeHandler(ring)
+
+    records = ring.dump(limit=10000)
+    seqs = [r["seq"] for r in records]
+    assert len(records) == 4000
+    assert seqs == sorted(seqs)
+    assert len(set(seqs)) == 4000
+    assert records[0]["message"].startswith("worker ")
@@ -0,0 +1,3 @@
+def test_fields_without_address_are_left_out(isms):
+    plan = isms.plan_register_reads({"a": 4, "b": None, "c": 0, "d": -1})
+    assert plan == [(0, 6, [("c", 0), ("a", 4)])]
@@ -0,0 +1,46 @@
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+
+def read_buckets(isms, table, low, high):
+    with sqlite3.connect(isms.DATABASE) as conn:
+        return conn.execute(f"SELECT * FROM {table} WHERE bucket >= ? AND bucket < ? ORDER BY bucket",
+                            (low, high)).fetchall()
+
+
+def test_rebuild_matches_ingest_with_compressed_channels(isms):
+    hour = 3600 * 1000
+    base = (int(time.time() * 1000) // hour - 5) * hour
+    columns = isms.FULL_DATA_COLUMNS
+    config = {"maxHoldSeconds": 0,
+              "channels": {name: {"mode": "deadband", "tolerance": 0.5} for name in columns}}
+    with isms.compressors_lock:
+        isms.flush_compressors()
+        isms.compressors["full_data"] = isms.ChannelCompressor("full_data", config)
+    try:
+        for i in range(200):
+            ts = base + i * 5000
+            # Steps at different rates, so rows range from fully held to fully stored
+            values = [float(i // (k + 3) * 10) for k in range(len(columns))]
+            if i == 7:
+                values[0] = None  # not read
+            stamp = datetime.fromtimestamp(ts / 1000)
+            row = (ts, stamp.strftime("%Y-%m-%d"), stamp.strftime("%H:%M:%S"), *values, 0)
+            isms.submit_compressed("full_data", ts, values, row)
+            isms.submit_rollups("full_data", ts, values)
+        isms.flush_compressors()
+    finally:
+        isms.load_compressors()
+    isms.ingest_writer.flush()
+
+    tables = [isms.rollup_table("full_data", resolution) for resolution, _ in isms.ROLLUP_RESOLUTIONS]
+    ingested = {table: read_buckets(isms, table, base, base + hour) for table in tables}
+    assert isms.rebuild_rollups("full_data", base, base + 1) > 0
+    for table in tables:
+        rebuilt = read_buckets(isms, table, base, base + hour)
+        assert len(rebuilt) == len(ingested[table])
+        for before, after in zip(ingested[table], rebuilt):
+            assert after == pytest.approx(before)